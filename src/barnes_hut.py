@@ -0,0 +1,224 @@
+"""
+barnes_hut.py
+Evaluación aproximada de campo y potencial con un árbol de cuadrantes
+(Barnes–Hut) para nubes con muchas cargas puntuales.
+
+Cada nodo del árbol guarda los momentos de sus cargas (monopolo, dipolo y
+cuadrupolo) respecto de su centro geométrico. Un grupo de cargas lejano se
+evalúa con esos momentos en lugar de sumar carga por carga; el criterio de
+apertura es tamaño_nodo / distancia < theta.
+"""
+import numpy as np
+
+from logic import K, ConjuntoCargas, calcular_campo_y_potencial_lote
+
+# Distancia mínima para el potencial, igual que en calcular_potencial_total
+DISTANCIA_MINIMA = 1e-6
+
+# Por debajo de esta cantidad de cargas se suma en forma directa
+N_DIRECTO = 256
+
+
+class _Nodo:
+    """Nodo del árbol: un cuadrado con las cargas [ini, fin) del arreglo ordenado."""
+    __slots__ = ('cx', 'cy', 'mitad', 'ini', 'fin', 'hijos',
+                 'Q', 'px', 'py', 'Qxx', 'Qyy', 'Qxy')
+
+
+class ArbolCuadrantes:
+    """
+    Árbol de cuadrantes sobre un conjunto de cargas.
+
+    Las cargas se reordenan de modo que cada nodo ocupa un rango contiguo
+    (q, x, y)[ini:fin]; dentro de cada hoja se conserva el orden original.
+
+    Parámetros:
+    - cargas: ConjuntoCargas o lista de tuplas [(carga1, x1, y1), ...]
+    - hoja: cantidad máxima de cargas por hoja
+    - profundidad_max: límite de subdivisión (cargas repetidas en un punto)
+    """
+
+    def __init__(self, cargas, hoja=32, profundidad_max=32):
+        cargas = ConjuntoCargas.desde(cargas)
+        if len(cargas) == 0:
+            raise ValueError("El árbol necesita al menos una carga")
+
+        self.cargas = cargas
+        self.hoja = hoja
+        self.q = cargas.q.copy()
+        self.x = cargas.x.copy()
+        self.y = cargas.y.copy()
+
+        x_min, x_max, y_min, y_max = cargas.caja
+        mitad = max(x_max - x_min, y_max - y_min) / 2
+        mitad = mitad * (1 + 1e-9) if mitad > 0 else 1.0
+        self.raiz = self._dividir(0, len(self.q), (x_min + x_max) / 2, (y_min + y_max) / 2,
+                                  mitad, profundidad_max)
+
+    def _dividir(self, ini, fin, cx, cy, mitad, profundidad):
+        nodo = _Nodo()
+        nodo.cx, nodo.cy, nodo.mitad = cx, cy, mitad
+        nodo.ini, nodo.fin = ini, fin
+        nodo.hijos = []
+
+        # Momentos respecto del centro geométrico del nodo
+        q = self.q[ini:fin]
+        dx = self.x[ini:fin] - cx
+        dy = self.y[ini:fin] - cy
+        d2 = dx * dx + dy * dy
+        nodo.Q = q.sum()
+        nodo.px = np.dot(q, dx)
+        nodo.py = np.dot(q, dy)
+        nodo.Qxx = np.dot(q, 3 * dx * dx - d2)
+        nodo.Qyy = np.dot(q, 3 * dy * dy - d2)
+        nodo.Qxy = np.dot(q, 3 * dx * dy)
+
+        if fin - ini <= self.hoja or profundidad == 0:
+            return nodo
+
+        # Reordenar las cargas del nodo por cuadrante (orden estable)
+        cuadrante = (self.x[ini:fin] >= cx).astype(int) + 2 * (self.y[ini:fin] >= cy)
+        perm = np.argsort(cuadrante, kind='stable')
+        for arr in (self.q, self.x, self.y):
+            arr[ini:fin] = arr[ini:fin][perm]
+
+        cuenta = np.bincount(cuadrante, minlength=4)
+        inicio = ini
+        for k in range(4):
+            if cuenta[k] == 0:
+                continue
+            hx = cx + (mitad / 2 if k & 1 else -mitad / 2)
+            hy = cy + (mitad / 2 if k & 2 else -mitad / 2)
+            nodo.hijos.append(self._dividir(inicio, inicio + cuenta[k], hx, hy,
+                                            mitad / 2, profundidad - 1))
+            inicio += cuenta[k]
+        return nodo
+
+
+def _sumar_directo(q, xq, yq, px, py):
+    """
+    Suma directa de unas pocas cargas sobre muchos puntos, con las mismas
+    reglas de singularidad que calcular_campo_y_potencial_lote.
+    """
+    dx = px[:, None] - xq
+    dy = py[:, None] - yq
+    r = np.sqrt(dx**2 + dy**2)
+    coincide = r == 0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        factor = K * q / (r**3)
+    factor[coincide] = 0.0
+    Ex = (factor * dx).sum(axis=1)
+    Ey = (factor * dy).sum(axis=1)
+    V = (K * q / np.maximum(r, DISTANCIA_MINIMA)).sum(axis=1)
+
+    # Punto sobre una carga: ±inf según la primera carga que coincide
+    hay = coincide.any(axis=1)
+    if hay.any():
+        primera = coincide[hay].argmax(axis=1)
+        V[hay] = np.where(q[primera] > 0, np.inf, -np.inf)
+
+    return Ex, Ey, V
+
+
+def _sumar_multipolo(nodo, px, py):
+    """Campo y potencial de un nodo lejano usando monopolo + dipolo + cuadrupolo."""
+    Rx = px - nodo.cx
+    Ry = py - nodo.cy
+    R2 = Rx * Rx + Ry * Ry
+    R = np.sqrt(R2)
+    R3 = R2 * R
+    R5 = R3 * R2
+
+    pR = nodo.px * Rx + nodo.py * Ry
+    QRx = nodo.Qxx * Rx + nodo.Qxy * Ry
+    QRy = nodo.Qxy * Rx + nodo.Qyy * Ry
+    RQR = Rx * QRx + Ry * QRy
+
+    V = K * (nodo.Q / R + pR / R3 + 0.5 * RQR / R5)
+
+    # E = -∇V, término a término
+    radial = nodo.Q / R3 + 3 * pR / R5 + 2.5 * RQR / (R5 * R2)
+    Ex = K * (radial * Rx - nodo.px / R3 - QRx / R5)
+    Ey = K * (radial * Ry - nodo.py / R3 - QRy / R5)
+
+    return Ex, Ey, V
+
+
+def evaluar_barnes_hut(cargas, x_puntos, y_puntos, theta=0.5, hoja=32, n_directo=N_DIRECTO):
+    """
+    Calcula campo y potencial totales en muchos puntos con Barnes–Hut.
+
+    Con pocas cargas (N <= n_directo) se usa la suma directa de
+    calcular_campo_y_potencial_lote. Cerca de las cargas siempre se suma
+    en forma directa, así que se mantienen las reglas en puntos singulares.
+
+    Parámetros:
+    - cargas: ConjuntoCargas, lista de tuplas o un ArbolCuadrantes ya construido
+    - x_puntos, y_puntos: arrays (o escalares) de cualquier forma compatible
+    - theta: ángulo de apertura (0 = suma exacta; 0.3-0.7 es lo habitual)
+    - hoja: cargas por hoja al construir el árbol
+    - n_directo: por debajo de esta cantidad de cargas se suma en forma directa
+
+    Retorna: (Ex, Ey, magnitud, angulo, V) arrays con la forma de los puntos
+    """
+    if theta < 0:
+        raise ValueError("theta debe ser mayor o igual a 0")
+
+    if isinstance(cargas, ArbolCuadrantes):
+        arbol = cargas
+    else:
+        cargas = ConjuntoCargas.desde(cargas)
+        if len(cargas) <= n_directo:
+            return calcular_campo_y_potencial_lote(cargas, x_puntos, y_puntos)
+        arbol = ArbolCuadrantes(cargas, hoja=hoja)
+
+    x_puntos, y_puntos = np.broadcast_arrays(np.asarray(x_puntos, dtype=float),
+                                             np.asarray(y_puntos, dtype=float))
+    forma = x_puntos.shape
+    px = x_puntos.ravel()
+    py = y_puntos.ravel()
+
+    Ex = np.zeros(px.size)
+    Ey = np.zeros(px.size)
+    V = np.zeros(px.size)
+
+    # Recorrido en profundidad: cada nodo recibe los puntos que todavía lo necesitan
+    pendientes = [(arbol.raiz, np.arange(px.size))]
+    while pendientes:
+        nodo, idx = pendientes.pop()
+        dx = px[idx] - nodo.cx
+        dy = py[idx] - nodo.cy
+        lejos = (dx * dx + dy * dy) * theta**2 > (2 * nodo.mitad)**2
+
+        if lejos.any():
+            i_lejos = idx[lejos]
+            ex, ey, v = _sumar_multipolo(nodo, px[i_lejos], py[i_lejos])
+            Ex[i_lejos] += ex
+            Ey[i_lejos] += ey
+            V[i_lejos] += v
+
+        cerca = idx[~lejos]
+        if cerca.size == 0:
+            continue
+
+        if nodo.hijos:
+            pendientes.extend((hijo, cerca) for hijo in nodo.hijos)
+        else:
+            s = slice(nodo.ini, nodo.fin)
+            # Por bloques para acotar la matriz puntos × cargas de la hoja
+            for i in range(0, cerca.size, 65536):
+                bloque = cerca[i:i + 65536]
+                ex, ey, v = _sumar_directo(arbol.q[s], arbol.x[s], arbol.y[s],
+                                           px[bloque], py[bloque])
+                Ex[bloque] += ex
+                Ey[bloque] += ey
+                V[bloque] += v
+
+    Ex = Ex.reshape(forma)
+    Ey = Ey.reshape(forma)
+    V = V.reshape(forma)
+    magnitud = np.sqrt(Ex**2 + Ey**2)
+    angulo = np.degrees(np.arctan2(Ey, Ex))
+
+    return Ex, Ey, magnitud, angulo, V
@@ -0,0 +1,338 @@
+"""
+benchmark.py
+Mediciones de tiempo de los cálculos y de los gráficos, para detectar
+regresiones de rendimiento.
+
+Cada caso es una función de logic.py con un juego de parámetros: cantidad de
+cargas (nubes aleatorias con semilla fija, siempre las mismas) y tamaño de la
+malla o de la muestra. Los resultados se guardan en JSON y pueden compararse
+con una corrida anterior guardada como base: los casos cuya mediana empeora
+más que la tolerancia se informan como regresiones.
+
+Un caso que falla queda en los resultados con la clave 'error' (y la corrida
+sigue con los demás).
+
+Los cachés en memoria (líneas de campo, capas de las mallas) se vacían antes
+de cada repetición, así que se mide el cálculo completo y no el caché.
+
+Uso:
+    python src/benchmark.py --salida bench.json
+    python src/benchmark.py --salida bench.json --base base.json --tolerancia 0.2
+    python src/benchmark.py --rapido --solo calcular_campo_total,graficar_lineas_campo
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+import logic
+import nucleos
+
+VERSION_FORMATO = 1
+
+# Punto de cálculo de los casos que lo necesitan
+PUNTO = (0.5, 0.5)
+
+
+def nube_aleatoria(n, rango=(-4, 4), semilla=0):
+    """
+    Nube de cargas aleatorias, reproducible.
+
+    Parámetros:
+    - n: cantidad de cargas
+    - rango: tupla (min, max) de ambas coordenadas
+    - semilla: semilla del generador
+
+    Retorna: lista de tuplas [(carga, x, y), ...] con |carga| entre 1 y 5
+    """
+    rng = np.random.default_rng(semilla)
+    q = rng.uniform(1, 5, n) * rng.choice([-1.0, 1.0], n)
+    x, y = rng.uniform(rango[0], rango[1], (2, n))
+    return [(float(qi), float(xi), float(yi)) for qi, xi, yi in zip(q, x, y)]
+
+
+def _barrido(funcion, **valores):
+    """Todas las combinaciones de los valores dados, como lista de dicts."""
+    casos = [{}]
+    for nombre, opciones in valores.items():
+        casos = [dict(caso, **{nombre: v}) for caso in casos for v in opciones]
+    return [(funcion, caso) for caso in casos]
+
+
+def definir_casos(rapido=False):
+    """
+    Casos a medir.
+
+    Parámetros:
+    - rapido: barrido reducido, para una verificación en pocos segundos
+
+    Retorna: lista de (nombre de la función, parámetros)
+    """
+    if rapido:
+        return (_barrido('calcular_campo_total', n_cargas=[3, 100])
+                + _barrido('calcular_potencial_total', n_cargas=[3, 100])
+                + _barrido('encontrar_puntos_equilibrio', n_cargas=[3, 30])
+                + _barrido('graficar_campo_electrico', n_cargas=[3], num_puntos=[1000],
+                           adaptativo=[False])
+                + _barrido('graficar_campo_electrico', n_cargas=[3], adaptativo=[True])
+                + _barrido('graficar_lineas_campo', n_cargas=[3], resolucion=[20])
+                + _barrido('graficar_superficies_equipotenciales', n_cargas=[3],
+                           num_puntos=[100])
+                + _barrido('graficar_superficies_equipotenciales', n_cargas=[3],
+                           adaptativo=[True])
+                + _barrido('graficar_superposicion_equipotenciales_y_campo', n_cargas=[3],
+                           num_puntos=[100]))
+    return (_barrido('calcular_campo_total', n_cargas=[1, 3, 10, 100, 1000, 10000])
+            + _barrido('calcular_potencial_total', n_cargas=[1, 3, 10, 100, 1000, 10000])
+            + _barrido('encontrar_puntos_equilibrio', n_cargas=[2, 3, 10, 30, 100])
+            + _barrido('graficar_campo_electrico', n_cargas=[3, 30],
+                       num_puntos=[1000, 10000], adaptativo=[False])
+            + _barrido('graficar_campo_electrico', n_cargas=[3, 30, 300], adaptativo=[True])
+            + _barrido('graficar_potencial', n_cargas=[3, 30, 300], adaptativo=[False, True])
+            + _barrido('graficar_lineas_campo', n_cargas=[3, 30], resolucion=[20, 40])
+            + _barrido('graficar_superficies_equipotenciales', n_cargas=[3, 30, 300],
+                       num_puntos=[100, 250, 500])
+            + _barrido('graficar_superficies_equipotenciales', n_cargas=[3, 30, 300],
+                       adaptativo=[True], tolerancia_posicion=[1e-4, 3e-5])
+            + _barrido('graficar_superposicion_equipotenciales_y_campo', n_cargas=[3, 30, 300],
+                       num_puntos=[100, 250, 500]))
+
+
+def identificador(funcion, parametros):
+    """Nombre único del caso, usado para compararlo con la base."""
+    return funcion + '[' + ','.join(f'{k}={v}' for k, v in sorted(parametros.items())) + ']'
+
+
+def preparar_llamada(funcion, parametros, directorio):
+    """
+    Arma la llamada de un caso.
+
+    Parámetros:
+    - funcion: nombre de la función de logic.py
+    - parametros: dict con n_cargas y el resto de sus argumentos
+    - directorio: carpeta donde los gráficos guardan sus PNG
+
+    Retorna: función sin argumentos
+    """
+    parametros = dict(parametros)
+    cargas = nube_aleatoria(parametros.pop('n_cargas'))
+    objetivo = getattr(logic, funcion)
+    if funcion in ('calcular_campo_total', 'calcular_potencial_total'):
+        return lambda: objetivo(cargas, *PUNTO, **parametros)
+    if funcion == 'encontrar_puntos_equilibrio':
+        return lambda: objetivo(cargas, **parametros)
+    if funcion in ('graficar_campo_electrico', 'graficar_lineas_campo', 'graficar_potencial'):
+        return lambda: objetivo(cargas, *PUNTO, directorio=directorio, **parametros)
+    return lambda: objetivo(cargas, directorio=directorio, **parametros)
+
+
+def limpiar_caches():
+    """Vacía los cachés en memoria que harían que una repetición no calcule nada."""
+    from lineas_campo import cache_lineas
+    from malla import limpiar_mallas_incrementales
+    # Las líneas tampoco se leen del caché en disco: se mide el trazado
+    cache_lineas.disco = None
+    cache_lineas.limpiar()
+    limpiar_mallas_incrementales()
+
+
+def medir(llamada, repeticiones=5, tiempo_minimo=0.05):
+    """
+    Tiempo por llamada, como en timeit: las funciones rápidas se llaman varias
+    veces por repetición hasta sumar tiempo_minimo.
+
+    Parámetros:
+    - llamada: función sin argumentos
+    - repeticiones: cantidad de repeticiones
+    - tiempo_minimo: duración mínima de cada repetición [s]
+
+    Retorna: dict con mediana, minimo y maximo [s por llamada], repeticiones
+    y llamadas_por_repeticion
+    """
+    # Primera llamada aparte: compila los núcleos de Numba y carga matplotlib
+    limpiar_caches()
+    inicio = time.perf_counter()
+    llamada()
+    duracion = time.perf_counter() - inicio
+
+    numero = 1
+    if duracion < tiempo_minimo:
+        numero = min(int(tiempo_minimo / max(duracion, 1e-7)) + 1, 100000)
+
+    tiempos = []
+    for _ in range(repeticiones):
+        limpiar_caches()
+        inicio = time.perf_counter()
+        for _ in range(numero):
+            llamada()
+        tiempos.append((time.perf_counter() - inicio) / numero)
+    return {
+        'mediana': statistics.median(tiempos),
+        'minimo': min(tiempos),
+        'maximo': max(tiempos),
+        'repeticiones': repeticiones,
+        'llamadas_por_repeticion': numero,
+    }
+
+
+def entorno():
+    """Retorna: dict con la información de la máquina y de las versiones."""
+    import matplotlib
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'matplotlib': matplotlib.__version__,
+        'plataforma': platform.platform(),
+        'procesador': platform.processor() or platform.machine(),
+        'nucleos_cpu': os.cpu_count(),
+        'backend': nucleos.backend_actual(),
+    }
+
+
+def ejecutar(casos, repeticiones=5, mostrar=print):
+    """
+    Mide todos los casos.
+
+    Parámetros:
+    - casos: lista de (nombre de la función, parámetros), ver definir_casos
+    - repeticiones: repeticiones por caso
+    - mostrar: función(texto) para informar el avance, o None
+
+    Retorna: dict serializable a JSON con el entorno y los resultados; los
+    casos que fallan tienen la clave 'error' en lugar de los tiempos
+    """
+    resultados = []
+    with tempfile.TemporaryDirectory() as directorio:
+        for funcion, parametros in casos:
+            resultado = {'id': identificador(funcion, parametros), 'funcion': funcion,
+                         'parametros': parametros}
+            try:
+                resultado.update(medir(preparar_llamada(funcion, parametros, directorio),
+                                       repeticiones))
+                texto = _formatear_tiempo(resultado['mediana'])
+            except Exception as e:
+                resultado['error'] = f'{type(e).__name__}: {e}'
+                texto = f"error: {resultado['error']}"
+            finally:
+                _pyplot_cerrar_todo()
+            resultados.append(resultado)
+            if mostrar is not None:
+                mostrar(f"{resultado['id']:<75} {texto}")
+    return {
+        'version': VERSION_FORMATO,
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'entorno': entorno(),
+        'resultados': resultados,
+    }
+
+
+def comparar(actual, base, tolerancia=0.2):
+    """
+    Compara las medianas de dos corridas caso por caso.
+
+    Parámetros:
+    - actual, base: dicts con el formato de ejecutar
+    - tolerancia: aumento relativo de la mediana que se acepta sin avisar
+
+    Retorna: lista de dicts (id, base, actual, relacion, estado) con estado
+    'regresion', 'mejora' o 'igual'; los casos que no están en ambas o que
+    fallaron en alguna se omiten
+    """
+    medianas_base = {r['id']: r['mediana'] for r in base['resultados'] if 'error' not in r}
+    comparacion = []
+    for resultado in actual['resultados']:
+        anterior = medianas_base.get(resultado['id'])
+        if anterior is None or 'error' in resultado:
+            continue
+        relacion = resultado['mediana'] / anterior
+        if relacion > 1 + tolerancia:
+            estado = 'regresion'
+        elif relacion < 1 / (1 + tolerancia):
+            estado = 'mejora'
+        else:
+            estado = 'igual'
+        comparacion.append({'id': resultado['id'], 'base': anterior,
+                            'actual': resultado['mediana'], 'relacion': relacion,
+                            'estado': estado})
+    return comparacion
+
+
+def _pyplot_cerrar_todo():
+    """Cierra las figuras que un caso fallido pudo dejar abiertas."""
+    if 'matplotlib.pyplot' in sys.modules:
+        sys.modules['matplotlib.pyplot'].close('all')
+
+
+def _formatear_tiempo(segundos):
+    if segundos < 1e-3:
+        return f'{segundos * 1e6:8.1f} µs'
+    if segundos < 1:
+        return f'{segundos * 1e3:8.1f} ms'
+    return f'{segundos:8.2f} s '
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Mide los tiempos de los cálculos y gráficos y los compara con una base.')
+    parser.add_argument('--salida', help='archivo JSON donde guardar los resultados')
+    parser.add_argument('--base', help='resultados JSON de una corrida anterior para comparar')
+    parser.add_argument('--tolerancia', type=float, default=0.2,
+                        help='aumento relativo aceptado antes de marcar una regresión '
+                             '(por defecto 0.2 = 20%%)')
+    parser.add_argument('--repeticiones', type=int, default=5,
+                        help='repeticiones por caso (por defecto 5)')
+    parser.add_argument('--rapido', action='store_true', help='barrido reducido')
+    parser.add_argument('--solo', default='',
+                        help='funciones a medir, separadas por coma (por defecto todas)')
+    parser.add_argument('--backend', default=None, choices=['auto'] + list(nucleos.BACKENDS),
+                        help='backend de los núcleos (por defecto FISICA_BACKEND o auto)')
+    args = parser.parse_args(argv)
+
+    if args.backend is not None:
+        nucleos.seleccionar_backend(args.backend)
+    casos = definir_casos(args.rapido)
+    if args.solo:
+        funciones = set(args.solo.split(','))
+        desconocidas = funciones - {funcion for funcion, _ in casos}
+        if desconocidas:
+            parser.error(f"funciones desconocidas: {', '.join(sorted(desconocidas))}")
+        casos = [(funcion, p) for funcion, p in casos if funcion in funciones]
+
+    actual = ejecutar(casos, args.repeticiones)
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(actual, f, ensure_ascii=False, indent=2)
+
+    errores = sum('error' in r for r in actual['resultados'])
+    if errores:
+        print(f'{errores} casos fallaron', file=sys.stderr)
+
+    if not args.base:
+        return 1 if errores else 0
+    with open(args.base, encoding='utf-8') as f:
+        base = json.load(f)
+    if base['entorno'].get('backend') != actual['entorno']['backend']:
+        print(f"Aviso: la base usa el backend {base['entorno'].get('backend')} "
+              f"y esta corrida {actual['entorno']['backend']}", file=sys.stderr)
+
+    comparacion = comparar(actual, base, args.tolerancia)
+    print()
+    for c in comparacion:
+        if c['estado'] != 'igual':
+            print(f"{c['estado']:<10} {c['id']:<75} {_formatear_tiempo(c['base'])} -> "
+                  f"{_formatear_tiempo(c['actual'])} (x{c['relacion']:.2f})")
+    regresiones = sum(c['estado'] == 'regresion' for c in comparacion)
+    print(f'{len(comparacion)} casos comparados con la base, {regresiones} regresiones '
+          f'(tolerancia {args.tolerancia:.0%})')
+    return 1 if regresiones or errores else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,260 @@
+"""
+cache.py
+Caché en disco de resultados (gráficos, arrays y datos) direccionado por contenido.
+
+La clave de cada resultado es un hash canónico de la función, las cargas y
+los parámetros con que se llamó. Cada entrada es una carpeta con:
+- datos.json: el resultado, con las imágenes y arrays reemplazados por referencias
+- arrays.npz: los arrays de NumPy del resultado (si hay)
+- las imágenes (PNG) que devolvió la función, como ruta o dibujadas en memoria
+
+Cuando el tamaño total supera el presupuesto se borran las entradas usadas
+hace más tiempo (LRU según la fecha de último uso de la carpeta).
+"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+
+import numpy as np
+
+from logic import ConjuntoCargas, ImagenRenderizada
+
+# Cambiar si cambia el formato de las entradas o el resultado de los gráficos
+VERSION_CACHE = 2
+
+# Presupuesto por defecto [MB]; se puede cambiar con la variable FISICA_CACHE_MB
+PRESUPUESTO_MB = 512
+
+DIRECTORIO_CACHE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'cache_resultados')
+
+
+def _canonico(valor):
+    """Convierte parámetros a una forma JSON estable para calcular la clave."""
+    if isinstance(valor, ConjuntoCargas):
+        return {'cargas': valor.huella}
+    if isinstance(valor, np.ndarray):
+        return {'array': hashlib.sha1(np.ascontiguousarray(valor).tobytes()).hexdigest(),
+                'forma': list(valor.shape), 'tipo': str(valor.dtype)}
+    if isinstance(valor, (list, tuple)):
+        return [_canonico(v) for v in valor]
+    if isinstance(valor, dict):
+        return {str(k): _canonico(v) for k, v in sorted(valor.items())}
+    if isinstance(valor, bool):
+        return valor
+    if isinstance(valor, (int, float, np.floating, np.integer)):
+        # 1 y 1.0 tienen que dar la misma clave
+        return float(valor)
+    return valor
+
+
+class CacheResultados:
+    """
+    Caché LRU de resultados en disco con un presupuesto de tamaño.
+
+    Parámetros:
+    - directorio: carpeta del caché
+    - presupuesto_mb: tamaño máximo total [MB]
+    """
+
+    def __init__(self, directorio=DIRECTORIO_CACHE, presupuesto_mb=None):
+        if presupuesto_mb is None:
+            presupuesto_mb = float(os.environ.get('FISICA_CACHE_MB', PRESUPUESTO_MB))
+        self.directorio = directorio
+        self.presupuesto = int(presupuesto_mb * 1024 * 1024)
+        os.makedirs(directorio, exist_ok=True)
+
+    def clave(self, nombre, cargas, *args, **kwargs):
+        """
+        Hash canónico de una llamada.
+
+        Parámetros:
+        - nombre: nombre de la función
+        - cargas: lista de tuplas o ConjuntoCargas
+        - args, kwargs: el resto de los parámetros de la llamada
+
+        Retorna: string hexadecimal
+        """
+        contenido = {
+            'version': VERSION_CACHE,
+            'funcion': nombre,
+            'cargas': ConjuntoCargas.desde(cargas).huella,
+            'args': _canonico(list(args)),
+            'kwargs': _canonico(kwargs),
+        }
+        texto = json.dumps(contenido, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(texto.encode('utf-8')).hexdigest()
+
+    def _carpeta(self, clave):
+        return os.path.join(self.directorio, clave)
+
+    def obtener(self, clave):
+        """
+        Retorna: el resultado guardado con esa clave, o None si no está
+        """
+        carpeta = self._carpeta(clave)
+        ruta_datos = os.path.join(carpeta, 'datos.json')
+        try:
+            with open(ruta_datos, encoding='utf-8') as f:
+                datos = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        arrays = {}
+        ruta_arrays = os.path.join(carpeta, 'arrays.npz')
+        if os.path.exists(ruta_arrays):
+            with np.load(ruta_arrays) as npz:
+                arrays = {nombre: npz[nombre] for nombre in npz.files}
+
+        # Marcar como usado recién (orden LRU)
+        try:
+            os.utime(carpeta)
+        except OSError:
+            pass
+        return self._decodificar(datos, carpeta, arrays)
+
+    def guardar(self, clave, resultado):
+        """
+        Guarda un resultado: las rutas a imágenes existentes se copian a la
+        entrada, los arrays van a arrays.npz y el resto a datos.json.
+
+        Retorna: el resultado tal como lo devuelve obtener (rutas dentro del caché)
+        """
+        temporal = tempfile.mkdtemp(prefix='.nueva_', dir=self.directorio)
+        arrays = {}
+        datos = self._codificar(resultado, temporal, arrays)
+        with open(os.path.join(temporal, 'datos.json'), 'w', encoding='utf-8') as f:
+            json.dump(datos, f)
+        if arrays:
+            np.savez(os.path.join(temporal, 'arrays.npz'), **arrays)
+
+        carpeta = self._carpeta(clave)
+        try:
+            # El renombrado es atómico: otro proceso nunca ve una entrada a medias
+            os.rename(temporal, carpeta)
+        except OSError:
+            # Ya la guardó otro proceso con el mismo contenido
+            shutil.rmtree(temporal, ignore_errors=True)
+
+        self.desalojar(conservar=carpeta)
+        return self.obtener(clave)
+
+    def calcular(self, funcion, cargas, *args, en_memoria=False, **kwargs):
+        """
+        Llama a funcion(cargas, *args, **kwargs) salvo que el resultado ya esté
+        en el caché.
+
+        Con en_memoria=True (para gráficos que aceptan en_memoria/guardar_png),
+        si hay que calcular, las figuras se devuelven dibujadas en memoria
+        (ImagenRenderizada) y la entrada se escribe en disco en un hilo aparte.
+        La clave es la misma en los dos modos.
+
+        Retorna: el resultado de la función (las imágenes, como rutas dentro del
+        caché o como ImagenRenderizada)
+        """
+        clave = self.clave(funcion.__name__, cargas, *args, **kwargs)
+        resultado = self.obtener(clave)
+        if resultado is not None:
+            return resultado
+        if not en_memoria:
+            return self.guardar(clave, funcion(cargas, *args, **kwargs))
+
+        resultado = funcion(cargas, *args, en_memoria=True, guardar_png=False, **kwargs)
+        threading.Thread(target=self.guardar, args=(clave, resultado), daemon=True).start()
+        return resultado
+
+    def _codificar(self, valor, carpeta, arrays):
+        if isinstance(valor, ImagenRenderizada):
+            nombre = f'imagen_{len(os.listdir(carpeta))}.png'
+            # Se guarda a otra imagen para no cambiar la ruta del objeto original
+            ImagenRenderizada(valor.rgba, valor.dpi).guardar(os.path.join(carpeta, nombre))
+            return {'__imagen__': nombre}
+        if isinstance(valor, str) and valor.lower().endswith('.png') and os.path.isfile(valor):
+            nombre = f'imagen_{len(os.listdir(carpeta))}.png'
+            shutil.copyfile(valor, os.path.join(carpeta, nombre))
+            return {'__imagen__': nombre}
+        if isinstance(valor, np.ndarray):
+            nombre = f'a{len(arrays)}'
+            arrays[nombre] = valor
+            return {'__array__': nombre}
+        if isinstance(valor, tuple):
+            return {'__tupla__': [self._codificar(v, carpeta, arrays) for v in valor]}
+        if isinstance(valor, list):
+            return [self._codificar(v, carpeta, arrays) for v in valor]
+        if isinstance(valor, dict):
+            return {k: self._codificar(v, carpeta, arrays) for k, v in valor.items()}
+        if isinstance(valor, (np.floating, np.integer, np.str_)):
+            return valor.item()
+        return valor
+
+    def _decodificar(self, valor, carpeta, arrays):
+        if isinstance(valor, dict):
+            if '__imagen__' in valor:
+                return os.path.join(carpeta, valor['__imagen__'])
+            if '__array__' in valor:
+                return arrays[valor['__array__']]
+            if '__tupla__' in valor:
+                return tuple(self._decodificar(v, carpeta, arrays) for v in valor['__tupla__'])
+            return {k: self._decodificar(v, carpeta, arrays) for k, v in valor.items()}
+        if isinstance(valor, list):
+            return [self._decodificar(v, carpeta, arrays) for v in valor]
+        return valor
+
+    def entradas(self):
+        """
+        Retorna: lista de (último_uso, tamaño_bytes, carpeta), de la más
+        antigua a la más reciente
+        """
+        lista = []
+        for nombre in os.listdir(self.directorio):
+            carpeta = os.path.join(self.directorio, nombre)
+            if nombre.startswith('.') or not os.path.isdir(carpeta):
+                continue
+            try:
+                tam = sum(e.stat().st_size for e in os.scandir(carpeta) if e.is_file())
+                lista.append((os.stat(carpeta).st_mtime, tam, carpeta))
+            except OSError:
+                continue
+        lista.sort()
+        return lista
+
+    def desalojar(self, conservar=None):
+        """
+        Borra las entradas usadas hace más tiempo hasta quedar dentro del presupuesto.
+
+        Parámetros:
+        - conservar: carpeta de una entrada que no se borra aunque sea grande
+          (la que se acaba de guardar)
+
+        Retorna: cantidad de entradas borradas
+        """
+        entradas = self.entradas()
+        total = sum(tam for _, tam, _ in entradas)
+        borradas = 0
+        for _, tam, carpeta in entradas:
+            if total <= self.presupuesto:
+                break
+            if carpeta == conservar:
+                continue
+            shutil.rmtree(carpeta, ignore_errors=True)
+            total -= tam
+            borradas += 1
+        return borradas
+
+    def limpiar(self):
+        """Borra todas las entradas del caché."""
+        for _, _, carpeta in self.entradas():
+            shutil.rmtree(carpeta, ignore_errors=True)
+
+
+_cache_por_defecto = {}
+
+
+def cache_resultados():
+    """Retorna: el CacheResultados compartido (se crea al primer uso)."""
+    if 'cache' not in _cache_por_defecto:
+        _cache_por_defecto['cache'] = CacheResultados()
+    return _cache_por_defecto['cache']
@@ -0,0 +1,421 @@
+"""
+fmm.py
+Método multipolar rápido (FMM) para evaluar potencial y campo de N cargas
+en M puntos en tiempo aproximadamente O(N + M).
+
+Se usa la variante de interpolación de Chebyshev (FMM "caja negra"): las
+expansiones de cada caja son los valores en una grilla de p × p nodos de
+Chebyshev, de modo que el mismo esquema sirve para V = k·q/r y para
+E = k·q·r_vec/r³ sin desarrollar series a mano. p es el orden de la
+expansión y controla el error.
+"""
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from logic import K, ConjuntoCargas, calcular_campo_y_potencial_lote
+
+# Distancia mínima para el potencial, igual que en calcular_potencial_total
+DISTANCIA_MINIMA = 1e-6
+
+# Por debajo de esta cantidad de cargas se suma en forma directa
+N_DIRECTO = 256
+
+# Error relativo típico (rms) medido contra suma directa para cada orden p.
+# Se usa para elegir p a partir de una tolerancia.
+_ERROR_POR_ORDEN = {3: 2e-3, 4: 3e-4, 5: 5e-5, 6: 5e-6, 7: 1e-6, 8: 2e-7,
+                    9: 3e-8, 10: 5e-9, 11: 1e-9, 12: 2e-10, 14: 1e-11, 16: 1e-12}
+
+
+def orden_para_tolerancia(tolerancia):
+    """
+    Elige el orden de expansión p más chico cuyo error típico no supera la tolerancia.
+
+    Parámetros:
+    - tolerancia: error relativo (rms) aceptado
+
+    Retorna: orden p (entero)
+    """
+    for p in sorted(_ERROR_POR_ORDEN):
+        if _ERROR_POR_ORDEN[p] <= tolerancia:
+            return p
+    return max(_ERROR_POR_ORDEN)
+
+
+@lru_cache(maxsize=None)
+def _nodos_chebyshev(p):
+    return np.cos((2 * np.arange(1, p + 1) - 1) * np.pi / (2 * p))
+
+
+def _interpolador(u, p):
+    """
+    Polinomios de interpolación de Chebyshev S_p(u, t_k) evaluados en u ∈ [-1, 1].
+
+    Retorna: array (len(u), p)
+    """
+    t = _nodos_chebyshev(p)
+    n = np.arange(1, p)
+    Tu = np.cos(n * np.arccos(np.clip(u, -1, 1))[:, None])
+    Tt = np.cos(n[:, None] * np.arccos(t)[None, :])
+    return 1 / p + (2 / p) * (Tu @ Tt)
+
+
+@lru_cache(maxsize=None)
+def _matrices_hijo(p):
+    """Matrices de traspaso padre/hijo: T[a][k, m] = S_p(nodo m del hijo a, t_k)."""
+    t = _nodos_chebyshev(p)
+    return tuple(_interpolador((t + 2 * a - 1) / 2, p).T for a in (0, 1))
+
+
+@lru_cache(maxsize=None)
+def _matrices_m2l(p):
+    """
+    Matrices multipolo->local para cajas de lado 1, por desplazamiento (di, dj).
+    Cada matriz (3p², p²) da en los nodos de la caja destino los valores de
+    1/r, dx/r³ y dy/r³ (sin k) producidos por los nodos de la caja fuente.
+    """
+    t = _nodos_chebyshev(p) / 2
+    nx, ny = np.meshgrid(t, t, indexing='ij')
+    nx, ny = nx.ravel(), ny.ravel()
+
+    matrices = {}
+    for di in range(-3, 4):
+        for dj in range(-3, 4):
+            if max(abs(di), abs(dj)) < 2:
+                continue
+            dx = nx[:, None] - (nx[None, :] + di)
+            dy = ny[:, None] - (ny[None, :] + dj)
+            r = np.sqrt(dx**2 + dy**2)
+            matrices[(di, dj)] = np.vstack((1 / r, dx / r**3, dy / r**3))
+    return matrices
+
+
+def _elegir_niveles(n_cargas, n_puntos, p):
+    """
+    Cantidad de niveles que equilibra el costo cercano (directo) y el lejano.
+    Un par punto-carga directo cuesta unas 300 operaciones de las matrices M2L.
+    """
+    mejor, costo_mejor = 2, None
+    for L in range(2, 11):
+        cajas = 4**L
+        if cajas * 3 * p * p * 8 > 256e6:  # memoria de las expansiones
+            break
+        costo = 9 * n_cargas * n_puntos / cajas + cajas * 27 * 3 * p**4 / 300
+        if costo_mejor is None or costo < costo_mejor:
+            mejor, costo_mejor = L, costo
+    return mejor
+
+
+def _caja_hoja(x, y, x0, y0, lado, nb):
+    """Índices (i, j) de la caja hoja y coordenadas locales en [-1, 1]."""
+    i = np.clip(np.floor((x - x0) / lado).astype(int), 0, nb - 1)
+    j = np.clip(np.floor((y - y0) / lado).astype(int), 0, nb - 1)
+    u = 2 * (x - (x0 + (i + 0.5) * lado)) / lado
+    v = 2 * (y - (y0 + (j + 0.5) * lado)) / lado
+    return i, j, u, v
+
+
+def _cercano(q, caja_q, px, py, ip, jp, nb, Ex, Ey, V, bloque=2_000_000, ordenadas=None):
+    """
+    Interacción directa entre cada punto y las cargas de las 9 cajas vecinas,
+    con las reglas de singularidad de calcular_campo_y_potencial_lote.
+
+    ordenadas: (orden, inicio, qs, xs, ys) de _ordenar_por_caja, para no
+    recalcularlo en cada llamada
+    """
+    orden, inicio, qs, xs, ys = ordenadas
+    M = px.size
+    primera = np.full(M, len(q))  # índice original de la primera carga coincidente
+
+    for di in (-1, 0, 1):
+        for dj in (-1, 0, 1):
+            ni, nj = ip + di, jp + dj
+            validos = np.flatnonzero((ni >= 0) & (ni < nb) & (nj >= 0) & (nj < nb))
+            if validos.size == 0:
+                continue
+            caja = ni[validos] * nb + nj[validos]
+            cuenta = inicio[caja + 1] - inicio[caja]
+
+            # Repartir en bloques de aproximadamente `bloque` pares punto-carga
+            acumulado = np.cumsum(cuenta)
+            desde = 0
+            while desde < validos.size:
+                previo = acumulado[desde - 1] if desde else 0
+                hasta = max(np.searchsorted(acumulado, previo + bloque, side='right'), desde + 1)
+                sel = slice(desde, hasta)
+                desde = hasta
+                c = cuenta[sel]
+                total = c.sum()
+                if total == 0:
+                    continue
+                t_idx = np.repeat(validos[sel], c)
+                base = np.repeat(inicio[caja[sel]] - (np.cumsum(c) - c), c)
+                s_idx = base + np.arange(total)
+
+                dx = px[t_idx] - xs[s_idx]
+                dy = py[t_idx] - ys[s_idx]
+                r = np.sqrt(dx**2 + dy**2)
+                coincide = r == 0
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    factor = K * qs[s_idx] / (r**3)
+                factor[coincide] = 0.0
+                Ex += np.bincount(t_idx, weights=factor * dx, minlength=M)
+                Ey += np.bincount(t_idx, weights=factor * dy, minlength=M)
+                V += np.bincount(t_idx, weights=K * qs[s_idx] / np.maximum(r, DISTANCIA_MINIMA),
+                                 minlength=M)
+                if coincide.any():
+                    np.minimum.at(primera, t_idx[coincide], orden[s_idx[coincide]])
+
+    singular = primera < len(q)
+    if singular.any():
+        V[singular] = np.where(q[primera[singular]] > 0, np.inf, -np.inf)
+
+
+def _ordenar_por_caja(q, xq, yq, caja_q, nb):
+    """Cargas ordenadas por caja hoja: (orden, inicio de cada caja, q, x, y ordenados)."""
+    orden = np.argsort(caja_q, kind='stable')
+    inicio = np.searchsorted(caja_q[orden], np.arange(nb * nb + 1))
+    return orden, inicio, q[orden], xq[orden], yq[orden]
+
+
+class ExpansionFMM:
+    """
+    Expansiones locales del FMM ya calculadas sobre una región: después se
+    evalúa cualquier punto dentro de ella (por ejemplo, bloque por bloque de
+    una malla) sin repetir la subida (P2M, M2M) ni la bajada (M2L, L2L).
+
+    Parámetros:
+    - cargas: ConjuntoCargas o lista de tuplas [(carga1, x1, y1), ...]
+    - caja: (x_min, x_max, y_min, y_max) que contiene los puntos a evaluar
+    - orden: orden p de la expansión
+    - tolerancia: error relativo buscado; se usa para elegir p si orden es None
+    - n_puntos: cantidad total de puntos que se van a evaluar (elige los niveles)
+    - niveles: niveles del árbol (None = según n_puntos)
+    """
+
+    def __init__(self, cargas, caja, orden=None, tolerancia=1e-6, n_puntos=None, niveles=None):
+        cargas = ConjuntoCargas.desde(cargas)
+        if len(cargas) == 0:
+            raise ValueError("La expansión necesita al menos una carga")
+        p = orden if orden is not None else orden_para_tolerancia(tolerancia)
+        if p < 2:
+            raise ValueError("El orden de la expansión debe ser al menos 2")
+        q, xq, yq = cargas.q, cargas.x, cargas.y
+
+        # Dominio cuadrado que contiene cargas y puntos
+        x_min = min(xq.min(), caja[0]); x_max = max(xq.max(), caja[1])
+        y_min = min(yq.min(), caja[2]); y_max = max(yq.max(), caja[3])
+        D = max(x_max - x_min, y_max - y_min) * (1 + 1e-9) or 1.0
+        x0 = (x_min + x_max - D) / 2
+        y0 = (y_min + y_max - D) / 2
+
+        L = niveles or _elegir_niveles(len(q), n_puntos or len(q), p)
+        nb = 2**L
+        lado = D / nb
+        T = _matrices_hijo(p)
+
+        # --- Subida: cargas -> multipolos de las hojas (P2M) ---
+        iq, jq, uq, vq = _caja_hoja(xq, yq, x0, y0, lado, nb)
+        caja_q = iq * nb + jq
+        Su, Sv = _interpolador(uq, p), _interpolador(vq, p)
+        W = np.empty((nb * nb, p, p))
+        for k in range(p):
+            for l in range(p):
+                W[:, k, l] = np.bincount(caja_q, weights=q * Su[:, k] * Sv[:, l],
+                                         minlength=nb * nb)
+        multipolos = {L: W.reshape(nb, nb, p, p)}
+
+        # --- Multipolos de hijos a padres (M2M) ---
+        for nivel in range(L, 2, -1):
+            hijo = multipolos[nivel]
+            padre = 0
+            for a in (0, 1):
+                for b in (0, 1):
+                    padre = padre + np.einsum('km,ln,ijmn->ijkl', T[a], T[b], hijo[a::2, b::2])
+            multipolos[nivel - 1] = padre
+
+        # --- Multipolo a local (M2L) y bajada (L2L) ---
+        m2l = _matrices_m2l(p)
+        local = None
+        for nivel in range(2, L + 1):
+            n = 2**nivel
+            h = D / n
+            W = np.pad(multipolos[nivel], ((3, 3), (3, 3), (0, 0), (0, 0)))
+            Lnivel = np.zeros((n, n, 3 * p * p))
+
+            if local is not None:
+                for a in (0, 1):
+                    for b in (0, 1):
+                        Lnivel[a::2, b::2] += np.einsum('km,ln,cijkl->ijcmn', T[a], T[b],
+                                                        local).reshape(n // 2, n // 2, -1)
+
+            escala = np.repeat([1 / h, 1 / h**2, 1 / h**2], p * p)
+            for a in (0, 1):
+                for b in (0, 1):
+                    # Desplazamientos válidos según la paridad de la caja destino
+                    rango_i = range(-2, 4) if a == 0 else range(-3, 3)
+                    rango_j = range(-2, 4) if b == 0 else range(-3, 3)
+                    acumulado = 0
+                    for di in rango_i:
+                        for dj in rango_j:
+                            if max(abs(di), abs(dj)) < 2:
+                                continue
+                            fuente = W[3 + a + di::2, 3 + b + dj::2][:n // 2, :n // 2]
+                            acumulado = acumulado + fuente.reshape(-1, p * p) @ m2l[(di, dj)].T
+                    Lnivel[a::2, b::2] += (acumulado * escala).reshape(n // 2, n // 2, -1)
+
+            # Guardar como (3, n, n, p, p) para la siguiente bajada
+            local = Lnivel.reshape(n, n, 3, p, p).transpose(2, 0, 1, 3, 4)
+
+        self.cargas = cargas
+        self.orden = p
+        self.niveles = L
+        self.x0, self.y0, self.D, self.lado, self.nb = x0, y0, D, lado, nb
+        self._caja_q = caja_q
+        self._ordenadas = _ordenar_por_caja(q, xq, yq, caja_q, nb)
+        self._local = local
+
+    def evaluar_planos(self, px, py):
+        """
+        Evalúa las expansiones locales (L2P) y suma las cajas vecinas en forma
+        directa (P2P) en puntos aplanados dentro de la región.
+
+        Retorna: (Ex, Ey, V) arrays 1D
+        """
+        margen = 1e-9 * self.D
+        if px.size and (px.min() < self.x0 - margen or px.max() > self.x0 + self.D + margen or
+                        py.min() < self.y0 - margen or py.max() > self.y0 + self.D + margen):
+            raise ValueError("Hay puntos fuera de la región de la expansión")
+
+        p, nb = self.orden, self.nb
+        M = px.size
+        ip, jp, up, vp = _caja_hoja(px, py, self.x0, self.y0, self.lado, nb)
+        Ex = np.empty(M)
+        Ey = np.empty(M)
+        V = np.empty(M)
+        for i in range(0, M, 100_000):
+            s = slice(i, i + 100_000)
+            Su, Sv = _interpolador(up[s], p), _interpolador(vp[s], p)
+            Lp = self._local[:, ip[s], jp[s]]  # (3, m, p, p)
+            valores = np.einsum('mk,cmkl,ml->cm', Su, Lp, Sv) * K
+            V[s], Ex[s], Ey[s] = valores
+
+        _cercano(self.cargas.q, self._caja_q, px, py, ip, jp, nb, Ex, Ey, V,
+                 ordenadas=self._ordenadas)
+        return Ex, Ey, V
+
+
+def _evaluar(cargas, px, py, p, niveles=None):
+    """Núcleo del FMM sobre puntos ya aplanados. Retorna (Ex, Ey, V, niveles)."""
+    expansion = ExpansionFMM(cargas, (px.min(), px.max(), py.min(), py.max()), orden=p,
+                             n_puntos=px.size, niveles=niveles)
+    Ex, Ey, V = expansion.evaluar_planos(px, py)
+    return Ex, Ey, V, expansion.niveles
+
+
+def evaluar_fmm(cargas, x_puntos, y_puntos, orden=None, tolerancia=1e-6, n_directo=N_DIRECTO):
+    """
+    Calcula campo y potencial totales en muchos puntos con el FMM.
+
+    Con pocas cargas (N <= n_directo) se usa la suma directa. Las
+    interacciones con cajas vecinas siempre se suman en forma directa, así
+    que se mantienen las reglas en puntos singulares.
+
+    Parámetros:
+    - cargas: ConjuntoCargas, lista de tuplas o una ExpansionFMM ya calculada
+      (entonces orden, tolerancia y n_directo no se usan y los puntos tienen
+      que estar dentro de su región)
+    - x_puntos, y_puntos: arrays (o escalares) de cualquier forma compatible
+    - orden: orden p de la expansión (nodos de Chebyshev por eje)
+    - tolerancia: error relativo buscado; se usa para elegir p si orden es None
+    - n_directo: por debajo de esta cantidad de cargas se suma en forma directa
+
+    Retorna: (Ex, Ey, magnitud, angulo, V) arrays con la forma de los puntos
+    """
+    expansion = cargas if isinstance(cargas, ExpansionFMM) else None
+    if expansion is None:
+        cargas = ConjuntoCargas.desde(cargas)
+        if len(cargas) <= n_directo:
+            return calcular_campo_y_potencial_lote(cargas, x_puntos, y_puntos)
+        p = orden if orden is not None else orden_para_tolerancia(tolerancia)
+        if p < 2:
+            raise ValueError("El orden de la expansión debe ser al menos 2")
+
+    x_puntos, y_puntos = np.broadcast_arrays(np.asarray(x_puntos, dtype=float),
+                                             np.asarray(y_puntos, dtype=float))
+    forma = x_puntos.shape
+    if x_puntos.size == 0:
+        vacio = np.zeros(forma)
+        return vacio, vacio.copy(), vacio.copy(), vacio.copy(), vacio.copy()
+
+    if expansion is not None:
+        Ex, Ey, V = expansion.evaluar_planos(x_puntos.ravel(), y_puntos.ravel())
+    else:
+        Ex, Ey, V, _ = _evaluar(cargas, x_puntos.ravel(), y_puntos.ravel(), p)
+
+    Ex = Ex.reshape(forma)
+    Ey = Ey.reshape(forma)
+    V = V.reshape(forma)
+    magnitud = np.sqrt(Ex**2 + Ey**2)
+    angulo = np.degrees(np.arctan2(Ey, Ex))
+
+    return Ex, Ey, magnitud, angulo, V
+
+
+def informe_precision(cargas, x_puntos, y_puntos, orden=None, tolerancia=1e-6,
+                      muestras=2000, semilla=0):
+    """
+    Compara el FMM con la suma directa en una muestra de los puntos.
+
+    El FMM se evalúa sobre todos los puntos (como en el uso real) y la suma
+    directa sólo sobre la muestra. Los errores son relativos: el máximo se
+    normaliza por el máximo valor absoluto y el rms por la norma del valor
+    directo. Se excluyen los puntos que coinciden con una carga.
+
+    Parámetros:
+    - cargas: ConjuntoCargas o lista de tuplas [(carga1, x1, y1), ...]
+    - x_puntos, y_puntos: puntos de evaluación
+    - orden, tolerancia: como en evaluar_fmm
+    - muestras: cantidad de puntos comparados contra la suma directa
+    - semilla: semilla para elegir la muestra
+
+    Retorna: diccionario con orden, niveles, errores de V y |E| y tiempos [s]
+    """
+    cargas = ConjuntoCargas.desde(cargas)
+    p = orden if orden is not None else orden_para_tolerancia(tolerancia)
+
+    x_puntos, y_puntos = np.broadcast_arrays(np.asarray(x_puntos, dtype=float),
+                                             np.asarray(y_puntos, dtype=float))
+    px, py = x_puntos.ravel(), y_puntos.ravel()
+
+    inicio = time.perf_counter()
+    Ex, Ey, V, niveles = _evaluar(cargas, px, py, p)
+    tiempo_fmm = time.perf_counter() - inicio
+
+    rng = np.random.default_rng(semilla)
+    idx = rng.choice(px.size, size=min(muestras, px.size), replace=False)
+    inicio = time.perf_counter()
+    Ex_d, Ey_d, _, _, V_d = calcular_campo_y_potencial_lote(cargas, px[idx], py[idx])
+    tiempo_directo = time.perf_counter() - inicio
+
+    finitos = np.isfinite(V_d)
+    error_V = np.abs(V[idx] - V_d)[finitos]
+    error_E = np.hypot(Ex[idx] - Ex_d, Ey[idx] - Ey_d)[finitos]
+    E_d = np.hypot(Ex_d, Ey_d)[finitos]
+    V_d = V_d[finitos]
+
+    return {
+        'orden': p,
+        'niveles': niveles,
+        'cargas': len(cargas),
+        'puntos': px.size,
+        'muestras': int(finitos.sum()),
+        'error_V_max': float(error_V.max() / np.abs(V_d).max()),
+        'error_V_rms': float(np.linalg.norm(error_V) / np.linalg.norm(V_d)),
+        'error_E_max': float(error_E.max() / E_d.max()),
+        'error_E_rms': float(np.linalg.norm(error_E) / np.linalg.norm(E_d)),
+        'tiempo_fmm': tiempo_fmm,
+        'tiempo_directo_muestra': tiempo_directo,
+        'tiempo_directo_estimado': tiempo_directo * px.size / max(len(idx), 1),
+    }
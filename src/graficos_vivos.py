@@ -0,0 +1,216 @@
+"""
+graficos_vivos.py
+Gráficos embebidos en las ventanas de resultados que se actualizan en el lugar.
+
+En vez de regenerar la figura completa (plt.subplots + savefig) cada vez que
+cambia un dato, las curvas y marcadores se crean una sola vez sobre un
+FigureCanvasTkAgg y después sólo se cambian sus datos (set_data,
+set_offsets). Mover el punto de cálculo no redibuja la figura: el marcador
+se pinta encima del fondo guardado (blitting). guardar() escribe lo que se
+ve en pantalla como PNG, con el mismo nombre que graficar_campo_electrico.
+"""
+import os
+
+import numpy as np
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.figure import Figure
+
+from logic import (calcular_campo_total, directorio_graficos, encontrar_puntos_equilibrio,
+                   muestrear_campo_en_eje)
+
+COLORES = ['red', 'blue', 'green']
+COLORES_ESTABILIDAD = {'estable': 'green', 'inestable': 'red', 'neutral': 'orange'}
+
+
+class GraficoCampoVivo:
+    """
+    E(x) vs x embebido en Tk, con el mismo aspecto que graficar_campo_electrico.
+
+    Parámetros:
+    - master: widget de Tk donde se coloca el canvas (ver atributo widget)
+    - cargas: lista de tuplas [(carga, x, y), ...]
+    - x_punto, y_punto: punto de cálculo
+    - rango_x: tupla (min, max) del eje x
+    - num_puntos: no se usa (las curvas se muestrean con muestrear_campo_en_eje,
+      más puntos cerca de las cargas); se mantiene por compatibilidad
+    - rango_y: límites fijos del eje Ex
+    """
+
+    def __init__(self, master, cargas, x_punto, y_punto, rango_x=(-5, 5), num_puntos=1000,
+                 rango_y=(-1e12, 1e12), figsize=(8.5, 6.8), dpi=100):
+        self.rango_x = rango_x
+        self.rango_y = rango_y
+        self.cargas = None
+        self.punto = None
+        self.puntos_equilibrio = []
+
+        self.figura = Figure(figsize=figsize, dpi=dpi)
+        self.figura.suptitle('Campo Eléctrico E(x) vs x - Análisis de Equilibrio',
+                             fontsize=13, fontweight='bold')
+        self.ax1, self.ax2 = self.figura.subplots(2, 1)
+
+        self.ax1.set_title('Cargas Individuales')
+        self.ax2.set_title('Superposición - Puntos de Equilibrio')
+        for ax in (self.ax1, self.ax2):
+            ax.set_xlabel('x [m]')
+            ax.set_ylabel('Ex [N/C]')
+            ax.grid(True, alpha=0.3)
+            ax.axhline(y=0, color='black', linewidth=0.8)
+            ax.set_xlim(rango_x)
+            ax.set_ylim(rango_y)
+
+        # Artistas que se reutilizan: sólo cambian sus datos
+        self.curvas_cargas = []
+        self.verticales = []
+        self.anotaciones = []
+        self.curva_total, = self.ax2.plot([], [],
+                                          color='purple', linewidth=2.5, alpha=0.8,
+                                          label='Campo Total')
+        self.equilibrios = self.ax2.scatter([], [], s=90, marker='o', zorder=5)
+
+        # El punto de cálculo se dibuja aparte (animated) para moverlo con blitting
+        self.marcador, = self.ax2.plot([], [], 'bo', markersize=7, animated=True,
+                                       label='Punto calculado')
+        self.texto_punto = self.ax2.text(0.01, 0.97, '', transform=self.ax2.transAxes,
+                                         va='top', fontsize=9, animated=True,
+                                         bbox=dict(boxstyle='round,pad=0.3',
+                                                   facecolor='white', alpha=0.8))
+        self.ax2.legend(fontsize=9, loc='upper right')
+
+        self.canvas = FigureCanvasTkAgg(self.figura, master=master)
+        self.widget = self.canvas.get_tk_widget()
+        self._fondo = None
+        self._redibujo_pendiente = True
+        self._guardando = False
+        self.canvas.mpl_connect('draw_event', self._al_dibujar)
+
+        self.actualizar(cargas, x_punto, y_punto)
+        self.figura.tight_layout(rect=[0, 0, 1, 0.95])
+
+    def actualizar(self, cargas, x_punto, y_punto):
+        """
+        Cambia cargas y punto de cálculo. Si las cargas no cambiaron sólo se
+        mueve el marcador del punto.
+
+        Retorna: lista de puntos de equilibrio [(x, estabilidad), ...]
+        """
+        cargas = [tuple(float(v) for v in c) for c in cargas]
+        if cargas != self.cargas:
+            self.cargas = cargas
+            self._actualizar_curvas()
+        self.actualizar_punto(x_punto, y_punto)
+        return self.puntos_equilibrio
+
+    def _actualizar_curvas(self):
+        cargas = self.cargas
+        if len(self.curvas_cargas) != len(cargas):
+            for artista in self.curvas_cargas + self.verticales:
+                artista.remove()
+            self.curvas_cargas = []
+            self.verticales = []
+            for i in range(len(cargas)):
+                color = COLORES[i % len(COLORES)]
+                linea, = self.ax1.plot([], [],
+                                       color=color, linewidth=2)
+                self.curvas_cargas.append(linea)
+                self.verticales += [ax.axvline(x=0, color=color, linestyle=(0, (2, 2)),
+                                               linewidth=1.2, alpha=0.8)
+                                    for ax in (self.ax1, self.ax2)]
+
+        limite = max(abs(self.rango_y[0]), abs(self.rango_y[1]))
+        for i, (carga, x_carga, y_carga) in enumerate(cargas):
+            muestreo = muestrear_campo_en_eje([(carga, x_carga, y_carga)], self.rango_x, limite)
+            self.curvas_cargas[i].set_data(muestreo.x, muestreo.con_huecos())
+            self.curvas_cargas[i].set_label(
+                f'Carga {i+1}: q={carga:.1e} C en ({x_carga}, {y_carga})')
+            for vertical in self.verticales[2 * i:2 * i + 2]:
+                vertical.set_xdata([x_carga, x_carga])
+        self.ax1.legend(fontsize=9)
+
+        muestreo = muestrear_campo_en_eje(cargas, self.rango_x, limite)
+        self.curva_total.set_data(muestreo.x, muestreo.con_huecos())
+
+        # Puntos de equilibrio: marcadores y anotaciones
+        self.puntos_equilibrio = encontrar_puntos_equilibrio(cargas, self.rango_x)
+        for anotacion in self.anotaciones:
+            anotacion.remove()
+        self.anotaciones = []
+        colores = [COLORES_ESTABILIDAD[e] for _, e in self.puntos_equilibrio]
+        self.equilibrios.set_offsets(np.array([(x, 0.0) for x, _ in self.puntos_equilibrio])
+                                     .reshape(-1, 2))
+        self.equilibrios.set_color(colores)
+        for i, (x_eq, estabilidad) in enumerate(self.puntos_equilibrio):
+            color = COLORES_ESTABILIDAD[estabilidad]
+            self.anotaciones.append(self.ax2.annotate(
+                f'Eq{i+1}: x={x_eq:.3f} m\n({estabilidad})',
+                xy=(x_eq, 0), xytext=(x_eq, 0.4 * self.rango_y[1]),
+                arrowprops=dict(arrowstyle='->', color=color, lw=1.5),
+                fontsize=9, ha='center',
+                bbox=dict(boxstyle="round,pad=0.3", facecolor=color, alpha=0.25)))
+
+        self._redibujo_pendiente = True
+        self.canvas.draw_idle()
+
+    def actualizar_punto(self, x_punto, y_punto):
+        """Mueve el marcador del punto de cálculo sin redibujar el resto."""
+        self.punto = (x_punto, y_punto)
+        Ex_punto, Ey_punto, magnitud, _ = calcular_campo_total(self.cargas, x_punto, y_punto)
+        if self.rango_x[0] <= x_punto <= self.rango_x[1]:
+            self.marcador.set_data([x_punto], [Ex_punto])
+        else:
+            self.marcador.set_data([], [])
+        self.texto_punto.set_text(f'Punto ({x_punto:g}, {y_punto:g}): '
+                                  f'Ex = {Ex_punto:.3e} N/C, |E| = {magnitud:.3e} N/C')
+        if not self._redibujo_pendiente:
+            self._blit()
+
+    def guardar(self, directorio=None, dpi=150):
+        """
+        Guarda el gráfico tal como se ve (con el punto de cálculo).
+
+        Parámetros:
+        - directorio: carpeta donde guardar el gráfico (por defecto graphics/)
+        - dpi: resolución del PNG
+
+        Retorna: ruta del PNG
+        """
+        ruta = os.path.join(directorio_graficos(directorio), 'campo_electrico_vs_x.png')
+        # Los artistas animated no se dibujan en savefig: se incluyen sólo acá
+        for artista in (self.marcador, self.texto_punto):
+            artista.set_animated(False)
+        self._guardando = True
+        try:
+            self.figura.savefig(ruta, dpi=dpi, bbox_inches='tight')
+        finally:
+            self._guardando = False
+            for artista in (self.marcador, self.texto_punto):
+                artista.set_animated(True)
+            # El fondo guardado para el blitting ya no sirve
+            self._redibujo_pendiente = True
+            self.canvas.draw_idle()
+        return ruta
+
+    def _al_dibujar(self, evento):
+        # El dibujo de savefig no es lo que está en pantalla
+        if self._guardando:
+            return
+        # Después de un redibujo completo: guardar el fondo sin el marcador
+        self._fondo = self.canvas.copy_from_bbox(self.figura.bbox)
+        self._redibujo_pendiente = False
+        self._pintar_punto()
+
+    def _pintar_punto(self):
+        self.ax2.draw_artist(self.marcador)
+        self.ax2.draw_artist(self.texto_punto)
+        self.canvas.blit(self.ax2.bbox)
+
+    def _blit(self):
+        if self._fondo is None:
+            return
+        self.canvas.restore_region(self._fondo)
+        self._pintar_punto()
+
+    def cerrar(self):
+        """Libera la figura."""
+        self.figura.clear()
+        self.widget.destroy()
@@ -0,0 +1,113 @@
+"""
+imagenes_tk.py
+Caché de imágenes ya decodificadas y redimensionadas para las ventanas de Tk.
+
+Cambiar de pestaña en una ventana de resultados no vuelve a leer el PNG ni a
+redimensionarlo: se reutiliza el PhotoImage guardado. Las imágenes que está
+mostrando una ventana abierta no se desalojan (Tk las dejaría en blanco);
+al cerrarse la ventana quedan libres y el LRU las va descartando.
+"""
+import os
+from collections import OrderedDict
+
+from PIL import Image, ImageTk
+
+from instrumentacion import etapa
+from logic import ImagenRenderizada
+
+# Imágenes libres (sin ventana que las muestre) que se conservan
+MAX_ENTRADAS = 16
+
+
+def abrir_imagen(imagen):
+    """
+    Imagen de PIL a partir de la ruta de un PNG o de una figura ya dibujada en
+    memoria (ImagenRenderizada), que se usa sin pasar por el disco.
+    """
+    if isinstance(imagen, ImagenRenderizada):
+        return Image.fromarray(imagen.rgba, 'RGBA')
+    return Image.open(imagen)
+
+
+def _identidad(imagen):
+    """Parte de la clave que identifica la imagen de origen."""
+    if isinstance(imagen, ImagenRenderizada):
+        # Los píxeles no cambian: alcanza con el objeto mismo
+        return imagen
+    ruta = os.path.abspath(imagen)
+    estado = os.stat(ruta)
+    return (ruta, estado.st_mtime_ns, estado.st_size)
+
+
+class CacheImagenesTk:
+    """
+    LRU de PhotoImage por (imagen de origen, tamaño máximo, filtro).
+
+    Parámetros:
+    - max_entradas: cantidad de imágenes libres que se conservan
+    """
+
+    def __init__(self, max_entradas=MAX_ENTRADAS):
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()   # clave -> PhotoImage
+        self._duenos = {}                # clave -> set de ventanas que la muestran
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def obtener(self, imagen, tamano, dueno=None, resample=Image.Resampling.BICUBIC):
+        """
+        PhotoImage de la imagen reducida para entrar en tamano (como thumbnail).
+
+        Parámetros:
+        - imagen: ruta de un PNG o ImagenRenderizada
+        - tamano: tupla (ancho, alto) máxima
+        - dueno: ventana que la muestra; la imagen no se desaloja hasta liberar(dueno)
+        - resample: filtro de PIL para reducir
+
+        Retorna: ImageTk.PhotoImage
+        """
+        clave = (_identidad(imagen), tuple(tamano), resample)
+        photo = self._entradas.get(clave)
+        if photo is None:
+            with etapa('decodificar_imagen'):
+                img = abrir_imagen(imagen)
+                img.thumbnail(tamano, resample)
+                photo = ImageTk.PhotoImage(img)
+            self._entradas[clave] = photo
+        self._entradas.move_to_end(clave)
+        if dueno is not None:
+            self._duenos.setdefault(clave, set()).add(str(dueno))
+        self._desalojar()
+        return photo
+
+    def liberar(self, dueno):
+        """Marca como libres las imágenes que mostraba la ventana dueno."""
+        dueno = str(dueno)
+        for clave in list(self._duenos):
+            self._duenos[clave].discard(dueno)
+            if not self._duenos[clave]:
+                del self._duenos[clave]
+        self._desalojar()
+
+    def liberar_al_cerrar(self, ventana):
+        """Llama a liberar(ventana) cuando la ventana se destruye."""
+        def al_destruir(evento):
+            # <Destroy> también llega por cada widget hijo
+            if evento.widget is ventana:
+                self.liberar(ventana)
+        ventana.bind('<Destroy>', al_destruir, add='+')
+
+    def _desalojar(self):
+        libres = [clave for clave in self._entradas if clave not in self._duenos]
+        # Las más antiguas primero (orden del OrderedDict)
+        for clave in libres[:max(len(libres) - self.max_entradas, 0)]:
+            del self._entradas[clave]
+
+    def limpiar(self):
+        """Descarta todas las imágenes libres."""
+        for clave in [c for c in self._entradas if c not in self._duenos]:
+            del self._entradas[clave]
+
+
+cache_imagenes = CacheImagenesTk()
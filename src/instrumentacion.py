@@ -0,0 +1,226 @@
+"""
+instrumentacion.py
+Tiempos, cantidad de llamadas y pico de memoria por etapa de cada cálculo.
+
+Una Corrida junta las mediciones de una acción del usuario (por ejemplo
+"Calcular Campo Eléctrico"): validación, evaluación del campo, búsqueda de
+equilibrios, trazado de líneas, contornos, savefig, decodificación de
+imágenes. Las funciones marcan sus etapas con
+
+    with etapa('contornos'):
+        ...
+
+y la medición queda en la corrida activa en ese hilo (ver Corrida.activa).
+Sin corrida activa, etapa() no mide nada: los gráficos vivos y el modo
+interactivo llaman a las mismas funciones sin pagar la instrumentación.
+
+Al finalizar, la corrida se emite como un registro de logging con los datos
+en JSON (logger 'fisica.instrumentacion'). Opcionalmente:
+- FISICA_MEDIR_MEMORIA=1: pico de memoria por etapa con tracemalloc (hace
+  más lento el cálculo).
+- FISICA_PERFIL=<carpeta>: un perfil de cProfile (.prof) por corrida, que se
+  lee con python -m pstats, snakeviz o flameprof (gráfico de llama).
+"""
+import contextvars
+import cProfile
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+logger = logging.getLogger('fisica.instrumentacion')
+
+# Corrida activa en el hilo actual (los hilos nuevos empiezan sin ninguna)
+_corrida_activa = contextvars.ContextVar('corrida_activa', default=None)
+
+_contador = {'corridas': 0}
+_candado_contador = threading.Lock()
+
+
+class Corrida:
+    """
+    Mediciones por etapa de un cálculo.
+
+    Parámetros:
+    - nombre: nombre de la acción (aparece en el log y en el archivo de perfil)
+    - medir_memoria: pico de memoria por etapa con tracemalloc
+      (None = variable de entorno FISICA_MEDIR_MEMORIA)
+    - directorio_perfil: carpeta donde guardar el perfil de cProfile o None
+      (None = variable de entorno FISICA_PERFIL)
+    """
+
+    def __init__(self, nombre, medir_memoria=None, directorio_perfil=None):
+        if medir_memoria is None:
+            medir_memoria = os.environ.get('FISICA_MEDIR_MEMORIA', '') not in ('', '0')
+        if directorio_perfil is None:
+            directorio_perfil = os.environ.get('FISICA_PERFIL') or None
+        with _candado_contador:
+            _contador['corridas'] += 1
+            self.numero = _contador['corridas']
+        self.nombre = nombre
+        self.medir_memoria = medir_memoria
+        self.directorio_perfil = directorio_perfil
+        self.etapas = {}   # nombre -> {'llamadas', 'tiempo', 'pico_memoria', 'padre'}
+        self.inicio = time.perf_counter()
+        self.duracion = None
+        self.estado = None
+        self.ruta_perfil = None
+        self._perfil = cProfile.Profile() if directorio_perfil else None
+        self._inicio_tracemalloc = False
+        self._hilos = threading.local()
+        self._candado = threading.Lock()
+
+    @contextmanager
+    def activa(self):
+        """
+        Activa la corrida en el hilo actual: las etapas que se ejecuten dentro
+        se miden en ella. Se puede activar en varios hilos, uno después de otro
+        (por ejemplo, el hilo de trabajo y después el de Tk).
+        """
+        if self.medir_memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._inicio_tracemalloc = True
+        self._hilos.pila = []
+        token = _corrida_activa.set(self)
+        if self._perfil is not None:
+            self._perfil.enable()
+        try:
+            yield self
+        finally:
+            if self._perfil is not None:
+                self._perfil.disable()
+            _corrida_activa.reset(token)
+
+    def registrar(self, nombre, tiempo, pico_memoria=None, padre=None):
+        """
+        Suma una medición a la etapa nombre.
+
+        Parámetros:
+        - nombre: nombre de la etapa
+        - tiempo: duración [s]
+        - pico_memoria: memoria máxima reservada durante la etapa [bytes] o None
+        - padre: etapa que la contiene o None
+        """
+        with self._candado:
+            datos = self.etapas.setdefault(nombre, {'llamadas': 0, 'tiempo': 0.0,
+                                                    'pico_memoria': None, 'padre': padre})
+            datos['llamadas'] += 1
+            datos['tiempo'] += tiempo
+            if pico_memoria is not None:
+                datos['pico_memoria'] = max(datos['pico_memoria'] or 0, pico_memoria)
+
+    def finalizar(self, estado='ok'):
+        """
+        Cierra la corrida: la emite en el log y guarda el perfil si corresponde.
+
+        Parámetros:
+        - estado: 'ok', 'error' o 'cancelada'
+
+        Retorna: la misma corrida
+        """
+        self.duracion = time.perf_counter() - self.inicio
+        self.estado = estado
+        if self._inicio_tracemalloc:
+            tracemalloc.stop()
+            self._inicio_tracemalloc = False
+        if self._perfil is not None:
+            os.makedirs(self.directorio_perfil, exist_ok=True)
+            fecha = datetime.now().strftime('%Y%m%d_%H%M%S')
+            self.ruta_perfil = os.path.join(self.directorio_perfil,
+                                            f'{self.nombre}_{fecha}_{self.numero}.prof')
+            self._perfil.dump_stats(self.ruta_perfil)
+        datos = self.como_dict()
+        logger.info('corrida %s', json.dumps(datos, ensure_ascii=False),
+                    extra={'corrida': datos})
+        return self
+
+    def como_dict(self):
+        """Retorna: dict serializable a JSON con la corrida y sus etapas."""
+        with self._candado:
+            etapas = {nombre: dict(datos) for nombre, datos in self.etapas.items()}
+        return {
+            'corrida': self.nombre,
+            'numero': self.numero,
+            'estado': self.estado,
+            'tiempo_total': self.duracion,
+            'etapas': etapas,
+            'perfil': self.ruta_perfil,
+        }
+
+    def resumen(self, max_etapas=4):
+        """
+        Resumen corto para la barra de estado: tiempo total y las etapas más
+        lentas (sólo las que no contienen otras, para no contar dos veces).
+
+        Retorna: string
+        """
+        padres = {datos['padre'] for datos in self.etapas.values()}
+        hojas = sorted(((datos['tiempo'], nombre, datos) for nombre, datos in self.etapas.items()
+                        if nombre not in padres), key=lambda t: t[0], reverse=True)
+        partes = []
+        for tiempo, nombre, datos in hojas[:max_etapas]:
+            texto = f'{nombre} {formatear_duracion(tiempo)}'
+            if datos['llamadas'] > 1:
+                texto += f' ×{datos["llamadas"]}'
+            if datos['pico_memoria'] is not None:
+                texto += f' ({datos["pico_memoria"] / 2**20:.0f} MB)'
+            partes.append(texto)
+        duracion = self.duracion if self.duracion is not None else time.perf_counter() - self.inicio
+        return f'Listo en {formatear_duracion(duracion)}: ' + ' · '.join(partes)
+
+
+def formatear_duracion(segundos):
+    """Retorna: la duración en ms o s, según su tamaño."""
+    if segundos < 1:
+        return f'{segundos * 1000:.0f} ms'
+    return f'{segundos:.2f} s'
+
+
+def corrida_actual():
+    """Retorna: la Corrida activa en este hilo o None."""
+    return _corrida_activa.get()
+
+
+@contextmanager
+def etapa(nombre):
+    """
+    Mide el bloque como la etapa nombre de la corrida activa. Las etapas se
+    pueden anidar: cada una guarda cuál la contiene.
+
+    Parámetros:
+    - nombre: nombre de la etapa
+    """
+    corrida = _corrida_activa.get()
+    if corrida is None:
+        yield
+        return
+
+    pila = corrida._hilos.pila
+    padre = pila[-1] if pila else None
+    memoria = corrida.medir_memoria and tracemalloc.is_tracing()
+    if memoria:
+        actual, pico = tracemalloc.get_traced_memory()
+        if padre is not None:
+            # reset_peak borra el pico de la etapa que contiene a esta: guardarlo
+            padre['pico'] = max(padre['pico'], pico)
+        tracemalloc.reset_peak()
+    marca = {'nombre': nombre, 'base': actual if memoria else 0, 'pico': 0}
+    pila.append(marca)
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        duracion = time.perf_counter() - inicio
+        pila.pop()
+        pico_memoria = None
+        if memoria:
+            pico = max(marca['pico'], tracemalloc.get_traced_memory()[1])
+            pico_memoria = pico - marca['base']
+            if padre is not None:
+                padre['pico'] = max(padre['pico'], pico)
+        corrida.registrar(nombre, duracion, pico_memoria,
+                          padre['nombre'] if padre is not None else None)
@@ -0,0 +1,303 @@
+"""
+interactivo.py
+Modo interactivo: las cargas se arrastran con el mouse sobre el plano y el
+mapa de |E|, las equipotenciales y los puntos de equilibrio se redibujan en
+el momento.
+
+Para llegar a ~30 cuadros por segundo con mallas de 200×200 no se usa el
+camino de los gráficos guardados (plt.subplots + contour + savefig): la
+figura se arma una vez y en cada cuadro sólo se cambian los datos de sus
+artistas (set_data de la imagen, set_segments de las equipotenciales,
+set_offsets de cargas y equilibrios). Las curvas de nivel se calculan
+directamente con contourpy, sin crear un QuadContourSet por cuadro, y los
+ejes, ticks y la barra de colores no se redibujan: los artistas que cambian
+se pintan sobre el fondo guardado (blitting).
+
+La malla guarda la capa de cada carga (MallaPorCarga), así que arrastrar una
+carga sólo recalcula la suya.
+"""
+import time
+
+import contourpy
+import numpy as np
+from matplotlib import colormaps
+from matplotlib.artist import Artist
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.cm import ScalarMappable
+from matplotlib.collections import LineCollection
+from matplotlib.colors import Normalize
+from matplotlib.figure import Figure
+
+from logic import encontrar_equilibrios_plano
+from malla import MallaPorCarga, niveles_contorno
+
+
+def segmentos_equipotenciales(x, y, V, niveles):
+    """
+    Curvas de nivel de V como lista de arrays (n, 2), para un LineCollection.
+
+    Parámetros:
+    - x, y: ejes de la malla
+    - V: array (ny, nx)
+    - niveles: valores de las curvas
+
+    Retorna: lista de segmentos
+    """
+    generador = contourpy.contour_generator(x, y, V, line_type=contourpy.LineType.Separate)
+    segmentos = []
+    for nivel in niveles:
+        segmentos.extend(generador.lines(nivel))
+    return segmentos
+
+
+def armar_cuadro(x, y, V, Ex, Ey, cargas, rango, niveles=None):
+    """
+    Todo lo que cambia en un cuadro al mover una carga, a partir de V, Ex y
+    Ey ya evaluados en la malla.
+
+    Parámetros:
+    - x, y: ejes de la malla
+    - V, Ex, Ey: arrays (ny, nx)
+    - cargas: lista de tuplas [(carga, x, y), ...]
+    - rango: tupla (min, max) de ambos ejes
+    - niveles: niveles de las equipotenciales (None = niveles_contorno entre
+      los percentiles 2 y 98 de V, como en los gráficos guardados)
+
+    Retorna: dict con x, y, log_E (log10 |E|), niveles, segmentos y equilibrios
+    """
+    log_E = 0.5 * np.log10(Ex * Ex + Ey * Ey + 1e-300)
+    if niveles is None:
+        niveles = niveles_contorno(np.nanpercentile(V, 2), np.nanpercentile(V, 98), 21)
+    return {
+        'x': x,
+        'y': y,
+        'log_E': log_E,
+        'niveles': niveles,
+        'segmentos': segmentos_equipotenciales(x, y, V, niveles),
+        'equilibrios': encontrar_equilibrios_plano(cargas, rango),
+    }
+
+
+class MapaRGBA(Artist):
+    """
+    Imagen RGBA que ocupa todo el eje, ampliada a los píxeles del eje por
+    vecino más cercano con índices guardados y pintada con
+    renderer.draw_image. Con mallas de 200×200, el remuestreo general de
+    AxesImage costaba ~18 ms por cuadro; así cuesta ~1 ms.
+
+    Parámetros:
+    - ax: eje donde se dibuja (la imagen cubre sus límites)
+    - rgba: array (ny, nx, 4) de uint8, con la fila 0 abajo
+    """
+
+    def __init__(self, ax, rgba, **kwargs):
+        super().__init__()
+        self.ax = ax
+        self.rgba = None
+        self._indices = (None, None, None)
+        self.set_data(rgba)
+        self.set_clip_box(ax.bbox)
+        self.update(kwargs)
+
+    def set_data(self, rgba):
+        self.rgba = np.asarray(rgba)
+        self.stale = True
+
+    def _ampliar(self, ancho, alto):
+        forma, filas, columnas = self._indices
+        if forma != (self.rgba.shape[:2], ancho, alto):
+            ny, nx = self.rgba.shape[:2]
+            # La fila 0 de la imagen va abajo; la de la pantalla, arriba
+            filas = (np.arange(alto) * ny // alto)[::-1]
+            columnas = np.arange(ancho) * nx // ancho
+            self._indices = ((self.rgba.shape[:2], ancho, alto), filas, columnas)
+        return self.rgba.take(filas, axis=0).take(columnas, axis=1)
+
+    def draw(self, renderer):
+        if not self.get_visible():
+            return
+        caja = self.ax.bbox
+        x0, y0 = int(np.floor(caja.x0)), int(np.floor(caja.y0))
+        ancho = int(np.ceil(caja.x1)) - x0
+        alto = int(np.ceil(caja.y1)) - y0
+        if ancho <= 0 or alto <= 0:
+            return
+        gc = renderer.new_gc()
+        self._set_gc_clip(gc)
+        renderer.draw_image(gc, x0, y0, self._ampliar(ancho, alto))
+        gc.restore()
+        self.stale = False
+
+
+class ExploradorInteractivo:
+    """
+    Figura embebida en Tk donde las cargas se arrastran con el mouse.
+
+    Parámetros:
+    - master: widget de Tk donde se coloca el canvas (ver atributo widget)
+    - cargas: lista de tuplas [(carga, x, y), ...]
+    - rango: tupla (min, max) de ambos ejes
+    - num_puntos: puntos por eje de la malla
+    - al_soltar: función(cargas) llamada al soltar una carga arrastrada
+    """
+
+    def __init__(self, master, cargas, rango=(-5, 5), num_puntos=200, al_soltar=None,
+                 figsize=(8, 7), dpi=100):
+        self.cargas = [tuple(float(v) for v in c) for c in cargas]
+        self.rango = rango
+        self.num_puntos = num_puntos
+        self.al_soltar = al_soltar
+        self.arrastrada = None
+        self.niveles = None
+        self._pendiente = False
+
+        self.figura = Figure(figsize=figsize, dpi=dpi)
+        self.ax = self.figura.subplots()
+        ax = self.ax
+        ax.set_aspect('equal')
+        ax.set_xlim(rango)
+        ax.set_ylim(rango)
+        ax.set_xlabel('x [m]')
+        ax.set_ylabel('y [m]')
+        ax.set_title('Arrastre las cargas con el mouse')
+
+        # Capas por carga: arrastrar una carga sólo recalcula su capa
+        self.malla = MallaPorCarga(self.cargas, rango, num_puntos, campo=True)
+        cuadro = self._cuadro()
+        self.niveles = cuadro['niveles']
+        # El mapa se colorea acá (RGBA uint8): dibujar una imagen ya coloreada
+        # cuesta la mitad que pasarle a imshow los valores y la escala
+        self.escala = ScalarMappable(Normalize(), colormaps['viridis'])
+        self._ajustar_colores(cuadro['log_E'])
+        self.mapa = MapaRGBA(ax, self._colorear(cuadro['log_E']), zorder=0, animated=True)
+        ax.add_artist(self.mapa)
+        self.figura.colorbar(self.escala, ax=ax, label='log10 |E| [N/C]', shrink=0.85)
+        self.equipotenciales = LineCollection([], colors='white', linewidths=0.8, alpha=0.8,
+                                              animated=True)
+        ax.add_collection(self.equipotenciales)
+        self.marcas_equilibrio = ax.scatter([], [], s=80, marker='x', c='red',
+                                            linewidths=2, zorder=6, animated=True)
+        colores = ['red' if q > 0 else 'blue' for q, _, _ in self.cargas]
+        self.marcas_cargas = ax.scatter([x for _, x, _ in self.cargas],
+                                        [y for _, _, y in self.cargas],
+                                        s=160, c=colores, edgecolors='white', zorder=7,
+                                        animated=True)
+        self.texto = ax.text(0.01, 0.99, '', transform=ax.transAxes, va='top', fontsize=9,
+                             color='white', animated=True)
+        self.animados = [self.mapa, self.equipotenciales, self.marcas_equilibrio,
+                         self.marcas_cargas, self.texto]
+        self._aplicar(cuadro)
+
+        self.canvas = FigureCanvasTkAgg(self.figura, master=master)
+        self.widget = self.canvas.get_tk_widget()
+        self.figura.tight_layout()
+        self._fondo = None
+        self.canvas.mpl_connect('draw_event', self._al_dibujar)
+        self.canvas.mpl_connect('button_press_event', self._al_presionar)
+        self.canvas.mpl_connect('motion_notify_event', self._al_mover)
+        self.canvas.mpl_connect('button_release_event', self._al_soltar)
+
+    def _cuadro(self):
+        malla = self.malla
+        malla.actualizar(self.cargas)
+        return armar_cuadro(malla.x, malla.y, malla.V, malla.Ex, malla.Ey, self.cargas,
+                            self.rango, self.niveles)
+
+    def _al_dibujar(self, evento):
+        # Redibujo completo (primera vez, cambio de tamaño, barra de colores):
+        # guardar el fondo sin los artistas animados y pintarlos encima
+        self._fondo = self.canvas.copy_from_bbox(self.ax.bbox)
+        self._pintar()
+
+    def _pintar(self):
+        for artista in self.animados:
+            self.ax.draw_artist(artista)
+        self.canvas.blit(self.ax.bbox)
+
+    def _ajustar_colores(self, log_E):
+        self.escala.set_clim(np.nanpercentile(log_E, 2), np.nanpercentile(log_E, 98))
+
+    def _colorear(self, log_E):
+        return self.escala.to_rgba(log_E, bytes=True)
+
+    def _aplicar(self, cuadro):
+        """Pasa un cuadro calculado a los artistas de la figura."""
+        self.mapa.set_data(self._colorear(cuadro['log_E']))
+        self.equipotenciales.set_segments(cuadro['segmentos'])
+        equilibrios = [(x, y) for x, y, _, _ in cuadro['equilibrios']]
+        self.marcas_equilibrio.set_offsets(np.array(equilibrios).reshape(-1, 2))
+        self.marcas_cargas.set_offsets([(x, y) for _, x, y in self.cargas])
+
+    def _carga_cercana(self, x, y):
+        """Índice de la carga a menos de 3% del rango del punto, o None."""
+        radio = 0.03 * (self.rango[1] - self.rango[0])
+        distancias = [np.hypot(x - xc, y - yc) for _, xc, yc in self.cargas]
+        i = int(np.argmin(distancias))
+        return i if distancias[i] <= radio else None
+
+    def _al_presionar(self, evento):
+        if evento.inaxes is not self.ax or evento.xdata is None:
+            return
+        self.arrastrada = self._carga_cercana(evento.xdata, evento.ydata)
+
+    def _al_mover(self, evento):
+        if self.arrastrada is None or evento.inaxes is not self.ax or evento.xdata is None:
+            return
+        q, _, _ = self.cargas[self.arrastrada]
+        x = min(max(evento.xdata, self.rango[0]), self.rango[1])
+        y = min(max(evento.ydata, self.rango[0]), self.rango[1])
+        self.cargas[self.arrastrada] = (q, x, y)
+        # Si llegan varios movimientos antes de dibujar, sólo se calcula el último
+        if not self._pendiente:
+            self._pendiente = True
+            self.widget.after_idle(self.redibujar)
+
+    def _al_soltar(self, evento):
+        if self.arrastrada is None:
+            return
+        self.arrastrada = None
+        # Al soltar se reajustan niveles y colores a la nueva configuración
+        self.niveles = None
+        self.redibujar(ajustar=True)
+        if self.al_soltar is not None:
+            self.al_soltar(list(self.cargas))
+
+    def actualizar(self, cargas, x_punto=None, y_punto=None):
+        """
+        Cambia las cargas desde afuera (desde las entradas, como los gráficos
+        vivos). El punto de cálculo no se usa.
+        """
+        cargas = [tuple(float(v) for v in c) for c in cargas]
+        if cargas == self.cargas:
+            return
+        self.cargas = cargas
+        self.niveles = None
+        self.redibujar(ajustar=True)
+
+    def actualizar_punto(self, x_punto, y_punto):
+        """El punto de cálculo no se marca en este gráfico."""
+
+    def redibujar(self, ajustar=False):
+        """Recalcula el cuadro con las cargas actuales y lo dibuja."""
+        self._pendiente = False
+        inicio = time.perf_counter()
+        # Durante el arrastre los niveles quedan fijos para que no salten
+        cuadro = self._cuadro()
+        self.niveles = cuadro['niveles']
+        if ajustar or self._fondo is None:
+            # Cambian los colores: también hay que redibujar la barra de colores
+            self._ajustar_colores(cuadro['log_E'])
+            self._aplicar(cuadro)
+            self.canvas.draw()
+        else:
+            self._aplicar(cuadro)
+            self.canvas.restore_region(self._fondo)
+            self._pintar()
+        duracion = time.perf_counter() - inicio
+        self.texto.set_text(f'{duracion * 1000:.0f} ms/cuadro '
+                            f'({self.num_puntos}×{self.num_puntos})')
+
+    def cerrar(self):
+        """Libera la figura."""
+        self.figura.clear()
+        self.widget.destroy()
@@ -0,0 +1,328 @@
+"""
+lineas_campo.py
+Trazado de líneas de campo eléctrico para muchas semillas a la vez.
+
+Una línea de campo cumple dr/ds = E/|E|, con s la longitud de arco. En lugar
+de integrar cada semilla por separado (odeint con una llamada a Python por
+punto), todas las semillas avanzan juntas como un array y cada etapa del
+integrador evalúa el campo con calcular_campo_y_potencial_lote.
+
+Las líneas sólo dependen de las cargas y de las semillas, así que las
+trazadas se guardan (en float32) en un caché LRU en memoria y en el caché de
+resultados en disco (cache.py): al reabrir una configuración conocida no se
+integra nada, aunque el programa se haya cerrado.
+"""
+import hashlib
+from collections import OrderedDict
+
+import numpy as np
+
+from cache import cache_resultados
+from logic import K, ConjuntoCargas, calcular_campo_y_potencial_lote
+
+
+# Motivos por los que termina una línea en trazar_lineas_adaptativo
+MOTIVOS = ('dominio', 'sumidero', 'estancada', 'longitud', 'pasos')
+
+# Tablero de Dormand–Prince 5(4)
+_A = (
+    (),
+    (1/5,),
+    (3/40, 9/40),
+    (44/45, -56/15, 32/9),
+    (19372/6561, -25360/2187, 64448/6561, -212/729),
+    (9017/3168, -355/33, 46732/5247, 49/176, -5103/18656),
+    (35/384, 0, 500/1113, 125/192, -2187/6784, 11/84),
+)
+# Diferencia entre los pesos de orden 5 y de orden 4 (estimación del error)
+_E = (71/57600, 0, -71/16695, 71/1920, -17253/339200, 22/525, -1/40)
+
+
+class Trayectorias:
+    """
+    Líneas de campo de distinta longitud guardadas en forma compacta:
+    todos los puntos concatenados y los desplazamientos donde empieza cada línea.
+
+    La línea i es (x[inicios[i]:inicios[i+1]], y[inicios[i]:inicios[i+1]]).
+
+    Atributos:
+    - x, y: puntos de todas las líneas, uno tras otro [m]
+    - inicios: array de len(líneas) + 1 desplazamientos
+    - motivos: código de terminación de cada línea (índice en MOTIVOS) o None
+    """
+
+    def __init__(self, x, y, inicios, motivos=None):
+        self.x = x
+        self.y = y
+        self.inicios = inicios
+        self.motivos = motivos
+
+    def __len__(self):
+        return len(self.inicios) - 1
+
+    def __getitem__(self, i):
+        a, b = self.inicios[i], self.inicios[i + 1]
+        return self.x[a:b], self.y[a:b]
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def motivo(self, i):
+        """Retorna: por qué terminó la línea i ('dominio', 'sumidero', ...)."""
+        return MOTIVOS[self.motivos[i]]
+
+
+def _direccion_y_magnitud(cargas, x, y):
+    """
+    Dirección unitaria y magnitud del campo en muchos puntos.
+
+    Donde el campo es nulo (o el punto coincide con una carga) la dirección
+    y la magnitud son 0 y la línea se queda quieta.
+
+    Parámetros:
+    - cargas: ConjuntoCargas o lista de tuplas [(carga1, x1, y1), ...]
+    - x, y: arrays de posiciones [m]
+
+    Retorna: (ux, uy, magnitud) arrays con la forma de x
+    """
+    Ex, Ey, magnitud, _, _ = calcular_campo_y_potencial_lote(cargas, x, y)
+    nulo = (magnitud == 0) | ~np.isfinite(magnitud)
+    divisor = np.where(nulo, 1.0, magnitud)
+    return (np.where(nulo, 0.0, Ex / divisor), np.where(nulo, 0.0, Ey / divisor),
+            np.where(nulo, 0.0, magnitud))
+
+
+def trazar_lineas_adaptativo(cargas, x0, y0, dominio, sentido=1, tolerancia=None,
+                             paso_max=None, radio_sumidero=0.05, longitud_max=None,
+                             max_pasos=5000):
+    """
+    Integra líneas de campo con Dormand–Prince 5(4) y paso adaptativo por semilla.
+
+    Todas las semillas avanzan juntas, pero cada una con su propio paso: se
+    achica donde la línea se curva (cerca de las cargas) y crece donde es
+    recta. Cada línea termina en cuanto:
+    - sale del dominio ('dominio'),
+    - llega a menos de radio_sumidero de una carga hacia la que va
+      (negativas si sentido=1, positivas si sentido=-1) ('sumidero'),
+    - llega a un punto de campo nulo, donde la dirección se invierte o el paso
+      se hace despreciable ('estancada'),
+    - recorre longitud_max ('longitud') o agota max_pasos ('pasos').
+
+    Parámetros:
+    - cargas: ConjuntoCargas o lista de tuplas [(carga1, x1, y1), ...]
+    - x0, y0: posiciones iniciales de las semillas [m]
+    - dominio: (x_min, x_max, y_min, y_max) o (min, max) para ambos ejes
+    - sentido: 1 sigue al campo, -1 va en contra
+    - tolerancia: error local admitido por paso [m] (por defecto 1e-5 del tamaño del dominio)
+    - paso_max: paso máximo [m] (por defecto 1/100 del tamaño del dominio)
+    - radio_sumidero: distancia a la que se considera que la línea llegó a una carga [m]
+    - longitud_max: longitud máxima de cada línea [m] (por defecto 10 veces el dominio)
+    - max_pasos: intentos de paso por línea antes de cortarla
+
+    Retorna: Trayectorias con una línea por semilla (en el mismo orden)
+    """
+    cargas = ConjuntoCargas.desde(cargas)
+    if len(dominio) == 2:
+        dominio = (dominio[0], dominio[1], dominio[0], dominio[1])
+    x_min, x_max, y_min, y_max = dominio
+    escala = max(x_max - x_min, y_max - y_min)
+    tolerancia = 1e-5 * escala if tolerancia is None else tolerancia
+    paso_max = escala / 100 if paso_max is None else paso_max
+    longitud_max = 10 * escala if longitud_max is None else longitud_max
+    paso_min = 1e-6 * escala
+
+    # Campo de referencia para decidir cuándo |E| es prácticamente nulo
+    campo_ref = K * np.abs(cargas.q).sum() / escala**2
+    sumidero = (cargas.q < 0) if sentido > 0 else (cargas.q > 0)
+    sx, sy = cargas.x[sumidero], cargas.y[sumidero]
+
+    x = np.array(x0, dtype=float).ravel()
+    y = np.array(y0, dtype=float).ravel()
+    n = x.size
+    h = np.full(n, min(paso_max, 0.01 * escala))
+    recorrido = np.zeros(n)
+    intentos = np.zeros(n, dtype=int)
+    motivos = np.full(n, -1, dtype=np.int8)
+
+    # Puntos aceptados en cada iteración: (índices de semilla, x, y)
+    indices = [np.arange(n)]
+    puntos_x = [x.copy()]
+    puntos_y = [y.copy()]
+
+    activas = np.arange(n)
+    k1x, k1y, _ = _direccion_y_magnitud(cargas, x, y)
+
+    while activas.size:
+        xa, ya, ha = x[activas], y[activas], sentido * h[activas]
+        kx, ky = [k1x], [k1y]
+        for etapa in range(1, 7):
+            coef = _A[etapa]
+            xe = xa + ha * sum(c * k for c, k in zip(coef, kx))
+            ye = ya + ha * sum(c * k for c, k in zip(coef, ky))
+            ux, uy, magnitud = _direccion_y_magnitud(cargas, xe, ye)
+            kx.append(ux)
+            ky.append(uy)
+        # La última etapa se evalúa en el punto nuevo (FSAL)
+        x_nuevo, y_nuevo = xe, ye
+
+        err_x = ha * sum(e * k for e, k in zip(_E, kx))
+        err_y = ha * sum(e * k for e, k in zip(_E, ky))
+        error = np.hypot(err_x, err_y) / tolerancia
+        acepta = error <= 1
+
+        # Nuevo paso (controlador estándar, acotado)
+        with np.errstate(divide='ignore'):
+            factor = np.clip(0.9 * error**-0.2, 0.2, 5.0)
+        h[activas] = np.minimum(np.abs(ha) * factor, paso_max)
+        intentos[activas] += 1
+
+        # Un paso aceptado que da vuelta la dirección cruzó un punto de campo nulo
+        se_invierte = acepta & (k1x * kx[6] + k1y * ky[6] < 0)
+
+        ia = activas[acepta]
+        recorrido[ia] += np.abs(ha[acepta])
+        x[ia] = x_nuevo[acepta]
+        y[ia] = y_nuevo[acepta]
+        k1x = np.where(acepta, kx[6], k1x)
+        k1y = np.where(acepta, ky[6], k1y)
+        indices.append(ia)
+        puntos_x.append(x[ia])
+        puntos_y.append(y[ia])
+
+        # Eventos de terminación (el primero que se cumple es el motivo)
+        xs, ys = x[activas], y[activas]
+        fuera = (xs < x_min) | (xs > x_max) | (ys < y_min) | (ys > y_max)
+        llego = np.zeros(activas.size, dtype=bool)
+        if sx.size:
+            d2 = (xs[:, None] - sx)**2 + (ys[:, None] - sy)**2
+            llego = (d2 < radio_sumidero**2).any(axis=1)
+        estancada = (se_invierte | (acepta & (magnitud < 1e-9 * campo_ref))
+                     | (h[activas] < paso_min))
+        eventos = (fuera, llego, estancada, recorrido[activas] >= longitud_max,
+                   intentos[activas] >= max_pasos)
+        termina = np.zeros(activas.size, dtype=bool)
+        for codigo, evento in enumerate(eventos):
+            nuevo = evento & ~termina
+            motivos[activas[nuevo]] = codigo
+            termina |= nuevo
+
+        activas = activas[~termina]
+        k1x = k1x[~termina]
+        k1y = k1y[~termina]
+
+    # Agrupar los puntos por semilla conservando el orden de avance
+    indices = np.concatenate(indices)
+    orden = np.argsort(indices, kind='stable')
+    inicios = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(indices, minlength=n), out=inicios[1:])
+
+    return Trayectorias(np.concatenate(puntos_x)[orden], np.concatenate(puntos_y)[orden],
+                        inicios, motivos)
+
+
+class CacheTrayectorias:
+    """
+    Caché LRU de líneas de campo trazadas, indexado por un hash de las cargas
+    y de los parámetros de las semillas.
+
+    Las trayectorias se guardan en float32 (puntos concatenados + inicios).
+    Con disco, cada entrada se escribe además en un CacheResultados (en su
+    carpeta, dentro de su presupuesto de tamaño) y se lee de ahí cuando no
+    está en memoria.
+
+    Parámetros:
+    - max_entradas: cantidad de configuraciones que se guardan en memoria
+    - disco: CacheResultados, función que lo devuelve (se llama recién al
+      primer uso) o None para guardar sólo en memoria
+    """
+
+    def __init__(self, max_entradas=32, disco=None):
+        self.max_entradas = max_entradas
+        self.disco = disco
+        self._entradas = OrderedDict()
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def _disco(self):
+        return self.disco() if callable(self.disco) else self.disco
+
+    def obtener(self, clave):
+        """Retorna: Trayectorias guardadas con esa clave, o None."""
+        if clave in self._entradas:
+            self._entradas.move_to_end(clave)
+            return self._entradas[clave]
+        disco = self._disco()
+        datos = disco.obtener(f'lineas_{clave}') if disco is not None else None
+        if datos is None:
+            return None
+        trayectorias = Trayectorias(datos['x'], datos['y'], datos['inicios'], datos['motivos'])
+        self._recordar(clave, trayectorias)
+        return trayectorias
+
+    def guardar(self, clave, trayectorias):
+        """
+        Guarda las trayectorias en float32.
+
+        Retorna: la copia compacta que quedó guardada
+        """
+        compacta = Trayectorias(trayectorias.x.astype(np.float32),
+                                trayectorias.y.astype(np.float32),
+                                trayectorias.inicios, trayectorias.motivos)
+        self._recordar(clave, compacta)
+        disco = self._disco()
+        if disco is not None:
+            disco.guardar(f'lineas_{clave}', {'x': compacta.x, 'y': compacta.y,
+                                              'inicios': compacta.inicios,
+                                              'motivos': compacta.motivos})
+        return compacta
+
+    def _recordar(self, clave, trayectorias):
+        self._entradas[clave] = trayectorias
+        self._entradas.move_to_end(clave)
+        while len(self._entradas) > self.max_entradas:
+            self._entradas.popitem(last=False)
+
+    def limpiar(self):
+        """Vacía el caché en memoria (las entradas en disco se conservan)."""
+        self._entradas.clear()
+
+
+# Caché usado por trazar_lineas_cacheado si no se indica otro: en memoria y
+# en el caché de resultados compartido
+cache_lineas = CacheTrayectorias(disco=cache_resultados)
+
+
+def clave_lineas(cargas, x0, y0, **parametros):
+    """
+    Clave del caché: hash de las cargas, las semillas y los parámetros del trazado.
+
+    Retorna: string hexadecimal
+    """
+    cargas = ConjuntoCargas.desde(cargas)
+    h = hashlib.sha1(cargas.huella.encode())
+    h.update(np.ascontiguousarray(x0, dtype=float).tobytes())
+    h.update(np.ascontiguousarray(y0, dtype=float).tobytes())
+    h.update(repr(sorted(parametros.items())).encode())
+    return h.hexdigest()
+
+
+def trazar_lineas_cacheado(cargas, x0, y0, dominio, cache=None, **opciones):
+    """
+    Como trazar_lineas_adaptativo, pero si las mismas cargas y semillas ya se
+    trazaron devuelve las trayectorias guardadas sin integrar.
+
+    Parámetros:
+    - cargas, x0, y0, dominio, opciones: ver trazar_lineas_adaptativo
+    - cache: CacheTrayectorias a usar (por defecto cache_lineas)
+
+    Retorna: Trayectorias (en float32)
+    """
+    cache = cache_lineas if cache is None else cache
+    cargas = ConjuntoCargas.desde(cargas)
+    clave = clave_lineas(cargas, x0, y0, dominio=tuple(dominio), **opciones)
+    trayectorias = cache.obtener(clave)
+    if trayectorias is None:
+        trayectorias = cache.guardar(clave, trazar_lineas_adaptativo(cargas, x0, y0, dominio,
+                                                                     **opciones))
+    return trayectorias
@@ -2,16 +2,108 @@
 logic.py
 Funciones de física para el proyecto de Física 2 IS.
 """
-from fileinput import filename
 import numpy as np
-import matplotlib.pyplot as plt
 import os
-from scipy.optimize import brentq
-from scipy.integrate import odeint
+import sys
+import hashlib
+from functools import cached_property
+
+import nucleos
+from instrumentacion import etapa
 
 # Constante de Coulomb [N·m²/C²]
 K = 1 / (4 * np.pi * 8.854187817e-12)  # 1/(4πε₀)
 
+class ConjuntoCargas:
+    """
+    Conjunto de cargas puntuales guardado como arrays contiguos (q, x, y)
+    en lugar de una lista de tuplas.
+
+    Se comporta como la lista de tuplas de siempre (len, indexado e iteración
+    devuelven (carga, x, y)), así que puede pasarse a cualquier función de
+    este módulo. Los datos derivados se calculan una sola vez y se guardan.
+
+    Parámetros:
+    - q: cargas [C]
+    - x, y: posiciones de las cargas [m]
+    """
+
+    def __init__(self, q, x, y):
+        self.q = np.ascontiguousarray(q, dtype=float).ravel()
+        self.x = np.ascontiguousarray(x, dtype=float).ravel()
+        self.y = np.ascontiguousarray(y, dtype=float).ravel()
+        if not (len(self.q) == len(self.x) == len(self.y)):
+            raise ValueError("q, x e y deben tener la misma cantidad de elementos")
+        # Inmutables: los datos derivados en caché dependen de ellos
+        for arr in (self.q, self.x, self.y):
+            arr.setflags(write=False)
+
+    @classmethod
+    def desde(cls, cargas):
+        """
+        Convierte una lista de tuplas [(carga, x, y), ...] o un array (N, 3)
+        en un ConjuntoCargas. Si ya lo es, lo devuelve sin copiar.
+        """
+        if isinstance(cargas, cls):
+            return cargas
+        datos = np.asarray(cargas, dtype=float).reshape(-1, 3)
+        return cls(datos[:, 0], datos[:, 1], datos[:, 2])
+
+    def __len__(self):
+        return len(self.q)
+
+    def __iter__(self):
+        return zip(self.q.tolist(), self.x.tolist(), self.y.tolist())
+
+    def __getitem__(self, i):
+        return float(self.q[i]), float(self.x[i]), float(self.y[i])
+
+    def __array__(self, dtype=None, copy=None):
+        return self.como_array.astype(dtype) if dtype is not None else self.como_array
+
+    def __repr__(self):
+        return f"ConjuntoCargas({list(self)})"
+
+    @cached_property
+    def como_array(self):
+        """Array (N, 3) con columnas (q, x, y)."""
+        return np.column_stack((self.q, self.x, self.y))
+
+    @cached_property
+    def orden_x(self):
+        """Índices que ordenan las cargas por posición x (orden estable)."""
+        return np.argsort(self.x, kind='stable')
+
+    @cached_property
+    def ordenado_por_x(self):
+        """El mismo conjunto con las cargas ordenadas por x."""
+        orden = self.orden_x
+        return ConjuntoCargas(self.q[orden], self.x[orden], self.y[orden])
+
+    @cached_property
+    def caja(self):
+        """Caja que contiene a las cargas: (x_min, x_max, y_min, y_max)."""
+        return (float(self.x.min()), float(self.x.max()),
+                float(self.y.min()), float(self.y.max()))
+
+    @cached_property
+    def carga_total(self):
+        """Suma de las cargas [C]."""
+        return float(self.q.sum())
+
+    @cached_property
+    def momento_dipolar(self):
+        """Momento dipolar respecto del origen (px, py) [C·m]."""
+        return float(np.dot(self.q, self.x)), float(np.dot(self.q, self.y))
+
+    @cached_property
+    def huella(self):
+        """Hash (hex) de las cargas; sirve de clave para resultados guardados."""
+        h = hashlib.sha1()
+        for arr in (self.q, self.x, self.y):
+            h.update(arr.tobytes())
+        return h.hexdigest()
+
 def calcular_campo_electrico(carga, x_carga, y_carga, x_punto, y_punto):
     """
     Calcula el campo eléctrico debido a una carga puntual en un punto específico.
@@ -23,6 +115,12 @@ def calcular_campo_electrico(carga, x_carga, y_carga, x_punto, y_punto):
     
     Retorna: (Ex, Ey) componentes del campo eléctrico [N/C]
     """
+    compilado = nucleos.nucleo('campo_carga')
+    if compilado is not None:
+        # np.float64 como en el camino NumPy (inf en lugar de OverflowError)
+        Ex, Ey = compilado(carga, x_carga, y_carga, x_punto, y_punto)
+        return np.float64(Ex), np.float64(Ey)
+
     # Calcular la distancia entre la carga y el punto
     dx = x_punto - x_carga
     dy = y_punto - y_carga
@@ -50,6 +148,10 @@ def calcular_potencial_electrico(carga, x_carga, y_carga, x_punto, y_punto):
     
     Retorna: V - potencial eléctrico [V]
     """
+    compilado = nucleos.nucleo('potencial_carga')
+    if compilado is not None:
+        return np.float64(compilado(carga, x_carga, y_carga, x_punto, y_punto))
+
     # Calcular la distancia entre la carga y el punto
     dx = x_punto - x_carga
     dy = y_punto - y_carga
@@ -64,17 +166,29 @@ def calcular_potencial_electrico(carga, x_carga, y_carga, x_punto, y_punto):
     
     return V
 
-def calcular_potencial_total(cargas, x_punto, y_punto):
+def calcular_potencial_total(cargas, x_punto, y_punto, metodo='directo', **opciones_metodo):
     """
     Calcula el potencial eléctrico total en un punto debido a múltiples cargas.
     Aplica el principio de superposición.
     
     Parámetros:
-    - cargas: lista de tuplas [(carga1, x1, y1), (carga2, x2, y2), ...]
+    - cargas: lista de tuplas [(carga1, x1, y1), (carga2, x2, y2), ...] o ConjuntoCargas
     - x_punto, y_punto: punto donde se calcula el potencial [m]
+    - metodo, opciones_metodo: ver calcular_campo_y_potencial_lote
     
     Retorna: V_total - potencial eléctrico total [V]
     """
+    if metodo != 'directo':
+        _, _, _, _, V = calcular_campo_y_potencial_lote(cargas, x_punto, y_punto,
+                                                        metodo=metodo, **opciones_metodo)
+        return float(V)
+
+    compilado = nucleos.nucleo('potencial_total')
+    if compilado is not None:
+        cargas = ConjuntoCargas.desde(cargas)
+        return np.float64(compilado(cargas.q, cargas.x, cargas.y, float(x_punto),
+                                    float(y_punto)))
+
     V_total = 0.0
     distancia_minima = 1e-6  # Distancia mínima para evitar singularidades (1 micrómetro)
     
@@ -98,25 +212,38 @@ def calcular_potencial_total(cargas, x_punto, y_punto):
     
     return V_total
 
-def calcular_campo_total(cargas, x_punto, y_punto):
+def calcular_campo_total(cargas, x_punto, y_punto, metodo='directo', **opciones_metodo):
     """
     Calcula el campo eléctrico total en un punto debido a múltiples cargas.
     Aplica el principio de superposición.
     
     Parámetros:
-    - cargas: lista de tuplas [(carga1, x1, y1), (carga2, x2, y2), ...]
+    - cargas: lista de tuplas [(carga1, x1, y1), (carga2, x2, y2), ...] o ConjuntoCargas
     - x_punto, y_punto: punto donde se calcula el campo [m]
+    - metodo, opciones_metodo: ver calcular_campo_y_potencial_lote
     
     Retorna: (Ex_total, Ey_total, magnitud, angulo) 
     """
-    Ex_total = 0.0
-    Ey_total = 0.0
-    
-    # Aplicar principio de superposición
-    for carga, x_carga, y_carga in cargas:
-        Ex, Ey = calcular_campo_electrico(carga, x_carga, y_carga, x_punto, y_punto)
-        Ex_total += Ex
-        Ey_total += Ey
+    if metodo != 'directo':
+        Ex, Ey, magnitud, angulo, _ = calcular_campo_y_potencial_lote(cargas, x_punto, y_punto,
+                                                                      metodo=metodo, **opciones_metodo)
+        return float(Ex), float(Ey), float(magnitud), float(angulo)
+
+    compilado = nucleos.nucleo('campo_total')
+    if compilado is not None:
+        cargas = ConjuntoCargas.desde(cargas)
+        Ex_total, Ey_total = compilado(cargas.q, cargas.x, cargas.y, float(x_punto), float(y_punto))
+        # np.float64 como en el camino NumPy: Ex_total**2 da inf, no OverflowError
+        Ex_total, Ey_total = np.float64(Ex_total), np.float64(Ey_total)
+    else:
+        Ex_total = 0.0
+        Ey_total = 0.0
+
+        # Aplicar principio de superposición
+        for carga, x_carga, y_carga in cargas:
+            Ex, Ey = calcular_campo_electrico(carga, x_carga, y_carga, x_punto, y_punto)
+            Ex_total += Ex
+            Ey_total += Ey
     
     # Calcular magnitud y ángulo del campo total
     magnitud = np.sqrt(Ex_total**2 + Ey_total**2)
@@ -124,6 +251,74 @@ def calcular_campo_total(cargas, x_punto, y_punto):
     
     return Ex_total, Ey_total, magnitud, angulo
 
+def calcular_campo_y_potencial_lote(cargas, x_puntos, y_puntos, metodo='directo', theta=0.5,
+                                    orden=None, tolerancia=1e-6):
+    """
+    Calcula campo y potencial totales en muchos puntos a la vez (vectorizado).
+    Es la versión en lote de calcular_campo_total y calcular_potencial_total:
+    el bucle en Python recorre sólo las cargas, cada una sobre todos los puntos.
+
+    Respeta las mismas reglas en los puntos singulares:
+    - Campo: una carga que coincide con el punto no aporta (r == 0 -> 0).
+    - Potencial: r < distancia_minima se reemplaza por distancia_minima y,
+      si r == 0, el resultado es ±inf según el signo de la primera carga
+      que coincide con el punto.
+
+    Parámetros:
+    - cargas: ConjuntoCargas, lista de tuplas [(carga1, x1, y1), ...] o array (N, 3)
+    - x_puntos, y_puntos: arrays (o escalares) de cualquier forma compatible
+    - metodo: 'directo' (suma exacta), 'barnes_hut' (árbol) o 'fmm'
+      (multipolos rápidos); los dos últimos son para muchas cargas
+    - theta: ángulo de apertura para 'barnes_hut'
+    - orden, tolerancia: orden de la expansión y error buscado para 'fmm'
+
+    Retorna: (Ex, Ey, magnitud, angulo, V) arrays con la forma de los puntos
+    """
+    if metodo == 'barnes_hut':
+        from barnes_hut import evaluar_barnes_hut
+        return evaluar_barnes_hut(cargas, x_puntos, y_puntos, theta=theta)
+    elif metodo == 'fmm':
+        from fmm import evaluar_fmm
+        return evaluar_fmm(cargas, x_puntos, y_puntos, orden=orden, tolerancia=tolerancia)
+    elif metodo != 'directo':
+        raise ValueError(f"Método de evaluación desconocido: {metodo}")
+
+    x_puntos, y_puntos = np.broadcast_arrays(np.asarray(x_puntos, dtype=float),
+                                             np.asarray(y_puntos, dtype=float))
+    distancia_minima = 1e-6  # Misma distancia mínima que calcular_potencial_total
+
+    Ex_total = np.zeros(x_puntos.shape)
+    Ey_total = np.zeros(x_puntos.shape)
+    V_total = np.zeros(x_puntos.shape)
+    # Potencial en los puntos que coinciden con una carga (NaN = no coincide)
+    V_singular = np.full(x_puntos.shape, np.nan)
+
+    cargas = ConjuntoCargas.desde(cargas)
+    for carga, x_carga, y_carga in zip(cargas.q, cargas.x, cargas.y):
+        dx = x_puntos - x_carga
+        dy = y_puntos - y_carga
+        r = np.sqrt(dx**2 + dy**2)
+        coincide = r == 0
+
+        # Campo: E = k*q*(r_vec)/r³, sin aporte donde r == 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            factor = K * carga / (r**3)
+        factor = np.where(coincide, 0.0, factor)
+        Ex_total += factor * dx
+        Ey_total += factor * dy
+
+        # Potencial: V = k*q/r con distancia mínima
+        V_total += K * carga / np.maximum(r, distancia_minima)
+        pendiente = coincide & np.isnan(V_singular)
+        V_singular = np.where(pendiente, float('inf') if carga > 0 else float('-inf'), V_singular)
+
+    V_total = np.where(np.isnan(V_singular), V_total, V_singular)
+
+    magnitud = np.sqrt(Ex_total**2 + Ey_total**2)
+    angulo = np.degrees(np.arctan2(Ey_total, Ex_total))
+
+    return Ex_total, Ey_total, magnitud, angulo, V_total
+
 def parsear_coordenadas(coord_str):
     """
     Parsea una cadena de coordenadas como "1.5, 2.3" o "1.5 2.3"
@@ -185,115 +380,551 @@ def calcular_campo_x(carga, x_carga, y_carga, x_values):
     
     Retorna: array de valores Ex
     """
-    Ex_values = []
-    for x in x_values:
-        Ex, _ = calcular_campo_electrico(carga, x_carga, y_carga, x, 0.0)
-        Ex_values.append(Ex)
-    return np.array(Ex_values)
+    Ex_values, _, _, _, _ = calcular_campo_y_potencial_lote([(carga, x_carga, y_carga)],
+                                                           x_values, 0.0)
+    return Ex_values
 
-def encontrar_puntos_equilibrio(cargas, rango_x=(-5, 5)):
+def campo_en_eje(cargas, x_valores):
     """
-    Encuentra los puntos de equilibrio en el eje x donde E(x) = 0 analíticamente.
-    
-    Para 3 cargas, la ecuación es:
-    E(x) = k*q1*(x-x1)/|x-x1|³ + k*q2*(x-x2)/|x-x2|³ + k*q3*(x-x3)/|x-x3|³ = 0
-    
+    Calcula Ex y su derivada dEx/dx sobre el eje y = 0, vectorizado en x.
+
+    Ex(x)     = Σ k*qi*(x-xi)/ri³
+    dEx/dx(x) = Σ k*qi*(yi² - 2(x-xi)²)/ri⁵
+
+    Como en el resto del módulo, una carga a distancia r <= 1e-10 del punto
+    no aporta.
+
+    Parámetros:
+    - cargas: lista de tuplas [(carga1, x1, y1), ...] o ConjuntoCargas
+    - x_valores: array de posiciones sobre el eje x [m]
+
+    Retorna: (Ex, dEx_dx, escala) arrays con la forma de x_valores; escala es
+    la suma de los módulos de los términos de dEx/dx (sirve para decidir
+    cuándo la derivada es prácticamente nula)
+    """
+    cargas = ConjuntoCargas.desde(cargas)
+    x_valores = np.asarray(x_valores, dtype=float)
+    x_plano = x_valores.ravel()
+    Ex = np.empty(x_plano.size)
+    dEx = np.empty(x_plano.size)
+    escala = np.empty(x_plano.size)
+
+    # Bloques de puntos × cargas de ~64k elementos, para que entren en caché
+    tam = max(1, (1 << 16) // max(len(cargas), 1))
+    y2 = cargas.y**2
+    for i in range(0, x_plano.size, tam):
+        dx = x_plano[i:i + tam, None] - cargas.x
+        r2 = dx * dx + y2
+        no_aporta = r2 <= 1e-20  # r <= 1e-10
+        with np.errstate(divide='ignore', invalid='ignore'):
+            factor = K * cargas.q / (r2 * np.sqrt(r2))
+            factor[no_aporta] = 0.0
+            termino = factor * (y2 - 2 * dx * dx)
+            termino /= r2
+        termino[no_aporta] = 0.0
+        Ex[i:i + tam] = np.einsum('ij,ij->i', factor, dx)
+        dEx[i:i + tam] = termino.sum(axis=1)
+        escala[i:i + tam] = np.abs(termino, out=termino).sum(axis=1)
+
+    forma = x_valores.shape
+    return Ex.reshape(forma), dEx.reshape(forma), escala.reshape(forma)
+
+def potencial_en_eje(cargas, x_valores, y_fijo=0.0):
+    """
+    Calcula V sobre la recta y = y_fijo, vectorizado en x como campo_en_eje
+    (bloques de puntos × cargas en lugar de un bucle por carga).
+
+    Mismas reglas que calcular_campo_y_potencial_lote: r < 1e-6 se reemplaza
+    por 1e-6 y en un punto que coincide con una carga el resultado es ±inf
+    según el signo de la primera carga que coincide.
+
     Parámetros:
-    - cargas: lista de tuplas [(carga1, x1, y1), (carga2, x2, y2), ...]
+    - cargas: lista de tuplas [(carga1, x1, y1), ...] o ConjuntoCargas
+    - x_valores: array de posiciones sobre la recta [m]
+    - y_fijo: altura de la recta [m]
+
+    Retorna: array V con la forma de x_valores
+    """
+    cargas = ConjuntoCargas.desde(cargas)
+    x_valores = np.asarray(x_valores, dtype=float)
+    x_plano = x_valores.ravel()
+    V = np.empty(x_plano.size)
+
+    tam = max(1, (1 << 16) // max(len(cargas), 1))
+    dy2 = (y_fijo - cargas.y)**2
+    for i in range(0, x_plano.size, tam):
+        dx = x_plano[i:i + tam, None] - cargas.x
+        r = np.sqrt(dx * dx + dy2)
+        V[i:i + tam] = (K * cargas.q / np.maximum(r, 1e-6)).sum(axis=1)
+        coincide = r == 0
+        filas = np.flatnonzero(coincide.any(axis=1))
+        if filas.size:
+            primera = coincide[filas].argmax(axis=1)
+            V[i + filas] = np.where(cargas.q[primera] > 0, np.inf, -np.inf)
+
+    return V.reshape(x_valores.shape)
+
+def muestrear_campo_en_eje(cargas, rango_x=(-5, 5), limite=1e12, **opciones):
+    """
+    Ex sobre el eje y = 0 con muestreo adaptativo (ver muestreo.py): pocos
+    puntos donde el campo varía poco y muchos cerca de las cargas y de los
+    cambios de signo.
+
+    Parámetros:
+    - cargas: lista de tuplas [(carga1, x1, y1), ...] o ConjuntoCargas
+    - rango_x: tupla (min, max)
+    - limite: |Ex| a partir del cual se recorta [N/C]
+    - opciones: se pasan a muestreo.muestrear_linea (tolerancia, max_evaluaciones, ...)
+
+    Retorna: MuestreoLinea con x, Ex y los tramos recortados
+    """
+    from muestreo import muestrear_linea, puntos_alrededor
+    cargas = ConjuntoCargas.desde(cargas)
+    return muestrear_linea(
+        lambda x: campo_en_eje(cargas, x)[0], rango_x, limite,
+        singulares=cargas.x[cargas.y == 0],
+        puntos_extra=puntos_alrededor(cargas.x, rango_x, np.abs(cargas.y)),
+        **opciones)
+
+def _refinar_raices(cargas, a, b, Ea, iteraciones=60, xtol=1e-12):
+    """
+    Refina a la vez todos los intervalos [a, b] donde Ex cambia de signo,
+    con Newton (derivada analítica) protegido por bisección.
+
+    Retorna: (x_raiz, dEx_dx, escala) arrays, uno por intervalo
+    """
+    a = a.copy()
+    b = b.copy()
+    x = 0.5 * (a + b)
+    for _ in range(iteraciones):
+        Ex, dEx, _ = campo_en_eje(cargas, x)
+        # Achicar el intervalo conservando el cambio de signo
+        mismo_signo = np.sign(Ex) == np.sign(Ea)
+        a = np.where(mismo_signo, x, a)
+        Ea = np.where(mismo_signo, Ex, Ea)
+        b = np.where(mismo_signo, b, x)
+        # Paso de Newton; si se sale del intervalo, bisección
+        with np.errstate(divide='ignore', invalid='ignore'):
+            paso = Ex / dEx
+        x_nuevo = x - paso
+        fuera = ~((x_nuevo >= a) & (x_nuevo <= b))
+        tol = xtol * (1 + np.abs(x))
+        listo = (np.abs(paso) <= tol) | (b - a <= tol) | (Ex == 0)
+        # Si ya convergió, el último paso de Newton sólo se aplica si queda en el intervalo
+        x = np.where(fuera, np.where(listo, x, 0.5 * (a + b)), np.where(Ex == 0, x, x_nuevo))
+        if listo.all():
+            break
+
+    _, dEx, escala = campo_en_eje(cargas, x)
+    return x, dEx, escala
+
+def encontrar_puntos_equilibrio(cargas, rango_x=(-5, 5), muestras_por_intervalo=128,
+                                margen=0.01):
+    """
+    Encuentra los puntos de equilibrio en el eje x donde Ex(x) = 0, para
+    cualquier cantidad de cargas.
+
+    E(x) = Σ k*qi*(x-xi)/|ri|³ = 0
+
+    El eje se parte en intervalos entre las cargas que están sobre él (donde
+    Ex es singular). Cada intervalo se recorre con un muestreo denso (más
+    fino cerca de las cargas), todo a la vez; cada cambio de signo se refina
+    con Newton protegido por bisección, así que se encuentran también las
+    raíces que comparten intervalo. La estabilidad sale de la derivada
+    analítica dEx/dx en la raíz.
+
+    Parámetros:
+    - cargas: lista de tuplas [(carga1, x1, y1), (carga2, x2, y2), ...] o ConjuntoCargas
     - rango_x: tupla (x_min, x_max) para buscar puntos de equilibrio
-    
+    - muestras_por_intervalo: puntos del muestreo en cada intervalo
+    - margen: distancia a las cargas del eje que se excluye de la búsqueda [m]
+
     Retorna: lista de puntos de equilibrio [(x1, estabilidad1), (x2, estabilidad2), ...]
     """
-    puntos_equilibrio = []
-    
-    # Extraer información de las cargas
-    q = [carga[0] for carga in cargas]  # cargas
-    x_pos = [carga[1] for carga in cargas]  # posiciones x
-    y_pos = [carga[2] for carga in cargas]  # posiciones y
-    
-    # Ordenar cargas por posición x para análisis sistemático
-    datos_ordenados = sorted(zip(q, x_pos, y_pos), key=lambda item: item[1])
-    q_ord, x_ord, y_ord = zip(*datos_ordenados)
-    
-    def campo_en_x(x):
-        """Calcula E(x) en el punto x sobre el eje y=0"""
-        Ex_total = 0
-        for i in range(3):
-            dx = x - x_ord[i]
-            dy = 0 - y_ord[i]  # y = 0 en el eje x
-            r = np.sqrt(dx**2 + dy**2)
-            if r > 1e-10:  # Evitar división por cero
-                Ex_total += K * q_ord[i] * dx / (r**3)
-        return Ex_total
-    
-    # Buscar puntos de equilibrio en intervalos específicos
-    intervalos = [
-        (rango_x[0], x_ord[0] - 0.01),      # Antes de la primera carga
-        (x_ord[0] + 0.01, x_ord[1] - 0.01), # Entre primera y segunda carga
-        (x_ord[1] + 0.01, x_ord[2] - 0.01), # Entre segunda y tercera carga
-        (x_ord[2] + 0.01, rango_x[1])       # Después de la tercera carga
-    ]
-    
-    for x_min, x_max in intervalos:
-        if x_max <= x_min:
-            continue
-            
-        try:
-            # Evaluar el campo en los extremos del intervalo
-            E_min = campo_en_x(x_min)
-            E_max = campo_en_x(x_max)
-            
-            # Si hay cambio de signo, existe un punto de equilibrio
-            if E_min * E_max < 0:
-                x_eq = brentq(campo_en_x, x_min, x_max)
-                
-                # Verificar que el punto esté en el rango solicitado
-                if rango_x[0] <= x_eq <= rango_x[1]:
-                    # Analizar la estabilidad del punto de equilibrio
-                    estabilidad = analizar_estabilidad_equilibrio(cargas, x_eq)
-                    puntos_equilibrio.append((x_eq, estabilidad))
-                    
-        except (ValueError, RuntimeError):
-            # No hay raíz en este intervalo o error numérico
-            continue
-    
-    # Ordenar por posición x
-    puntos_equilibrio.sort(key=lambda p: p[0])
-    
-    return puntos_equilibrio
+    cargas = ConjuntoCargas.desde(cargas)
+    ordenadas = cargas.ordenado_por_x
+
+    # Las cargas sobre el eje (y = 0) dentro del rango limitan los intervalos
+    en_eje = ordenadas.x[(ordenadas.y == 0) &
+                         (ordenadas.x > rango_x[0]) & (ordenadas.x < rango_x[1])]
+    inicios = np.concatenate(([rango_x[0]], en_eje + margen))
+    fines = np.concatenate((en_eje - margen, [rango_x[1]]))
+    validos = fines > inicios
+    inicios, fines = inicios[validos], fines[validos]
+    if inicios.size == 0:
+        return []
+
+    # Muestreo de todos los intervalos en un solo array (intervalos, muestras)
+    t = 0.5 * (1 - np.cos(np.linspace(0, np.pi, muestras_por_intervalo)))
+    X = inicios[:, None] + (fines - inicios)[:, None] * t
+    E, dE, escala = campo_en_eje(ordenadas, X)
+
+    # Raíces justo sobre una muestra y cambios de signo entre muestras vecinas
+    nulas = E == 0
+    cambio = E[:, :-1] * E[:, 1:] < 0
+    raices = [X[nulas]]
+    derivadas = [dE[nulas]]
+    escalas = [escala[nulas]]
+    if cambio.any():
+        i, j = np.nonzero(cambio)
+        x_raiz, d_raiz, e_raiz = _refinar_raices(ordenadas, X[i, j], X[i, j + 1], E[i, j])
+        raices.append(x_raiz)
+        derivadas.append(d_raiz)
+        escalas.append(e_raiz)
+
+    raices = np.concatenate(raices)
+    derivadas = np.concatenate(derivadas)
+    escalas = np.concatenate(escalas)
+
+    estabilidad = _clasificar_estabilidad(derivadas, escalas)
+
+    orden = np.argsort(raices)
+    return [(float(raices[k]), str(estabilidad[k])) for k in orden]
+
+def _clasificar_estabilidad(dEx_dx, escala):
+    """
+    Estabilidad (para una carga de prueba positiva) según el signo de dEx/dx:
+    si es negativo el campo empuja de vuelta hacia el punto.
+    """
+    neutral = np.abs(dEx_dx) <= 1e-9 * escala
+    return np.where(neutral, 'neutral', np.where(dEx_dx < 0, 'estable', 'inestable'))
 
-def analizar_estabilidad_equilibrio(cargas, x_eq, delta=1e-4):
+def analizar_estabilidad_equilibrio(cargas, x_eq):
     """
-    Analiza la estabilidad de un punto de equilibrio.
+    Analiza la estabilidad de un punto de equilibrio sobre el eje x usando
+    la derivada analítica dEx/dx.
     
     Parámetros:
-    - cargas: lista de cargas
+    - cargas: lista de cargas o ConjuntoCargas
     - x_eq: posición x del punto de equilibrio
-    - delta: pequeño desplazamiento para analizar estabilidad
     
     Retorna: 'estable', 'inestable' o 'neutral'
     """
-    # Calcular campo a la izquierda y derecha del punto de equilibrio
-    Ex_izq, _, _, _ = calcular_campo_total(cargas, x_eq - delta, 0.0)
-    Ex_der, _, _, _ = calcular_campo_total(cargas, x_eq + delta, 0.0)
-    
-    # Si el campo apunta hacia el punto de equilibrio desde ambos lados, es estable
-    if Ex_izq > 0 and Ex_der < 0:
-        return 'estable'
-    elif Ex_izq < 0 and Ex_der > 0:
-        return 'inestable'
-    else:
-        return 'neutral'
+    _, dEx, escala = campo_en_eje(cargas, x_eq)
+    return str(_clasificar_estabilidad(dEx, escala))
+
+def campo_y_jacobiano(cargas, x_puntos, y_puntos):
+    """
+    Calcula el campo y su jacobiano en muchos puntos del plano (vectorizado).
+
+    Para cada carga, con (dx, dy) = punto - carga:
+    dEx/dx = k*q*(r² - 3dx²)/r⁵,  dEx/dy = dEy/dx = -3k*q*dx*dy/r⁵,
+    dEy/dy = k*q*(r² - 3dy²)/r⁵
+
+    El jacobiano de E es menos la hessiana del potencial. Una carga que
+    coincide con el punto no aporta, como en calcular_campo_total.
+
+    Parámetros:
+    - cargas: lista de tuplas [(carga1, x1, y1), ...] o ConjuntoCargas
+    - x_puntos, y_puntos: arrays de posiciones [m] (misma forma)
+
+    Retorna: (Ex, Ey, dEx_dx, dEx_dy, dEy_dy, escala) arrays con la forma de
+    los puntos; escala es Σ k*|q|/r², la magnitud típica del campo en el punto
+    """
+    cargas = ConjuntoCargas.desde(cargas)
+    x_puntos, y_puntos = np.broadcast_arrays(np.asarray(x_puntos, dtype=float),
+                                             np.asarray(y_puntos, dtype=float))
+    forma = x_puntos.shape
+    px = x_puntos.ravel()
+    py = y_puntos.ravel()
+    salidas = [np.empty(px.size) for _ in range(6)]
+
+    # Bloques de puntos × cargas de ~64k elementos, como en campo_en_eje
+    tam = max(1, (1 << 16) // max(len(cargas), 1))
+    for i in range(0, px.size, tam):
+        dx = px[i:i + tam, None] - cargas.x
+        dy = py[i:i + tam, None] - cargas.y
+        r2 = dx * dx + dy * dy
+        coincide = r2 == 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            kq_r2 = K * cargas.q / r2
+            kq_r3 = kq_r2 / np.sqrt(r2)
+            kq_r5 = kq_r3 / r2
+        for arr in (kq_r2, kq_r3, kq_r5):
+            arr[coincide] = 0.0
+        bloque = (
+            np.einsum('ij,ij->i', kq_r3, dx),
+            np.einsum('ij,ij->i', kq_r3, dy),
+            (kq_r5 * (r2 - 3 * dx * dx)).sum(axis=1),
+            (-3 * kq_r5 * dx * dy).sum(axis=1),
+            (kq_r5 * (r2 - 3 * dy * dy)).sum(axis=1),
+            np.abs(kq_r2).sum(axis=1),
+        )
+        for salida, valor in zip(salidas, bloque):
+            salida[i:i + tam] = valor
+
+    return tuple(salida.reshape(forma) for salida in salidas)
+
+def encontrar_equilibrios_plano(cargas, rango=(-5, 5), rango_y=None, semillas=24,
+                                max_iter=60, tolerancia=1e-10):
+    """
+    Encuentra los puntos del plano donde Ex = Ey = 0 dentro de una región.
+
+    Arranca Newton (con el jacobiano analítico de E) desde una grilla de
+    semillas, todas a la vez; el paso se limita para que una semilla no salte
+    lejos donde el campo es casi nulo. Las semillas que caen sobre una carga
+    o salen de la región se descartan y las raíces repetidas se unifican.
+
+    Cada punto se clasifica con los autovalores de la hessiana del potencial
+    (para una carga de prueba positiva): 'minimo' (ambos positivos),
+    'maximo' (ambos negativos), 'silla' (signos opuestos) o 'degenerado'
+    (ambos prácticamente nulos). Las cargas son puntuales en 3D, así que un
+    'minimo' en el plano sigue siendo inestable fuera de él (Earnshaw).
+
+    Parámetros:
+    - cargas: lista de tuplas [(carga1, x1, y1), ...] o ConjuntoCargas
+    - rango: tupla (min, max) del eje x (y también del eje y si no hay rango_y)
+    - rango_y: tupla (min, max) del eje y
+    - semillas: semillas por lado de la grilla
+    - max_iter: iteraciones de Newton
+    - tolerancia: paso final admitido, relativo al tamaño de la región
+
+    Retorna: lista de (x, y, tipo, (autovalor1, autovalor2)) ordenada por x
+    """
+    cargas = ConjuntoCargas.desde(cargas)
+    rango_y = rango if rango_y is None else rango_y
+    escala = max(rango[1] - rango[0], rango_y[1] - rango_y[0])
+    if len(cargas) == 0:
+        return []
+
+    # Grilla de semillas corrida medio paso para no caer sobre las cargas
+    sx = np.linspace(rango[0], rango[1], semillas + 1)
+    sy = np.linspace(rango_y[0], rango_y[1], semillas + 1)
+    X, Y = np.meshgrid(0.5 * (sx[1:] + sx[:-1]), 0.5 * (sy[1:] + sy[:-1]))
+    x = X.ravel()
+    y = Y.ravel()
+
+    paso_max = escala / (2 * semillas)
+    convergio = np.zeros(x.size, dtype=bool)
+    activas = np.ones(x.size, dtype=bool)
+
+    for _ in range(max_iter):
+        idx = np.nonzero(activas)[0]
+        if idx.size == 0:
+            break
+        Ex, Ey, Jxx, Jxy, Jyy, _ = campo_y_jacobiano(cargas, x[idx], y[idx])
+        det = Jxx * Jyy - Jxy * Jxy
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dx = -(Jyy * Ex - Jxy * Ey) / det
+            dy = -(Jxx * Ey - Jxy * Ex) / det
+        paso = np.hypot(dx, dy)
+        valido = np.isfinite(paso) & (det != 0)
+        with np.errstate(divide='ignore'):
+            reduccion = np.where(valido & (paso > paso_max), paso_max / paso, 1.0)
+        x[idx] += np.where(valido, dx * reduccion, 0.0)
+        y[idx] += np.where(valido, dy * reduccion, 0.0)
+
+        listo = valido & (paso <= tolerancia * escala)
+        fuera = ((x[idx] < rango[0]) | (x[idx] > rango[1]) |
+                 (y[idx] < rango_y[0]) | (y[idx] > rango_y[1]))
+        convergio[idx[listo & ~fuera]] = True
+        activas[idx[listo | fuera | ~valido]] = False
+
+    # Confirmar que el campo sea prácticamente nulo y no estar sobre una carga
+    x, y = x[convergio], y[convergio]
+    if x.size == 0:
+        return []
+    Ex, Ey, Jxx, Jxy, Jyy, campo_tipico = campo_y_jacobiano(cargas, x, y)
+    d2 = (x[:, None] - cargas.x)**2 + (y[:, None] - cargas.y)**2
+    valido = ((np.hypot(Ex, Ey) <= 1e-6 * campo_tipico) &
+              (d2.min(axis=1) > (1e-6 * escala)**2))
+    # Escala típica de la hessiana: Σ k*|q|/r³
+    hessiana_tipica = (K * np.abs(cargas.q) / (d2 * np.sqrt(d2))).sum(axis=1)
+    x, y, Jxx, Jxy, Jyy, hessiana_tipica = (a[valido] for a in (x, y, Jxx, Jxy, Jyy,
+                                                                  hessiana_tipica))
+
+    # Unificar raíces repetidas (a menos de 1e-6 del tamaño de la región)
+    radio = 1e-6 * escala
+    elegidos = []
+    for i in np.lexsort((y, x)):
+        if all((x[i] - x[j])**2 + (y[i] - y[j])**2 > radio**2 for j in elegidos):
+            elegidos.append(i)
+
+    resultados = []
+    for i in elegidos:
+        # Hessiana de V = -jacobiano de E
+        autovalores = np.linalg.eigvalsh(-np.array([[Jxx[i], Jxy[i]], [Jxy[i], Jyy[i]]]))
+        umbral = 1e-9 * hessiana_tipica[i]
+        if np.abs(autovalores).max() <= umbral:
+            tipo = 'degenerado'
+        elif autovalores[0] > umbral:
+            tipo = 'minimo'
+        elif autovalores[1] < -umbral:
+            tipo = 'maximo'
+        else:
+            tipo = 'silla'
+        resultados.append((float(x[i]), float(y[i]), tipo, tuple(float(v) for v in autovalores)))
+
+    return resultados
+
+def _pyplot():
+    """
+    Importa matplotlib.pyplot la primera vez que se grafica, así las funciones
+    numéricas del módulo se pueden usar sin cargar matplotlib.
+
+    Los gráficos sólo se guardan o se entregan en memoria, así que si pyplot
+    no estaba importado se elige el backend Agg (sin ventanas, sirve sin
+    pantalla y en hilos de trabajo).
+
+    Retorna: el módulo matplotlib.pyplot
+    """
+    if 'matplotlib.pyplot' not in sys.modules:
+        import matplotlib
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+def directorio_graficos(directorio=None):
+    """
+    Carpeta donde se guardan los gráficos (se crea si no existe).
+
+    Parámetros:
+    - directorio: carpeta elegida; por defecto graphics/ en la raíz del proyecto
+
+    Retorna: ruta de la carpeta
+    """
+    if directorio is None:
+        directorio = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  'graphics')
+    os.makedirs(directorio, exist_ok=True)
+    return directorio
+
+class ImagenRenderizada:
+    """
+    Figura ya dibujada en memoria (píxeles RGBA del canvas Agg), para
+    mostrarla sin pasar por un PNG en disco. El PNG se puede escribir después
+    en un hilo aparte, sin volver a dibujar la figura.
+
+    Parámetros:
+    - rgba: array (alto, ancho, 4) de uint8
+    - dpi: resolución con que se dibujó
+    """
+
+    def __init__(self, rgba, dpi=None):
+        self.rgba = rgba
+        self.dpi = dpi
+        self.ruta = None
+        self._hilo = None
+
+    def __repr__(self):
+        ubicacion = self.ruta if self.ruta else 'en memoria'
+        return f'<ImagenRenderizada {self.ancho}x{self.alto} {ubicacion}>'
+
+    @property
+    def ancho(self):
+        return self.rgba.shape[1]
+
+    @property
+    def alto(self):
+        return self.rgba.shape[0]
+
+    def guardar(self, ruta):
+        """
+        Escribe la imagen como PNG.
+
+        Retorna: ruta del archivo
+        """
+        from PIL import Image
+        opciones = {'dpi': (self.dpi, self.dpi)} if self.dpi else {}
+        Image.fromarray(self.rgba, 'RGBA').save(ruta, **opciones)
+        self.ruta = ruta
+        return ruta
+
+    def guardar_en_segundo_plano(self, ruta):
+        """Escribe el PNG en un hilo aparte; esperar() espera a que termine."""
+        import threading
+        self._hilo = threading.Thread(target=self.guardar, args=(ruta,), daemon=True)
+        self._hilo.start()
+
+    def esperar(self, timeout=None):
+        """
+        Espera a que termine el guardado en segundo plano (si hay uno).
+
+        Retorna: ruta del PNG, o None si todavía no se guardó
+        """
+        if self._hilo is not None:
+            self._hilo.join(timeout)
+        return self.ruta
+
+def _rgba_figura(fig, dpi, margen=0.1):
+    """
+    Dibuja la figura con el canvas Agg y la recorta como bbox_inches='tight'.
+
+    Retorna: array (alto, ancho, 4) de uint8
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    fig.set_dpi(dpi)
+    canvas = FigureCanvasAgg(fig)
+    canvas.draw()
+    rgba = np.asarray(canvas.buffer_rgba())
+
+    # Caja ajustada en pulgadas (origen abajo a la izquierda) -> filas y columnas
+    caja = fig.get_tightbbox(canvas.get_renderer()).padded(margen)
+    alto, ancho = rgba.shape[:2]
+    col0 = max(int(np.floor(caja.x0 * dpi)), 0)
+    col1 = min(int(np.ceil(caja.x1 * dpi)), ancho)
+    fila0 = max(alto - int(np.ceil(caja.y1 * dpi)), 0)
+    fila1 = min(alto - int(np.floor(caja.y0 * dpi)), alto)
+    return rgba[fila0:fila1, col0:col1].copy()
+
+def _entregar_figura(fig, directorio, nombre_archivo, dpi, en_memoria=False, guardar_png=True):
+    """
+    Guarda la figura como PNG o la entrega dibujada en memoria, y la cierra.
+
+    Parámetros:
+    - fig: figura de matplotlib
+    - directorio: carpeta del PNG (por defecto graphics/)
+    - nombre_archivo: nombre del PNG
+    - dpi: resolución
+    - en_memoria: si es True se devuelve una ImagenRenderizada en vez de la ruta
+    - guardar_png: con en_memoria, si además se escribe el PNG en segundo plano
+
+    Retorna: ruta del PNG, o ImagenRenderizada si en_memoria
+    """
+    plt = _pyplot()
+    if not en_memoria:
+        filepath = os.path.join(directorio_graficos(directorio), nombre_archivo)
+        with etapa('savefig'):
+            fig.savefig(filepath, dpi=dpi, bbox_inches='tight')
+        plt.close(fig)
+        return filepath
+
+    with etapa('rasterizado'):
+        imagen = ImagenRenderizada(_rgba_figura(fig, dpi), dpi=dpi)
+    plt.close(fig)
+    if guardar_png:
+        imagen.guardar_en_segundo_plano(os.path.join(directorio_graficos(directorio),
+                                                     nombre_archivo))
+    return imagen
+
+def _sombrear_recortes(ax, recortes, etiqueta):
+    """Sombrea los tramos de x donde la curva se recortó (una etiqueta para todos)."""
+    for i, (inicio, fin) in enumerate(recortes):
+        ax.axvspan(inicio, fin, color='gray', alpha=0.2, linewidth=0,
+                   label=etiqueta if i == 0 else None)
 
 def graficar_campo_electrico(cargas, x_punto, y_punto, rango_x=(-5, 5), num_puntos=1000,
-                             rango_y=(-1e12, 1e12)):
+                             rango_y=(-1e12, 1e12), directorio=None, en_memoria=False,
+                             guardar_png=True, adaptativo=True):
     """
     Gráfico de E(x) vs x con escala Y fija (manual), 
     curvas sólidas y líneas punteadas en la posición de las cargas.
+    Se guarda en directorio (por defecto graphics/).
+    Con en_memoria=True el gráfico se devuelve como ImagenRenderizada y el PNG
+    se escribe en segundo plano (o no se escribe, con guardar_png=False).
+    Con adaptativo=True las curvas se muestrean con muestrear_campo_en_eje
+    (num_puntos no se usa), recortadas a la escala Y, y los tramos recortados
+    del campo total se sombrean.
+
+    Retorna: (ruta del PNG o ImagenRenderizada, puntos de equilibrio)
     """
 
+    plt = _pyplot()
     x_values = np.linspace(rango_x[0], rango_x[1], num_puntos)
-    puntos_equilibrio = encontrar_puntos_equilibrio(cargas, rango_x)
+    limite = max(abs(rango_y[0]), abs(rango_y[1]))
+    with etapa('equilibrios'):
+        puntos_equilibrio = encontrar_puntos_equilibrio(cargas, rango_x)
 
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 8))
     fig.suptitle('Campo Eléctrico E(x) vs x - Análisis de Equilibrio',
@@ -304,17 +935,23 @@ def graficar_campo_electrico(cargas, x_punto, y_punto, rango_x=(-5, 5), num_punt
     # ---------- Subplot 1: Cargas individuales ----------
     ax1.set_title('Cargas Individuales')
     for i, (carga, x_carga, y_carga) in enumerate(cargas):
-        Ex_values = calcular_campo_x(carga, x_carga, y_carga, x_values)
+        if adaptativo:
+            with etapa('muestreo'):
+                muestreo = muestrear_campo_en_eje([(carga, x_carga, y_carga)], rango_x, limite)
+            x_curva, Ex_values = muestreo.x, muestreo.con_huecos()
+        else:
+            x_curva = x_values
+            Ex_values = calcular_campo_x(carga, x_carga, y_carga, x_values)
 
-        # cortar singularidades (para que no aparezcan paredes verticales)
-        Ex_values = np.array(Ex_values, dtype=float)
-        Ex_values[np.abs(Ex_values) > 1e12] = np.nan
+            # cortar singularidades (para que no aparezcan paredes verticales)
+            Ex_values = np.array(Ex_values, dtype=float)
+            Ex_values[np.abs(Ex_values) > 1e12] = np.nan
 
-        ax1.plot(x_values, Ex_values, color=colors[i], linewidth=2,
+        ax1.plot(x_curva, Ex_values, color=colors[i % len(colors)], linewidth=2,
                  label=f'Carga {i+1}: q={carga:.1e} C en ({x_carga}, {y_carga})')
 
         # línea vertical punteada en la posición de la carga
-        ax1.axvline(x=x_carga, color=colors[i],
+        ax1.axvline(x=x_carga, color=colors[i % len(colors)],
                     linestyle=(0, (2, 2)), linewidth=1.2, alpha=0.8)
 
     ax1.set_xlabel('x [m]')
@@ -327,14 +964,17 @@ def graficar_campo_electrico(cargas, x_punto, y_punto, rango_x=(-5, 5), num_punt
     # ---------- Subplot 2: Superposición ----------
     ax2.set_title('Superposición - Puntos de Equilibrio')
 
-    Ex_total_values = np.zeros_like(x_values)
-    for idx, x_val in enumerate(x_values):
-        Ex_total, _, _, _ = calcular_campo_total(cargas, x_val, 0.0)
-        Ex_total_values[idx] = Ex_total
+    if adaptativo:
+        with etapa('muestreo'):
+            muestreo = muestrear_campo_en_eje(cargas, rango_x, limite)
+        x_values, Ex_total_values = muestreo.x, muestreo.con_huecos()
+        _sombrear_recortes(ax2, muestreo.recortes, f'Recortado (|Ex| > {limite:.0e} N/C)')
+    else:
+        Ex_total_values, _, _, _, _ = calcular_campo_y_potencial_lote(cargas, x_values, 0.0)
 
-    # cortar singularidades
-    Ex_total_values = np.array(Ex_total_values, dtype=float)
-    Ex_total_values[np.abs(Ex_total_values) > 1e12] = np.nan
+        # cortar singularidades
+        Ex_total_values = np.array(Ex_total_values, dtype=float)
+        Ex_total_values[np.abs(Ex_total_values) > 1e12] = np.nan
 
     ax2.plot(x_values, Ex_total_values, color='purple', linewidth=2.5,
              alpha=0.8, label='Campo Total')
@@ -368,122 +1008,83 @@ def graficar_campo_electrico(cargas, x_punto, y_punto, rango_x=(-5, 5), num_punt
 
     # líneas verticales punteadas de las cargas
     for i, (_, x_carga, _) in enumerate(cargas):
-        ax2.axvline(x=x_carga, color=colors[i],
+        ax2.axvline(x=x_carga, color=colors[i % len(colors)],
                     linestyle=(0, (2, 2)), linewidth=1.2, alpha=0.8)
 
     plt.tight_layout(rect=[0, 0, 1, 0.95])
 
-    graphics_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'graphics')
-    os.makedirs(graphics_dir, exist_ok=True)
-
-    filepath = os.path.join(graphics_dir, 'campo_electrico_vs_x.png')
-    plt.savefig(filepath, dpi=150, bbox_inches='tight')
-    plt.close()
-
-    return filepath, puntos_equilibrio
+    imagen = _entregar_figura(fig, directorio, 'campo_electrico_vs_x.png', 150,
+                              en_memoria, guardar_png)
+    return imagen, puntos_equilibrio
 
 
 
 
 
-def graficar_lineas_campo(cargas, x_punto, y_punto, rango=(-3, 3), resolucion=20):
+def graficar_lineas_campo(cargas, x_punto, y_punto, rango=(-3, 3), resolucion=20,
+                          directorio=None, en_memoria=False, guardar_png=True):
     """
     Genera el gráfico de líneas de campo eléctrico resultante.
     
     Parámetros:
-    - cargas: lista de tuplas [(carga1, x1, y1), (carga2, x2, y2), ...]
+    - cargas: lista de tuplas [(carga1, x1, y1), (carga2, x2, y2), ...] o ConjuntoCargas
     - x_punto, y_punto: punto donde se calculó el campo
     - rango: tupla (min, max) para el rango del gráfico
     - resolucion: número de puntos de inicio para líneas de campo
+    - directorio: carpeta donde guardar el gráfico (por defecto graphics/)
+    - en_memoria: devolver la figura como ImagenRenderizada en vez de la ruta
+    - guardar_png: con en_memoria, si además se escribe el PNG en segundo plano
     
-    Retorna: path del archivo guardado
+    Retorna: path del archivo guardado, o ImagenRenderizada si en_memoria
     """
+    plt = _pyplot()
+    from lineas_campo import trazar_lineas_cacheado
+
+    cargas = ConjuntoCargas.desde(cargas)
     fig, ax = plt.subplots(figsize=(12, 10))
     
-    def campo_en_punto(x, y):
-        """Calcula las componentes del campo eléctrico en un punto"""
-        Ex, Ey, _, _ = calcular_campo_total(cargas, x, y)
-        return Ex, Ey
-    
-    def ecuacion_linea_campo(r, t):
-        """Ecuación diferencial para las líneas de campo"""
-        x, y = r
-        Ex, Ey = campo_en_punto(x, y)
-        magnitud = np.sqrt(Ex**2 + Ey**2)
-        if magnitud == 0:
-            return [0, 0]
-        return [Ex/magnitud, Ey/magnitud]
-    
-    # Generar grid de puntos iniciales para las líneas de campo
+    # Generar puntos iniciales para las líneas de campo
     n_lineas = resolucion
+    angulos = np.linspace(0, 2*np.pi, n_lineas, endpoint=False)
+    semillas = {1: ([], []), -1: ([], [])}
     
-    # Para cada carga positiva, generar líneas radiales hacia afuera
     for q, x_carga, y_carga in cargas:
-        if q > 0:  # Carga positiva - líneas salen
-            angulos = np.linspace(0, 2*np.pi, n_lineas, endpoint=False)
-            for angulo in angulos:
-                # Punto inicial cercano a la carga
-                x_inicio = x_carga + 0.05 * np.cos(angulo)
-                y_inicio = y_carga + 0.05 * np.sin(angulo)
-                
-                # Integrar hacia adelante
-                t = np.linspace(0, 2, 200)
-                try:
-                    trayectoria = odeint(ecuacion_linea_campo, [x_inicio, y_inicio], t)
-                    x_traj, y_traj = trayectoria[:, 0], trayectoria[:, 1]
-                    
-                    # Filtrar puntos dentro del rango
-                    mask = (x_traj >= rango[0]) & (x_traj <= rango[1]) & \
-                           (y_traj >= rango[0]) & (y_traj <= rango[1])
-                    
-                    if np.any(mask):
-                        ax.plot(x_traj[mask], y_traj[mask], 'b-', alpha=0.6, linewidth=0.8)
-                        
-                        # Agregar flechas para indicar dirección
-                        if len(x_traj[mask]) > 10:
-                            idx_medio = len(x_traj[mask]) // 2
-                            dx = x_traj[mask][idx_medio+1] - x_traj[mask][idx_medio-1]
-                            dy = y_traj[mask][idx_medio+1] - y_traj[mask][idx_medio-1]
-                            ax.arrow(x_traj[mask][idx_medio], y_traj[mask][idx_medio], 
-                                   dx*0.1, dy*0.1, head_width=0.05, head_length=0.05, 
-                                   fc='blue', ec='blue', alpha=0.8)
-                except:
-                    continue
-        
-        else:  # Carga negativa - líneas entran
-            angulos = np.linspace(0, 2*np.pi, n_lineas, endpoint=False)
-            for angulo in angulos:
-                # Punto inicial alejado de la carga
-                x_inicio = x_carga + 1.5 * np.cos(angulo)
-                y_inicio = y_carga + 1.5 * np.sin(angulo)
-                
-                # Verificar que el punto esté en el rango
-                if not (rango[0] <= x_inicio <= rango[1] and rango[0] <= y_inicio <= rango[1]):
-                    continue
+        if q > 0:  # Carga positiva - líneas salen desde cerca de la carga
+            semillas[1][0].extend(x_carga + 0.05 * np.cos(angulos))
+            semillas[1][1].extend(y_carga + 0.05 * np.sin(angulos))
+        else:  # Carga negativa - líneas entran, desde un punto alejado
+            x_inicio = x_carga + 1.5 * np.cos(angulos)
+            y_inicio = y_carga + 1.5 * np.sin(angulos)
+            
+            # Sólo los puntos iniciales dentro del rango
+            dentro = (rango[0] <= x_inicio) & (x_inicio <= rango[1]) & \
+                     (rango[0] <= y_inicio) & (y_inicio <= rango[1])
+            semillas[-1][0].extend(x_inicio[dentro])
+            semillas[-1][1].extend(y_inicio[dentro])
+    
+    # Todas las líneas de un mismo sentido se integran juntas; cada una
+    # termina al salir del rango, llegar a una carga o en un punto de equilibrio.
+    # Sólo dependen de las cargas: si no cambiaron, salen del caché.
+    for sentido, color in ((1, 'blue'), (-1, 'red')):
+        with etapa('trazado_lineas'):
+            trayectorias = trazar_lineas_cacheado(cargas, *semillas[sentido], dominio=rango,
+                                                  sentido=sentido)
+        for x_traj, y_traj in trayectorias:
+            # Filtrar puntos dentro del rango
+            mask = (x_traj >= rango[0]) & (x_traj <= rango[1]) & \
+                   (y_traj >= rango[0]) & (y_traj <= rango[1])
+            
+            if np.any(mask):
+                ax.plot(x_traj[mask], y_traj[mask], color[0] + '-', alpha=0.6, linewidth=0.8)
                 
-                # Integrar hacia atrás (hacia la carga negativa)
-                t = np.linspace(0, -2, 200)
-                try:
-                    trayectoria = odeint(ecuacion_linea_campo, [x_inicio, y_inicio], t)
-                    x_traj, y_traj = trayectoria[:, 0], trayectoria[:, 1]
-                    
-                    # Filtrar puntos dentro del rango
-                    mask = (x_traj >= rango[0]) & (x_traj <= rango[1]) & \
-                           (y_traj >= rango[0]) & (y_traj <= rango[1])
-                    
-                    if np.any(mask):
-                        ax.plot(x_traj[mask], y_traj[mask], 'r-', alpha=0.6, linewidth=0.8)
-                        
-                        # Agregar flechas para indicar dirección
-                        if len(x_traj[mask]) > 10:
-                            idx_medio = len(x_traj[mask]) // 2
-                            dx = x_traj[mask][idx_medio+1] - x_traj[mask][idx_medio-1]
-                            dy = y_traj[mask][idx_medio+1] - y_traj[mask][idx_medio-1]
-                            ax.arrow(x_traj[mask][idx_medio], y_traj[mask][idx_medio], 
-                                   dx*0.1, dy*0.1, head_width=0.05, head_length=0.05, 
-                                   fc='red', ec='red', alpha=0.8)
-                except:
-                    continue
+                # Agregar flechas para indicar dirección
+                if len(x_traj[mask]) > 10:
+                    idx_medio = len(x_traj[mask]) // 2
+                    dx = x_traj[mask][idx_medio+1] - x_traj[mask][idx_medio-1]
+                    dy = y_traj[mask][idx_medio+1] - y_traj[mask][idx_medio-1]
+                    ax.arrow(x_traj[mask][idx_medio], y_traj[mask][idx_medio], 
+                           dx*0.1, dy*0.1, head_width=0.05, head_length=0.05, 
+                           fc=color, ec=color, alpha=0.8)
     
     # Marcar las cargas
     for i, (q, x_carga, y_carga) in enumerate(cargas):
@@ -494,6 +1095,10 @@ def graficar_lineas_campo(cargas, x_punto, y_punto, rango=(-3, 3), resolucion=20
         ax.text(x_carga, y_carga + 0.2, f'q{i+1}={q:.1e}C', ha='center', va='bottom', fontsize=10, 
                 bbox=dict(boxstyle="round,pad=0.3", facecolor=color, alpha=0.3))
     
+    # Marcar los puntos de equilibrio (E = 0) del plano
+    for x_eq, y_eq, _, _ in encontrar_equilibrios_plano(cargas, rango):
+        ax.plot(x_eq, y_eq, 'x', color='green', markersize=10, markeredgewidth=2)
+    
     # Marcar el punto de cálculo
     if rango[0] <= x_punto <= rango[1] and rango[0] <= y_punto <= rango[1]:
         ax.plot(x_punto, y_punto, 'ko', markersize=8, markeredgecolor='yellow', linewidth=2)
@@ -516,71 +1121,103 @@ def graficar_lineas_campo(cargas, x_punto, y_punto, rango=(-3, 3), resolucion=20
         Line2D([0], [0], color='red', lw=2, label='Líneas hacia cargas negativas'),
         Line2D([0], [0], marker='o', color='red', lw=0, markersize=8, label='Carga positiva'),
         Line2D([0], [0], marker='o', color='blue', lw=0, markersize=8, label='Carga negativa'),
-        Line2D([0], [0], marker='o', color='black', lw=0, markersize=8, label='Punto de cálculo')
+        Line2D([0], [0], marker='o', color='black', lw=0, markersize=8, label='Punto de cálculo'),
+        Line2D([0], [0], marker='x', color='green', lw=0, markersize=8, markeredgewidth=2,
+               label='Punto de equilibrio (E = 0)')
     ]
     ax.legend(handles=legend_elements, loc='upper right', bbox_to_anchor=(1, 1))
 
     plt.tight_layout()
 
-    # Crear ruta absoluta para el directorio de gráficos
-    project_root = os.path.dirname(os.path.dirname(__file__))
-    graphics_dir = os.path.join(project_root, 'graphics')
-    os.makedirs(graphics_dir, exist_ok=True)
-
     # Guardar la figura
-    filename = 'lineas_campo.png'
-    filepath = os.path.join(graphics_dir, filename)
-    plt.tight_layout()
-    plt.savefig(filepath, dpi=300, bbox_inches='tight')
-    plt.close()
-
-    return filepath
-
-def graficar_superficies_equipotenciales(cargas, rango=(-5, 5), num_puntos=100, niveles=20):
+    return _entregar_figura(fig, directorio, 'lineas_campo.png', 300, en_memoria, guardar_png)
+
+def graficar_superficies_equipotenciales(cargas, rango=(-5, 5), num_puntos=100, niveles=20,
+                                         directorio_malla=None, max_lado_grafico=1000,
+                                         metodo='directo', directorio=None, en_memoria=False,
+                                         guardar_png=True, adaptativo=False, nivel_max=11,
+                                         tolerancia_posicion=1e-4, incremental=False,
+                                         **opciones_metodo):
     """
     Genera un gráfico de contorno que representa las superficies equipotenciales.
 
     Parámetros:
-    - cargas: lista de tuplas [(carga1, x1, y1), (carga2, x2, y2), ...]
+    - cargas: lista de tuplas [(carga1, x1, y1), (carga2, x2, y2), ...] o ConjuntoCargas
     - rango: tupla (min, max) para el rango del gráfico en ambos ejes
     - num_puntos: número de puntos en cada dirección para la malla
     - niveles: número de curvas de nivel a mostrar
-
-    Retorna: path del archivo guardado
+    - directorio_malla: si se indica, la malla se calcula por bloques en archivos
+      np.memmap dentro de ese directorio (mallas que no entran en memoria)
+    - max_lado_grafico: puntos por lado que se leen de la malla para dibujar
+    - metodo: 'directo', 'barnes_hut' o 'fmm' (ver calcular_campo_y_potencial_lote)
+    - directorio: carpeta donde guardar el gráfico (por defecto graphics/)
+    - en_memoria: devolver la figura como ImagenRenderizada en vez de la ruta
+    - guardar_png: con en_memoria, si además se escribe el PNG en segundo plano
+    - adaptativo: en vez de la malla regular (num_puntos, directorio_malla y
+      max_lado_grafico no se usan), un quadtree refinado sólo donde pasan las
+      curvas de nivel (ver malla.malla_adaptativa); las curvas salen de
+      triangular sus nodos
+    - nivel_max: con adaptativo, la celda más chica mide 1/2**nivel_max del rango
+    - tolerancia_posicion: con adaptativo, error aceptado en la posición de
+      las curvas, en fracción del ancho del rango
+    - incremental: guardar las capas por carga de la malla para que la próxima
+      llamada con la misma malla recalcule sólo las cargas que cambiaron (ver
+      malla.evaluar_malla); conviene al editar cargas en la interfaz, no en
+      gráficos sueltos, porque las capas ocupan N mallas en memoria
+    - opciones_metodo: theta, orden, tolerancia del método elegido y procesos
+      para repartir la malla entre varios núcleos (ver malla.evaluar_malla)
+
+    Retorna: path del archivo guardado, o ImagenRenderizada si en_memoria
     """
-    # Crear malla de puntos
-    x = np.linspace(rango[0], rango[1], num_puntos)
-    y = np.linspace(rango[0], rango[1], num_puntos)
-    X, Y = np.meshgrid(x, y)
-
-    # Vectorizar el cálculo del potencial para mayor eficiencia
-    V = np.zeros_like(X)
-    for carga, x_carga, y_carga in cargas:
-        dx = X - x_carga
-        dy = Y - y_carga
-        # Añadir un pequeño épsilon para evitar la división por cero en la posición exacta de la carga
-        r = np.sqrt(dx**2 + dy**2) + 1e-9
-        V += K * carga / r
-
-    # Limitar los valores extremos del potencial para una mejor visualización de los contornos
-    # Esto evita que los infinitos en las posiciones de las cargas dominen la escala de colores
-    v_max = np.nanpercentile(V[np.isfinite(V)], 98)
-    v_min = np.nanpercentile(V[np.isfinite(V)], 2)
-    V = np.clip(V, v_min, v_max)
-
-    # 4. Ajustar niveles de contorno para incluir siempre V=0
-    max_abs_v = max(abs(v_min), abs(v_max))
-    v_levels = np.linspace(-max_abs_v, max_abs_v, niveles)
-    # Asegurarse de que el nivel 0.0 esté presente para visualizar la línea de potencial nulo
-    if 0.0 not in v_levels:
-        v_levels = np.sort(np.append(v_levels, 0.0))
+    plt = _pyplot()
+    from malla import evaluar_malla, malla_adaptativa, niveles_contorno
+
+    if adaptativo:
+        # Cerca de las cargas las celdas llegan a nivel_max; lejos, donde el
+        # potencial casi no cambia, quedan grandes
+        with etapa('malla'):
+            malla = malla_adaptativa(cargas, rango, niveles=niveles, nivel_max=nivel_max,
+                                     tolerancia_posicion=tolerancia_posicion, eps=1e-9,
+                                     eps_en_radio=True, metodo=metodo, **opciones_metodo)
+        from matplotlib.tri import Triangulation
+        triangulacion = Triangulation(malla.x, malla.y, malla.triangulos)
+        # El recorte ya se estimó sobre la malla inicial del quadtree
+        v_min, v_max = malla.limites
+        V = np.clip(malla.V, v_min, v_max)
+    else:
+        # Calcular el potencial por bloques; el épsilon en r evita la división por cero
+        # en la posición exacta de la carga
+        # Con incremental se reusan las capas por carga de la llamada anterior
+        # con la misma malla: sólo se recalculan las cargas que cambiaron
+        with etapa('malla'):
+            malla = evaluar_malla(cargas, rango, num_puntos, campo=False, eps=1e-9,
+                                  eps_en_radio=True, directorio=directorio_malla, metodo=metodo,
+                                  incremental=incremental, **opciones_metodo)
+        x, y, V, _, _ = malla.submuestreo(max_lado_grafico)
+        X, Y = np.meshgrid(x, y)
+
+        # Limitar los valores extremos del potencial para una mejor visualización de los contornos
+        # Esto evita que los infinitos en las posiciones de las cargas dominen la escala de colores
+        v_max = np.nanpercentile(V[np.isfinite(V)], 98)
+        v_min = np.nanpercentile(V[np.isfinite(V)], 2)
+        V = np.clip(V, v_min, v_max)
+
+    # 4. Niveles de contorno simétricos, incluyendo siempre V=0 (los mismos con
+    # que malla_adaptativa decide dónde refinar)
+    v_levels = niveles_contorno(v_min, v_max, niveles)
 
     # Crear figura
     plt.figure(figsize=(10, 8))
 
     # Graficar contornos de potencial
-    contorno = plt.contour(X, Y, V, levels=v_levels, colors='purple', linewidths=1, linestyles='solid')
-    plt.clabel(contorno, inline=True, fontsize=8, fmt='%1.1f V')
+    with etapa('contornos'):
+        if adaptativo:
+            contorno = plt.tricontour(triangulacion, V, levels=v_levels, colors='purple',
+                                      linewidths=1, linestyles='solid')
+        else:
+            contorno = plt.contour(X, Y, V, levels=v_levels, colors='purple', linewidths=1,
+                                   linestyles='solid')
+        plt.clabel(contorno, inline=True, fontsize=8, fmt='%1.1f V')
 
     # 2. Validación en el bucle de dibujo de cargas
     for carga, x_carga, y_carga in cargas:
@@ -600,26 +1237,30 @@ def graficar_superficies_equipotenciales(cargas, rango=(-5, 5), num_puntos=100,
     plt.axvline(0, color='black', linewidth=0.5)
     plt.axis('equal')
 
-    # Crear ruta absoluta para el directorio de gráficos
-    project_root = os.path.dirname(os.path.dirname(__file__))
-    graphics_dir = os.path.join(project_root, 'graphics')
-    os.makedirs(graphics_dir, exist_ok=True)
-
     # Guardar la figura
-    graphics_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'graphics')
-    if not os.path.exists(graphics_dir):
-        os.makedirs(graphics_dir)
-    
-    filename = 'equipotenciales.png'
-    filepath = os.path.join(graphics_dir, filename)
     plt.tight_layout()
-    plt.savefig(filepath, dpi=300, bbox_inches='tight')
-    plt.close()
-    return filepath
+    return _entregar_figura(plt.gcf(), directorio, 'equipotenciales.png', 300,
+                            en_memoria, guardar_png)
     
     
-def graficar_potencial(cargas, x_punto, y_punto, rango_x=(-5, 5), num_puntos=1000):
+def graficar_potencial(cargas, x_punto, y_punto, rango_x=(-5, 5), num_puntos=1000,
+                       directorio=None, en_memoria=False, guardar_png=True, adaptativo=True,
+                       limite=None):
+    """
+    Gráfico de V(x) vs x sobre el eje y = 0: potenciales individuales y su
+    superposición, con la misma escala Y.
+
+    Con adaptativo=True las curvas se muestrean con muestrear_potencial_en_linea
+    (num_puntos no se usa): se recortan en |V| > limite (None = ver
+    muestrear_potencial_en_linea) y los tramos recortados del potencial total
+    se sombrean.
+
+    Retorna: ruta del PNG o ImagenRenderizada
+    """
+    plt = _pyplot()
     x_values = np.linspace(rango_x[0], rango_x[1], num_puntos)
+    if adaptativo and limite is None:
+        limite = limite_potencial(cargas, rango_x)
 
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
     fig.suptitle('Potencial Eléctrico V(x) vs x', fontsize=16, fontweight='bold')
@@ -630,17 +1271,22 @@ def graficar_potencial(cargas, x_punto, y_punto, rango_x=(-5, 5), num_puntos=100
     # ---- Potenciales individuales ----
     ax1.set_title("Potenciales Individuales")
     for i, (carga, x_carga, y_carga) in enumerate(cargas):
-        V_values = []
-        for x in x_values:
-            V = calcular_potencial_electrico(carga, x_carga, y_carga, x, 0)
-            if np.isinf(V):
-                V = np.nan
-            V_values.append(V)
-        V_values = np.array(V_values)
+        if adaptativo:
+            with etapa('muestreo'):
+                muestreo = muestrear_potencial_en_linea([(carga, x_carga, y_carga)], *rango_x,
+                                                        limite=limite)
+            x_curva, V_values = muestreo.x, muestreo.con_huecos()
+        else:
+            # Mismo cálculo que calcular_potencial_electrico, vectorizado sobre x
+            x_curva = x_values
+            r = np.sqrt((x_values - x_carga)**2 + (0 - y_carga)**2)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                V_values = K * carga / r
+            V_values[r == 0] = np.nan
         todos_valores.extend(V_values[~np.isnan(V_values)])  # agregamos valores finitos
-        ax1.plot(x_values, V_values, color=colors[i], linewidth=2,
+        ax1.plot(x_curva, V_values, color=colors[i % len(colors)], linewidth=2,
                  label=f'Carga {i+1}: q={carga:.1e} C en ({x_carga},{y_carga})')
-        ax1.axvline(x=x_carga, color=colors[i], linestyle='--', alpha=0.5)
+        ax1.axvline(x=x_carga, color=colors[i % len(colors)], linestyle='--', alpha=0.5)
 
     ax1.set_xlabel("x [m]")
     ax1.set_ylabel("V(x) [Voltios]")
@@ -650,13 +1296,14 @@ def graficar_potencial(cargas, x_punto, y_punto, rango_x=(-5, 5), num_puntos=100
 
     # ---- Superposición total ----
     ax2.set_title("Superposición de Potenciales")
-    V_total_values = []
-    for x in x_values:
-        Vt = calcular_potencial_total(cargas, x, 0)
-        if np.isinf(Vt):
-            Vt = np.nan
-        V_total_values.append(Vt)
-    V_total_values = np.array(V_total_values)
+    if adaptativo:
+        with etapa('muestreo'):
+            muestreo = muestrear_potencial_en_linea(cargas, *rango_x, limite=limite)
+        x_values, V_total_values = muestreo.x, muestreo.con_huecos()
+        _sombrear_recortes(ax2, muestreo.recortes, f'Recortado (|V| > {limite:.1e} V)')
+    else:
+        _, _, _, _, V_total_values = calcular_campo_y_potencial_lote(cargas, x_values, 0.0)
+        V_total_values[np.isinf(V_total_values)] = np.nan
     todos_valores.extend(V_total_values[~np.isnan(V_total_values)])
 
     ax2.plot(x_values, V_total_values, color="orange", linewidth=2,
@@ -675,51 +1322,88 @@ def graficar_potencial(cargas, x_punto, y_punto, rango_x=(-5, 5), num_puntos=100
 
     plt.tight_layout()
 
-    graphics_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'graphics')
-    if not os.path.exists(graphics_dir):
-        os.makedirs(graphics_dir)
+    return _entregar_figura(fig, directorio, "potencial_vs_x.png", 300, en_memoria, guardar_png)
+
 
-    filepath = os.path.join(graphics_dir, "potencial_vs_x.png")
-    plt.savefig(filepath, dpi=300, bbox_inches="tight")
-    plt.close()
+def limite_potencial(cargas, rango_x):
+    """
+    |V| a partir del cual se recortan los gráficos de V(x): el potencial de la
+    carga más grande a una milésima del rango.
+
+    Retorna: límite [V]
+    """
+    cargas = ConjuntoCargas.desde(cargas)
+    q_max = np.abs(cargas.q).max() if len(cargas) else 0.0
+    return max(K * q_max / (1e-3 * (rango_x[1] - rango_x[0])), 1e-12)
 
-    return filepath
+def muestrear_potencial_en_linea(cargas, x_inicio, x_fin, y_fijo=0, limite=None, **opciones):
+    """
+    Potencial a lo largo de la línea y = y_fijo con muestreo adaptativo (ver
+    muestreo.py): pocos puntos donde V varía poco y muchos cerca de las cargas
+    y de los cambios de signo.
 
+    Parámetros:
+    - cargas: lista de tuplas [(carga1, x1, y1), ...] o ConjuntoCargas
+    - x_inicio, x_fin: rango x
+    - y_fijo: valor fijo de y
+    - limite: |V| a partir del cual se recorta [V] (None = limite_potencial)
+    - opciones: se pasan a muestreo.muestrear_linea (tolerancia, max_evaluaciones, ...)
 
-def calcular_potencial_en_linea(cargas, x_inicio, x_fin, y_fijo=0, num_puntos=1000):
+    Retorna: MuestreoLinea con x, V y los tramos recortados
+    """
+    from muestreo import muestrear_linea, puntos_alrededor
+    cargas = ConjuntoCargas.desde(cargas)
+    rango_x = (x_inicio, x_fin)
+    if limite is None:
+        limite = limite_potencial(cargas, rango_x)
+    return muestrear_linea(
+        lambda x: potencial_en_eje(cargas, x, y_fijo), rango_x, limite,
+        singulares=cargas.x[cargas.y == y_fijo],
+        puntos_extra=puntos_alrededor(cargas.x, rango_x, np.abs(cargas.y - y_fijo)),
+        **opciones)
+
+def calcular_potencial_en_linea(cargas, x_inicio, x_fin, y_fijo=0, num_puntos=1000,
+                                adaptativo=False):
     """
     Calcula el potencial eléctrico a lo largo de una línea.
     
     Parámetros:
-    - cargas: lista de tuplas [(carga1, x1, y1), (carga2, x2, y2), ...]
+    - cargas: lista de tuplas [(carga1, x1, y1), (carga2, x2, y2), ...] o ConjuntoCargas
     - x_inicio, x_fin: rango x para el cálculo
     - y_fijo: valor fijo de y (por defecto 0 para el eje x)
     - num_puntos: número de puntos para el cálculo
+    - adaptativo: muestrear con muestrear_potencial_en_linea en lugar de
+      num_puntos puntos uniformes (las posiciones ya no son equiespaciadas;
+      para saber dónde se recortó, usar esa función directamente)
     
     Retorna: (x_values, V_values) arrays de posición y potencial
     """
-    x_values = np.linspace(x_inicio, x_fin, num_puntos)
-    V_values = []
-    
-    for x in x_values:
-        V = calcular_potencial_total(cargas, x, y_fijo)
-        # Limitar valores extremos
-        if np.isinf(V):
-            V_values.append(np.nan)
-        elif V > 1e6:
-            V_values.append(1e6)
-        elif V < -1e6:
-            V_values.append(-1e6)
-        else:
-            V_values.append(V)
+    if adaptativo:
+        muestreo = muestrear_potencial_en_linea(cargas, x_inicio, x_fin, y_fijo, limite=1e6)
+        x_values, V_values = muestreo.x, muestreo.valores.copy()
+    else:
+        x_values = np.linspace(x_inicio, x_fin, num_puntos)
+        _, _, _, _, V_values = calcular_campo_y_potencial_lote(cargas, x_values, y_fijo)
     
-    return x_values, np.array(V_values)
+    # Limitar valores extremos
+    V_values[np.isinf(V_values)] = np.nan
+    V_values = np.clip(V_values, -1e6, 1e6)
+    
+    return x_values, V_values
 
 def graficar_superposicion_equipotenciales_y_campo(
     cargas,
     rango=(-5, 5),
     num_puntos=250,
-    niveles=21
+    niveles=21,
+    directorio_malla=None,
+    max_lado_grafico=1000,
+    metodo='directo',
+    directorio=None,
+    en_memoria=False,
+    guardar_png=True,
+    incremental=False,
+    **opciones_metodo
 ):
     """
     Dibuja en la *misma* figura:
@@ -727,57 +1411,53 @@ def graficar_superposicion_equipotenciales_y_campo(
       - Líneas de campo (streamlines del vector E)
     De este modo se ve cómo se cortan a 90°.
 
-    Retorna: ruta absoluta del PNG guardado.
+    Con metodo='barnes_hut' o 'fmm' el potencial y el campo de la malla se
+    evalúan con ese método (opciones_metodo: theta, orden, tolerancia).
+    Con procesos=n la malla se reparte entre n núcleos.
+    Con directorio_malla la malla se guarda por bloques en archivos np.memmap
+    y para dibujar se leen a lo sumo max_lado_grafico puntos por lado.
+    Con incremental=True se guardan las capas por carga de la malla, para que
+    la próxima llamada recalcule sólo las cargas que cambiaron (para la
+    interfaz; ocupa N mallas en memoria).
+    El PNG se guarda en directorio (por defecto graphics/).
+    Con en_memoria=True se devuelve la figura dibujada (ImagenRenderizada) y
+    el PNG se escribe en segundo plano, salvo que guardar_png sea False.
+
+    Retorna: ruta absoluta del PNG guardado, o ImagenRenderizada si en_memoria.
     """
     import numpy as np
-    import matplotlib.pyplot as plt
+    plt = _pyplot()
     import os, datetime
 
-    # malla
-    x = np.linspace(rango[0], rango[1], num_puntos)
-    y = np.linspace(rango[0], rango[1], num_puntos)
-    X, Y = np.meshgrid(x, y)
-
-    # potencial y campo total vectorizados
-    eps = 1e-9
-    V = np.zeros_like(X, dtype=float)
-    Ex = np.zeros_like(X, dtype=float)
-    Ey = np.zeros_like(Y, dtype=float)
-
-    for q, xc, yc in cargas:
-        dx = X - xc
-        dy = Y - yc
-        r2 = dx*dx + dy*dy + eps
-        r = np.sqrt(r2)
+    from malla import evaluar_malla, niveles_contorno
 
-        # V = k q / r
-        V += K * q / r
-
-        # E = k q (r_vec)/r^3  => componentes
-        Ex += K * q * dx / (r2 * r)
-        Ey += K * q * dy / (r2 * r)
+    # potencial y campo total por bloques: V = k q / r, E = k q (r_vec)/r^3
+    # (incremental: sólo se recalculan las capas de las cargas que cambiaron)
+    with etapa('malla'):
+        malla = evaluar_malla(cargas, rango, num_puntos, campo=True, eps=1e-9,
+                              directorio=directorio_malla, metodo=metodo, incremental=incremental,
+                              **opciones_metodo)
+    x, y, V, Ex, Ey = malla.submuestreo(max_lado_grafico)
+    X, Y = np.meshgrid(x, y)
 
     # niveles de contorno simétricos e incluyendo 0 V
-    vmax = np.nanpercentile(V, 98)
-    vmin = np.nanpercentile(V, 2)
-    vmax_abs = max(abs(vmin), abs(vmax))
-    levels = np.linspace(-vmax_abs, vmax_abs, niveles)
-    if 0.0 not in levels:
-        levels = np.sort(np.append(levels, 0.0))
+    levels = niveles_contorno(np.nanpercentile(V, 2), np.nanpercentile(V, 98), niveles)
 
     # figura
     fig, ax = plt.subplots(figsize=(10, 9))
     ax.set_aspect('equal')
 
     # equipotenciales
-    cs = ax.contour(X, Y, V, levels=levels, colors='purple', linewidths=1.0)
-    ax.clabel(cs, fmt='%1.1f V', fontsize=8, inline=True)
+    with etapa('contornos'):
+        cs = ax.contour(X, Y, V, levels=levels, colors='purple', linewidths=1.0)
+        ax.clabel(cs, fmt='%1.1f V', fontsize=8, inline=True)
 
     # líneas de campo (streamplot)
-    strm = ax.streamplot(
-        X, Y, Ex, Ey,
-        density=1.2, linewidth=1.0, arrowsize=1.5, color='k'
-    )
+    with etapa('trazado_lineas'):
+        strm = ax.streamplot(
+            X, Y, Ex, Ey,
+            density=1.2, linewidth=1.0, arrowsize=1.5, color='k'
+        )
 
     # cargas
     for i, (q, xc, yc) in enumerate(cargas, 1):
@@ -786,6 +1466,11 @@ def graficar_superposicion_equipotenciales_y_campo(
         ax.text(xc + 0.12, yc + 0.12, f'{q:.1e} C',
                 fontsize=9, bbox=dict(facecolor='white', alpha=0.75, edgecolor='none'))
 
+    # puntos de equilibrio (E = 0): sillas del potencial donde se separan las líneas
+    rango_y_malla = (float(y[0]), float(y[-1]))
+    for x_eq, y_eq, _, _ in encontrar_equilibrios_plano(cargas, rango, rango_y_malla):
+        ax.scatter(x_eq, y_eq, s=80, marker='x', c='green', linewidths=2, zorder=6)
+
     ax.set_title('Equipotenciales + Líneas de Campo (⊥ en 90°)')
     ax.set_xlabel('x [m]')
     ax.set_ylabel('y [m]')
@@ -794,14 +1479,7 @@ def graficar_superposicion_equipotenciales_y_campo(
     ax.axvline(0, color='black', lw=0.6, alpha=0.6)
 
     # guardar
-    project_root = os.path.dirname(os.path.dirname(__file__))
-    graphics_dir = os.path.join(project_root, 'graphics')
-    os.makedirs(graphics_dir, exist_ok=True)
     ts = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
     fname = f'superposicion_E_y_equipot_{ts}.png'
-    fpath = os.path.join(graphics_dir, fname)
     plt.tight_layout()
-    plt.savefig(fpath, dpi=300, bbox_inches='tight')
-    plt.close(fig)
-
-    return fpath
+    return _entregar_figura(fig, directorio, fname, 300, en_memoria, guardar_png)
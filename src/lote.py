@@ -0,0 +1,290 @@
+"""
+lote.py
+Modo por lotes, sin interfaz gráfica: calcula y grafica muchas configuraciones
+de cargas repartidas en varios procesos.
+
+Cada configuración usa el formato de config_predeterminada.json. La entrada
+puede ser un archivo JSONL (una configuración por línea) o una carpeta con
+archivos .json. Por cada configuración se escribe un registro en
+resultados.jsonl y sus gráficos van a graficos/<id>/ dentro de la salida.
+Los valores infinitos o NaN (por ejemplo, el campo sobre una carga) se
+escriben como null y sus claves quedan listadas en 'no_finitos'.
+
+Uso:
+    python src/lote.py configuraciones.jsonl salida/ --procesos 8
+    python src/lote.py carpeta_configs/ salida/ --graficos campo,lineas
+"""
+import time
+_inicio_programa = time.perf_counter()
+
+import argparse
+import json
+import math
+import os
+import sys
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+# logic.py carga matplotlib (con el backend Agg, sin ventanas) recién al
+# primer gráfico: los procesos que no grafican no pagan esa importación
+from instrumentacion import Corrida, etapa
+from logic import (calcular_campo_total, calcular_potencial_total,
+                   encontrar_equilibrios_plano, graficar_campo_electrico,
+                   graficar_lineas_campo, graficar_potencial,
+                   graficar_superficies_equipotenciales,
+                   graficar_superposicion_equipotenciales_y_campo)
+
+GRAFICOS = ('campo', 'lineas', 'potencial', 'equipotenciales', 'superposicion')
+
+
+def nombre_carpeta(identificador):
+    """
+    Nombre seguro para la carpeta de gráficos de una configuración: sin
+    separadores de ruta ni componentes '.'/'..', para que no salga de graficos/.
+
+    Retorna: string no vacío
+    """
+    partes = [p for p in identificador.replace('\\', '/').split('/') if p not in ('', '.', '..')]
+    nombre = '_'.join(partes).lstrip('.')
+    return nombre or 'config'
+
+
+def leer_configuraciones(entrada):
+    """
+    Lee las configuraciones de un archivo JSONL o de una carpeta con .json.
+
+    Una línea o un archivo que no se puede leer no corta la lectura: se
+    entrega con configuración None y el error, para que quede su registro.
+
+    Parámetros:
+    - entrada: ruta del archivo JSONL o de la carpeta
+
+    Retorna: iterador de (id, carpeta, configuración, error); carpeta es el
+    nombre (único) de su carpeta de gráficos, ver nombre_carpeta
+    """
+    usadas = set()
+
+    def carpeta_unica(identificador, sufijo):
+        carpeta = nombre_carpeta(identificador)
+        if carpeta in usadas:
+            carpeta = f'{carpeta}_{sufijo}'
+        usadas.add(carpeta)
+        return carpeta
+
+    if os.path.isdir(entrada):
+        for nombre in sorted(os.listdir(entrada)):
+            if nombre.endswith('.json'):
+                identificador = os.path.splitext(nombre)[0]
+                config, error = None, None
+                try:
+                    with open(os.path.join(entrada, nombre), encoding='utf-8') as f:
+                        config = json.load(f)
+                except (OSError, ValueError) as e:
+                    error = f'{type(e).__name__}: {e}'
+                yield identificador, carpeta_unica(identificador, nombre), config, error
+        return
+
+    with open(entrada, encoding='utf-8') as f:
+        for i, linea in enumerate(f, 1):
+            if linea.strip():
+                identificador, config, error = str(i), None, None
+                try:
+                    config = json.loads(linea)
+                    if not isinstance(config, dict):
+                        raise ValueError('la línea no es un objeto JSON')
+                    identificador = str(config.get('id', i))
+                except ValueError as e:
+                    config, error = None, f'línea {i}: {type(e).__name__}: {e}'
+                yield identificador, carpeta_unica(identificador, i), config, error
+
+
+def interpretar_configuracion(config):
+    """
+    Extrae cargas y punto de una configuración con el formato de
+    config_predeterminada.json (con o sin la clave 'configuracion_predeterminada').
+
+    Retorna: (cargas, (x_punto, y_punto)) con cargas como lista de tuplas
+    """
+    datos = config.get('configuracion_predeterminada', config)
+    cargas = [(float(c['valor']), float(c['x']), float(c['y'])) for c in datos['cargas']]
+    punto = datos['punto_entrada']
+    return cargas, (float(punto['x']), float(punto['y']))
+
+
+def rango_automatico(cargas, margen=2.0):
+    """
+    Rango cuadrado alrededor de las cargas, igual al que usa la interfaz para
+    las equipotenciales.
+
+    Retorna: tupla (min, max)
+    """
+    xs = [x for _, x, _ in cargas]
+    ys = [y for _, _, y in cargas]
+    rango_max = max(max(xs) - min(xs), max(ys) - min(ys)) / 2 + margen
+    centro_x = (min(xs) + max(xs)) / 2
+    return (centro_x - rango_max - margen, centro_x + rango_max + margen)
+
+
+def procesar_configuracion(trabajo):
+    """
+    Calcula campo, potencial y equilibrios de una configuración y genera sus gráficos.
+
+    Parámetros:
+    - trabajo: tupla (id, carpeta de sus gráficos, configuración, error de
+      lectura o None, carpeta de salida, gráficos a generar)
+
+    Retorna: registro (dict) serializable a JSON; si algo falla, con la clave 'error'
+    """
+    identificador, carpeta, config, error, salida, graficos = trabajo
+    inicio = time.perf_counter()
+    registro = {'id': identificador}
+    if error is not None:
+        registro['error'] = error
+        registro['tiempo'] = time.perf_counter() - inicio
+        return registro
+    corrida = Corrida(f'lote_{identificador}')
+    try:
+        with corrida.activa():
+            cargas, (x_punto, y_punto) = interpretar_configuracion(config)
+            registro['cargas'] = cargas
+            registro['punto'] = [x_punto, y_punto]
+
+            with etapa('campo'):
+                Ex, Ey, magnitud, angulo = calcular_campo_total(cargas, x_punto, y_punto)
+            registro['campo'] = {'Ex': Ex, 'Ey': Ey, 'magnitud': magnitud, 'angulo': angulo}
+            with etapa('potencial'):
+                registro['potencial'] = calcular_potencial_total(cargas, x_punto, y_punto)
+
+            rango = rango_automatico(cargas)
+            with etapa('equilibrios_plano'):
+                equilibrios_plano = encontrar_equilibrios_plano(cargas, rango)
+            registro['equilibrios_plano'] = [
+                {'x': x, 'y': y, 'tipo': tipo, 'autovalores': list(autovalores)}
+                for x, y, tipo, autovalores in equilibrios_plano
+            ]
+
+            directorio = os.path.join(salida, 'graficos', carpeta)
+            rutas = {}
+            if 'campo' in graficos:
+                rutas['campo'], equilibrios = graficar_campo_electrico(cargas, x_punto, y_punto,
+                                                                       directorio=directorio)
+                registro['equilibrios_eje'] = [{'x': x, 'estabilidad': e} for x, e in equilibrios]
+            if 'lineas' in graficos:
+                rutas['lineas'] = graficar_lineas_campo(cargas, x_punto, y_punto,
+                                                        directorio=directorio)
+            if 'potencial' in graficos:
+                rutas['potencial'] = graficar_potencial(cargas, x_punto, y_punto,
+                                                        directorio=directorio)
+            # Como en la interfaz, las equipotenciales omiten las cargas casi nulas
+            significativas = [(q, x, y) for q, x, y in cargas if abs(q) >= 1e-9]
+            if 'equipotenciales' in graficos and significativas:
+                rutas['equipotenciales'] = graficar_superficies_equipotenciales(
+                    significativas, rango=rango_automatico(significativas), directorio=directorio)
+            if 'superposicion' in graficos and significativas:
+                rutas['superposicion'] = graficar_superposicion_equipotenciales_y_campo(
+                    significativas, rango=rango_automatico(significativas), directorio=directorio)
+            registro['graficos'] = {nombre: os.path.relpath(ruta, salida)
+                                    for nombre, ruta in rutas.items()}
+    except Exception as e:
+        registro['error'] = f'{type(e).__name__}: {e}'
+        registro['traza'] = traceback.format_exc()
+
+    registro['tiempo'] = time.perf_counter() - inicio
+    # Tiempo (y memoria, con FISICA_MEDIR_MEMORIA=1) de cada etapa
+    registro['etapas'] = corrida.finalizar('error' if 'error' in registro else 'ok') \
+        .como_dict()['etapas']
+    return registro
+
+
+def _reemplazar_no_finitos(valor, ruta, reemplazados):
+    if isinstance(valor, dict):
+        return {k: _reemplazar_no_finitos(v, f'{ruta}.{k}' if ruta else k, reemplazados)
+                for k, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_reemplazar_no_finitos(v, f'{ruta}[{i}]', reemplazados)
+                for i, v in enumerate(valor)]
+    if isinstance(valor, float) and not math.isfinite(valor):
+        reemplazados.append(ruta)
+        return None
+    return valor
+
+
+def registro_json(registro):
+    """
+    Registro listo para json.dumps(..., allow_nan=False): JSON estricto no
+    admite Infinity ni NaN, así que esos valores pasan a null y sus claves
+    (como 'campo.magnitud' o 'equilibrios_plano[0].autovalores[1]') se
+    agregan a la lista 'no_finitos' del registro.
+
+    Parámetros:
+    - registro: dict devuelto por procesar_configuracion
+
+    Retorna: dict nuevo (el original no se modifica)
+    """
+    reemplazados = []
+    limpio = _reemplazar_no_finitos(registro, '', reemplazados)
+    if reemplazados:
+        limpio['no_finitos'] = reemplazados
+    return limpio
+
+
+def ejecutar_lote(entrada, salida, procesos=None, graficos=GRAFICOS):
+    """
+    Procesa todas las configuraciones de la entrada, repartidas en procesos.
+
+    Parámetros:
+    - entrada: archivo JSONL o carpeta con archivos .json
+    - salida: carpeta de resultados (resultados.jsonl y graficos/)
+    - procesos: cantidad de procesos (None = todos los núcleos)
+    - graficos: cuáles gráficos generar (ver GRAFICOS)
+
+    Retorna: (cantidad de configuraciones, cantidad con error)
+    """
+    os.makedirs(salida, exist_ok=True)
+    trabajos = ((identificador, carpeta, config, error, salida, tuple(graficos))
+                for identificador, carpeta, config, error in leer_configuraciones(entrada))
+
+    total = errores = 0
+    ruta_resultados = os.path.join(salida, 'resultados.jsonl')
+    with open(ruta_resultados, 'w', encoding='utf-8') as f, \
+            ProcessPoolExecutor(max_workers=procesos) as pool:
+        # Los registros se escriben en el orden de la entrada, a medida que salen
+        for registro in pool.map(procesar_configuracion, trabajos, chunksize=4):
+            f.write(json.dumps(registro_json(registro), ensure_ascii=False, allow_nan=False)
+                    + '\n')
+            f.flush()
+            total += 1
+            if 'error' in registro:
+                errores += 1
+                print(f"[{registro['id']}] error: {registro['error']}", file=sys.stderr)
+
+    return total, errores
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Calcula y grafica muchas configuraciones de cargas sin interfaz gráfica.')
+    parser.add_argument('entrada', help='archivo JSONL o carpeta con archivos .json')
+    parser.add_argument('salida', help='carpeta donde escribir resultados.jsonl y los gráficos')
+    parser.add_argument('--procesos', type=int, default=None,
+                        help='cantidad de procesos (por defecto, todos los núcleos)')
+    parser.add_argument('--graficos', default=','.join(GRAFICOS),
+                        help=f"gráficos a generar, separados por coma ({', '.join(GRAFICOS)}); "
+                             "vacío para no generar ninguno")
+    args = parser.parse_args(argv)
+
+    graficos = [g for g in args.graficos.split(',') if g]
+    desconocidos = set(graficos) - set(GRAFICOS)
+    if desconocidos:
+        parser.error(f"gráficos desconocidos: {', '.join(sorted(desconocidos))}")
+
+    inicio = time.perf_counter()
+    arranque = inicio - _inicio_programa
+    total, errores = ejecutar_lote(args.entrada, args.salida, args.procesos, graficos)
+    print(f'{total} configuraciones procesadas ({errores} con error) '
+          f'en {time.perf_counter() - inicio:.1f} s (arranque: {arranque:.2f} s)')
+    return 1 if errores else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
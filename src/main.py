@@ -1,18 +1,40 @@
 
-from tkinter import Frame, Tk, Label, Entry, Button, messagebox, Toplevel, Canvas
+import time
+_inicio_programa = time.perf_counter()
+
+from tkinter import Frame, Tk, Label, Entry, Button, messagebox, Toplevel, Canvas, StringVar
+from tkinter import ttk
+
+# logic.py no carga matplotlib hasta el primer gráfico y entonces elige el
+# backend Agg: los gráficos se dibujan en un hilo de trabajo y sólo se
+# guardan o se muestran como imagen, sin que matplotlib toque Tk fuera del
+# hilo principal. PIL, los gráficos vivos y el modo interactivo también se
+# importan recién cuando se usan, para que la ventana aparezca antes.
 from logic import calcular_campo_total, parsear_coordenadas, graficar_campo_electrico, graficar_lineas_campo, calcular_potencial_total, graficar_potencial, graficar_superposicion_equipotenciales_y_campo
 
-from PIL import Image, ImageTk
 import os
 import json
-import numpy as np
+import logging
+import math
+
+from cache import cache_resultados
+from instrumentacion import Corrida
+from tareas import EjecutorTareas
+
+# Ejecutor de los cálculos en segundo plano (se crea en crear_interfaz)
+ejecutor = None
 
-# Variable global para mantener referencia de imágenes
-photo_references = []
+# Gráficos vivos abiertos: siguen los cambios de las entradas
+vistas_en_vivo = []
+_actualizacion_pendiente = {"id": None}
 
-def mostrar_ventana_resultados(cargas, x_punto, y_punto, Ex, Ey, magnitud, angulo, imagen_path, puntos_equilibrio, imagen_lineas_path):
+def mostrar_ventana_resultados(cargas, x_punto, y_punto, Ex, Ey, magnitud, angulo, puntos_equilibrio, imagen_lineas_path):
     ventana = Toplevel()
     ventana.title("Resultados - Campo Eléctrico")
+    from graficos_vivos import GraficoCampoVivo
+    from imagenes_tk import cache_imagenes
+    # Al cerrar la ventana sus imágenes quedan libres en el caché
+    cache_imagenes.liberar_al_cerrar(ventana)
 
     # Obtener dimensiones de la pantalla
     screen_width = ventana.winfo_screenwidth()
@@ -128,6 +150,8 @@ def mostrar_ventana_resultados(cargas, x_punto, y_punto, Ex, Ey, magnitud, angul
 
     # Variable para rastrear el gráfico actual
     grafico_actual = {"valor": 0}  # 0 = E(x) vs x, 1 = Líneas de campo
+    # E(x) vs x es un gráfico vivo: se crea una vez y se actualiza al cambiar los datos
+    grafico_vivo = {"valor": None}
     
     def cambiar_grafico(tipo_grafico):
         """Función que cambia el gráfico según el tipo seleccionado"""
@@ -135,13 +159,16 @@ def mostrar_ventana_resultados(cargas, x_punto, y_punto, Ex, Ey, magnitud, angul
             # Actualizar el valor actual
             grafico_actual["valor"] = tipo_grafico
             
-            # Limpiar el canvas anterior
+            # Limpiar el canvas anterior (el gráfico vivo sólo se oculta)
+            vivo = grafico_vivo["valor"]
             for widget in canvas_frame.winfo_children():
-                widget.destroy()
+                if vivo is not None and widget is vivo.widget:
+                    widget.pack_forget()
+                else:
+                    widget.destroy()
             
-            # Seleccionar imagen según el tipo de gráfico
+            # Seleccionar gráfico según el tipo
             if tipo_grafico == 0:
-                imagen_actual = imagen_path
                 titulo_actual = "E(x) vs x - Análisis de Equilibrio"
                 # Actualizar estilo de botones
                 btn_ex_vs_x.config(bg="#4CAF50", fg="black", relief="solid", bd=2)
@@ -155,20 +182,25 @@ def mostrar_ventana_resultados(cargas, x_punto, y_punto, Ex, Ey, magnitud, angul
             
             # Actualizar título
             titulo_grafico.config(text=titulo_actual)
+
+            if tipo_grafico == 0:
+                if vivo is None:
+                    vivo = GraficoCampoVivo(canvas_frame, cargas, x_punto, y_punto)
+                    grafico_vivo["valor"] = vivo
+                    vistas_en_vivo.append(vivo)
+                vivo.widget.pack(fill="both", expand=True)
+                return
             
             # Cargar y mostrar la nueva imagen
-            img = Image.open(imagen_actual)
-            img.thumbnail((850, 600))
-            photo = ImageTk.PhotoImage(img)
+            # (decodificada y reducida una sola vez: el caché la guarda
+            # mientras la ventana esté abierta)
+            photo = cache_imagenes.obtener(imagen_actual, (850, 600), dueno=ventana)
             
             canvas = Canvas(canvas_frame, bg="white", 
-                           width=img.width, height=img.height, 
+                           width=photo.width(), height=photo.height(), 
                            highlightthickness=0)
             canvas.pack()
-            canvas.create_image(img.width//2, img.height//2, image=photo)
-            
-            # Mantener referencia para evitar garbage collection
-            photo_references.append(photo)
+            canvas.create_image(photo.width()//2, photo.height()//2, image=photo)
             
         except Exception as e:
             # Mostrar error si no se puede cargar la imagen
@@ -203,6 +235,28 @@ def mostrar_ventana_resultados(cargas, x_punto, y_punto, Ex, Ey, magnitud, angul
                        padx=20, pady=8,
                        cursor="hand2")
     btn_lineas.pack(side="left", padx=5)
+
+    # Guardar el E(x) vivo tal como se ve (con los cambios hechos desde el cálculo)
+    def guardar_grafico_vivo():
+        vivo = grafico_vivo["valor"]
+        if vivo is None:
+            return
+        try:
+            ruta = vivo.guardar()
+        except Exception as e:
+            messagebox.showerror("Error", f"No se pudo guardar el gráfico: {str(e)}")
+            return
+        print(f"Gráfico guardado en: {ruta}")
+        messagebox.showinfo("Gráfico guardado", f"Gráfico E(x) guardado en:\n{ruta}")
+
+    btn_guardar = Button(botones_frame, text="💾 Guardar E(x)",
+                         command=guardar_grafico_vivo,
+                         font=("Arial", 12, "bold"),
+                         bg="#f0f0f0", fg="black",
+                         relief="raised", bd=1,
+                         padx=20, pady=8,
+                         cursor="hand2")
+    btn_guardar.pack(side="left", padx=5)
     
     # Efectos hover para los botones
     def on_enter_ex(e):
@@ -266,9 +320,17 @@ def mostrar_ventana_resultados(cargas, x_punto, y_punto, Ex, Ey, magnitud, angul
     cambiar_grafico_con_descripcion(0)
 
     # ===== BOTÓN CERRAR =====
-    Button(ventana, text="Cerrar", command=ventana.destroy,
+    def cerrar():
+        vivo = grafico_vivo["valor"]
+        if vivo is not None:
+            vistas_en_vivo.remove(vivo)
+            vivo.cerrar()
+        ventana.destroy()
+
+    Button(ventana, text="Cerrar", command=cerrar,
            font=("Arial", 14, "bold"), bg="#f0f0f0", 
            activebackground="#cfcfcf", width=15).pack(side="bottom", pady=15)
+    ventana.protocol("WM_DELETE_WINDOW", cerrar)
 
 
 
@@ -374,6 +436,8 @@ def calcular_graficar():
     Implementa el inciso b) del ejercicio.
     """
     print("Función calcular_graficar llamada")
+    # Tiempos por etapa (validación, campo, equilibrios, líneas, imágenes)
+    corrida = Corrida('calcular_campo')
 
     # Obtener valores de las cargas
     carga1_val = carga1.get().strip()
@@ -439,32 +503,47 @@ def calcular_graficar():
         (q3, x3, y3)
     ]
     
-    # Calcular el campo eléctrico total en el punto especificado
-    try:
-        Ex_total, Ey_total, magnitud, angulo = calcular_campo_total(cargas, x_punto, y_punto)
-        
-        # Generar el gráfico E(x) vs x y obtener puntos de equilibrio
-        print("Generando gráfico E(x) vs x...")
-        imagen_path, puntos_equilibrio = graficar_campo_electrico(cargas, x_punto, y_punto)
-        
-        # Generar el gráfico de líneas de campo
-        print("Generando gráfico de líneas de campo...")
-        imagen_lineas_path = graficar_lineas_campo(cargas, x_punto, y_punto)
-        
+    corrida.registrar('validacion', time.perf_counter() - corrida.inicio)
+
+    # Calcular en segundo plano: campo en el punto, gráfico E(x) (con los
+    # puntos de equilibrio) y líneas de campo. El PNG de E(x) queda guardado
+    # como antes; la ventana de resultados muestra una versión viva del mismo
+    # gráfico que sigue los cambios de las entradas.
+    etapas = [
+        ('campo', "Campo en el punto",
+         lambda: calcular_campo_total(cargas, x_punto, y_punto)),
+        ('grafico_campo', "Gráfico E(x)",
+         lambda: cache_resultados().calcular(graficar_campo_electrico, cargas, x_punto, y_punto)),
+        ('lineas', "Líneas de campo",
+         lambda: cache_resultados().calcular(graficar_lineas_campo, cargas, x_punto, y_punto,
+                                             en_memoria=True)),
+    ]
+
+    def al_terminar(resultados):
+        Ex_total, Ey_total, magnitud, angulo = resultados['campo']
+        imagen_path, puntos_equilibrio = resultados['grafico_campo']
+        imagen_lineas_path = resultados['lineas']
+
         # Mostrar la nueva ventana de resultados
-        mostrar_ventana_resultados(cargas, x_punto, y_punto, Ex_total, Ey_total, 
-                                 magnitud, angulo, imagen_path, puntos_equilibrio, imagen_lineas_path)
-        
+        with corrida.activa():
+            mostrar_ventana_resultados(cargas, x_punto, y_punto, Ex_total, Ey_total,
+                                       magnitud, angulo, puntos_equilibrio, imagen_lineas_path)
+        mostrar_resumen(corrida.finalizar())
+
         print(f"Cargas: {cargas}")
         print(f"Punto: ({x_punto}, {y_punto})")
         print(f"Campo eléctrico: Ex={Ex_total:.2e}, Ey={Ey_total:.2e}")
         print(f"Magnitud: {magnitud:.2e} N/C, Ángulo: {angulo:.1f}°")
         print(f"Gráfico guardado en: {imagen_path}")
-        
-    except Exception as e:
+        print(f"Gráfico de líneas de campo: {imagen_lineas_path}")
+
+    def al_fallar(e, traza):
+        corrida.finalizar('error')
         messagebox.showerror("Error de cálculo", f"Error al calcular el campo eléctrico: {str(e)}")
         print(f"Error: {e}")
 
+    ejecutor.iniciar(etapas, al_terminar, al_fallar, corrida)
+
 def mostrar_resultado_potencial_numerico(cargas, x_punto, y_punto, V_total):
     """
     Muestra una ventana emergente con el resultado numérico del potencial eléctrico
@@ -512,7 +591,7 @@ def mostrar_resultado_potencial_numerico(cargas, x_punto, y_punto, V_total):
         resultado_titulo.pack(pady=(15,10))
 
         # Mostrar el valor del potencial
-        if np.isinf(V_total):
+        if math.isinf(V_total):
             valor_label = Label(resultado_frame, text="V = ∞ Voltios", 
                                font=("Arial", 24, "bold"), bg="#e8f5e8", fg="red")
             valor_label.pack(pady=10)
@@ -564,6 +643,7 @@ def calcular_potencial():
     Calcula el potencial eléctrico V(x,y) en el punto especificado y muestra ventana con gráfico.
     """
     print("DEBUG: Función calcular_potencial llamada")
+    corrida = Corrida('calcular_potencial')
 
     # Obtener valores de las cargas
     carga1_val = carga1.get().strip()
@@ -603,43 +683,58 @@ def calcular_potencial():
 
     cargas = [(q1, x1, y1), (q2, x2, y2), (q3, x3, y3)]
 
-    try:
-        print("DEBUG: Iniciando cálculo de potencial...")
-        V_total = calcular_potencial_total(cargas, x_punto, y_punto)
-        print(f"DEBUG: Potencial calculado = {V_total}")
-
-       # Generar gráfico de potencial
-        imagen_potencial_path = graficar_potencial(cargas, x_punto, y_punto, rango_x=(-5, 5))
-        
-        # Generar gráfico de superficies equipotenciales
-        from logic import graficar_superficies_equipotenciales
-        
-        # Calcular el rango apropiado para las equipotenciales
-        x_vals = [x for _, x, _ in cargas]
-        y_vals = [y for _, _, y in cargas]
-        margen = 2.0
-        x_min, x_max = min(x_vals) - margen, max(x_vals) + margen
-        y_min, y_max = min(y_vals) - margen, max(y_vals) + margen
-        rango_max = max(x_max - x_min, y_max - y_min) / 2
-        centro_x = (min(x_vals) + max(x_vals)) / 2
-        centro_y = (min(y_vals) + max(y_vals)) / 2
-        rango = (centro_x - rango_max - margen, centro_x + rango_max + margen)
-        
-        imagen_equipotenciales_path = graficar_superficies_equipotenciales(cargas, rango=rango)
+    # Calcular el rango apropiado para las equipotenciales
+    x_vals = [x for _, x, _ in cargas]
+    y_vals = [y for _, _, y in cargas]
+    margen = 2.0
+    x_min, x_max = min(x_vals) - margen, max(x_vals) + margen
+    y_min, y_max = min(y_vals) - margen, max(y_vals) + margen
+    rango_max = max(x_max - x_min, y_max - y_min) / 2
+    centro_x = (min(x_vals) + max(x_vals)) / 2
+    rango = (centro_x - rango_max - margen, centro_x + rango_max + margen)
+
+    from logic import graficar_superficies_equipotenciales
+    corrida.registrar('validacion', time.perf_counter() - corrida.inicio)
+
+    # Calcular en segundo plano: potencial en el punto, gráfico de V(x) y
+    # superficies equipotenciales
+    etapas = [
+        ('potencial', "Potencial en el punto",
+         lambda: calcular_potencial_total(cargas, x_punto, y_punto)),
+        ('grafico_potencial', "Gráfico V(x)",
+         lambda: cache_resultados().calcular(graficar_potencial, cargas,
+                                             x_punto, y_punto, rango_x=(-5, 5),
+                                             en_memoria=True)),
+        ('equipotenciales', "Superficies equipotenciales",
+         lambda: cache_resultados().calcular(graficar_superficies_equipotenciales,
+                                             cargas, rango=rango, incremental=True,
+                                             en_memoria=True)),
+    ]
 
+    def al_terminar(resultados):
+        print(f"DEBUG: Potencial calculado = {resultados['potencial']}")
         # Mostrar ventana con resultado y ambos gráficos
-        mostrar_ventana_potencial_completa(cargas, x_punto, y_punto, V_total, imagen_potencial_path, imagen_equipotenciales_path)
-
-
-    except Exception as e:
+        with corrida.activa():
+            mostrar_ventana_potencial_completa(cargas, x_punto, y_punto, resultados['potencial'],
+                                               resultados['grafico_potencial'],
+                                               resultados['equipotenciales'])
+        mostrar_resumen(corrida.finalizar())
+
+    def al_fallar(e, traza):
+        corrida.finalizar('error')
         messagebox.showerror("Error de cálculo", f"Error al calcular el potencial eléctrico: {str(e)}")
         print(f"ERROR: {e}")
-        import traceback
-        traceback.print_exc()
+        print(traza)
+
+    print("DEBUG: Iniciando cálculo de potencial...")
+    ejecutor.iniciar(etapas, al_terminar, al_fallar, corrida)
 
 def mostrar_ventana_potencial_completa(cargas, x_punto, y_punto, V_total, imagen_path, imagen_equipotenciales_path):
     ventana = Toplevel()
     ventana.title("Resultados - Potencial Eléctrico")
+    from imagenes_tk import cache_imagenes
+    # Al cerrar la ventana sus imágenes quedan libres en el caché
+    cache_imagenes.liberar_al_cerrar(ventana)
 
     # Obtener dimensiones de la pantalla
     screen_width = ventana.winfo_screenwidth()
@@ -708,7 +803,7 @@ def mostrar_ventana_potencial_completa(cargas, x_punto, y_punto, V_total, imagen
     Label(resultado_frame, text="Valor del Potencial:", 
           font=("Arial", 12, "bold"), bg="#f0f8ff", fg="black").pack(anchor="w", padx=15, pady=(10,5))
     
-    if np.isinf(V_total):
+    if math.isinf(V_total):
         Label(resultado_frame, text="• V = ∞ V (punto coincide con carga)", 
               font=("Arial", 11), bg="#f0f8ff", fg="red").pack(anchor="w", padx=25)
     else:
@@ -778,18 +873,15 @@ def mostrar_ventana_potencial_completa(cargas, x_punto, y_punto, V_total, imagen
             titulo_grafico.config(text=titulo_actual)
             
             # Cargar y mostrar la nueva imagen
-            img = Image.open(imagen_actual)
-            img.thumbnail((850, 600))
-            photo = ImageTk.PhotoImage(img)
+            # (decodificada y reducida una sola vez: el caché la guarda
+            # mientras la ventana esté abierta)
+            photo = cache_imagenes.obtener(imagen_actual, (850, 600), dueno=ventana)
             
             canvas = Canvas(canvas_frame, bg="white", 
-                           width=img.width, height=img.height, 
+                           width=photo.width(), height=photo.height(), 
                            highlightthickness=0)
             canvas.pack()
-            canvas.create_image(img.width//2, img.height//2, image=photo)
-            
-            # Mantener referencia para evitar garbage collection
-            photo_references.append(photo)
+            canvas.create_image(photo.width()//2, photo.height()//2, image=photo)
             
         except Exception as e:
             # Mostrar error si no se puede cargar la imagen
@@ -894,6 +986,7 @@ def graficar_equipotenciales():
     """
     Genera un gráfico de superficies equipotenciales para las cargas configuradas.
     """
+    corrida = Corrida('equipotenciales')
     try:
         # Obtener las cargas de la interfaz
         cargas = []
@@ -949,17 +1042,29 @@ def graficar_equipotenciales():
         
         rango = (centro_x - rango_max - margen, centro_x + rango_max + margen)
 
-        # Generar el gráfico con las cargas filtradas
-        try:
-            from logic import graficar_superficies_equipotenciales
-            filepath = graficar_superficies_equipotenciales(cargas_filtradas, rango=rango)
-            
+        # Generar el gráfico con las cargas filtradas, en segundo plano
+        from logic import graficar_superficies_equipotenciales
+        corrida.registrar('validacion', time.perf_counter() - corrida.inicio)
+
+        def al_terminar(resultados):
+            filepath = resultados['equipotenciales']
             print(f"Gráfico de superficies equipotenciales guardado en: {filepath}")
             
             # Mostrar la imagen generada en una nueva ventana
-            mostrar_imagen(filepath, "Superficies Equipotenciales")
-        except Exception as e:
+            with corrida.activa():
+                mostrar_imagen(filepath, "Superficies Equipotenciales")
+            mostrar_resumen(corrida.finalizar())
+
+        def al_fallar(e, traza):
+            corrida.finalizar('error')
             messagebox.showerror("Error", f"No se pudo generar el gráfico: {str(e)}")
+
+        ejecutor.iniciar([('equipotenciales', "Superficies equipotenciales",
+                           lambda: cache_resultados().calcular(graficar_superficies_equipotenciales,
+                                                               cargas_filtradas, rango=rango,
+                                                               incremental=True,
+                                                               en_memoria=True))],
+                         al_terminar, al_fallar, corrida)
         
     except Exception as e:
         messagebox.showerror("Error", f"Error inesperado: {str(e)}")
@@ -969,6 +1074,7 @@ def graficar_superposicion():
     Construye la lista de cargas desde la UI y muestra la superposición
     de equipotenciales + líneas de campo (para ver el corte a 90°).
     """
+    corrida = Corrida('superposicion')
     try:
         # leer cargas y coords (mismo esquema que graficar_equipotenciales)
         cargas = []
@@ -995,15 +1101,70 @@ def graficar_superposicion():
         cx = (min(xs) + max(xs)) / 2
         rango = (cx - rango_max - margen, cx + rango_max + margen)
 
-        # graficar
-        filepath = graficar_superposicion_equipotenciales_y_campo(cargas, rango=rango)
-
-        print(f"Gráfico superpuesto guardado en: {filepath}")
-        mostrar_imagen(filepath, "Equipotenciales + Líneas de Campo (90°)")
+        corrida.registrar('validacion', time.perf_counter() - corrida.inicio)
+
+        # graficar en segundo plano
+        def al_terminar(resultados):
+            filepath = resultados['superposicion']
+            print(f"Gráfico superpuesto guardado en: {filepath}")
+            with corrida.activa():
+                mostrar_imagen(filepath, "Equipotenciales + Líneas de Campo (90°)")
+            mostrar_resumen(corrida.finalizar())
+
+        def al_fallar(e, traza):
+            corrida.finalizar('error')
+            messagebox.showerror("Error", f"No se pudo generar el gráfico superpuesto: {str(e)}")
+
+        ejecutor.iniciar([('superposicion', "Equipotenciales y líneas de campo",
+                           lambda: cache_resultados().calcular(
+                               graficar_superposicion_equipotenciales_y_campo, cargas, rango=rango,
+                               incremental=True, en_memoria=True))],
+                         al_terminar, al_fallar, corrida)
     except Exception as e:
         messagebox.showerror("Error", f"No se pudo generar el gráfico superpuesto: {str(e)}")
 
 
+def abrir_modo_interactivo():
+    """
+    Abre una ventana donde las cargas se arrastran con el mouse. Al soltar
+    una carga, su nueva posición se copia a las entradas de coordenadas.
+    """
+    cargas, _ = leer_cargas_y_punto()
+    if cargas is None:
+        messagebox.showerror("Error", "Ingrese cargas y coordenadas válidas para las 3 cargas")
+        return
+
+    # Rango cuadrado alrededor de las cargas, como en las equipotenciales
+    xs = [x for _, x, _ in cargas]; ys = [y for _, _, y in cargas]
+    margen = 2.0
+    rango_max = max(max(xs) - min(xs), max(ys) - min(ys)) / 2 + margen
+    cx = (min(xs) + max(xs)) / 2
+    rango = (cx - rango_max - margen, cx + rango_max + margen)
+
+    ventana = Toplevel()
+    ventana.title("Modo Interactivo - Arrastrar Cargas")
+    ventana.configure(bg="white")
+
+    def al_soltar(cargas_nuevas):
+        for entrada, (_, x, y) in zip((carga1_xy, carga2_xy, carga3_xy), cargas_nuevas):
+            entrada.delete(0, 'end')
+            entrada.insert(0, f"{x:.3f}, {y:.3f}")
+
+    from interactivo import ExploradorInteractivo
+    explorador = ExploradorInteractivo(ventana, cargas, rango=rango, al_soltar=al_soltar)
+    explorador.widget.pack(fill="both", expand=True)
+    # También sigue los cambios escritos en las entradas
+    vistas_en_vivo.append(explorador)
+
+    def cerrar():
+        vistas_en_vivo.remove(explorador)
+        explorador.cerrar()
+        ventana.destroy()
+
+    Button(ventana, text="Cerrar", command=cerrar,
+           font=("Arial", 12, "bold"), bg="#f0f0f0").pack(pady=10)
+    ventana.protocol("WM_DELETE_WINDOW", cerrar)
+
 def mostrar_imagen(filepath, title="Imagen"):
     """Muestra una imagen en una nueva ventana redimensionándola a la pantalla."""
     try:
@@ -1027,20 +1188,17 @@ def mostrar_imagen(filepath, title="Imagen"):
         
         # Cargar imagen
         # Asegurarse de que la ruta sea absoluta
-        if not os.path.isabs(filepath):
+        if isinstance(filepath, str) and not os.path.isabs(filepath):
             project_root = os.path.dirname(os.path.dirname(__file__))
             filepath = os.path.join(project_root, filepath)
 
-        img = Image.open(filepath)
         # Redimensionar manteniendo relación de aspecto si excede el tamaño permitido
-        if img.width > graph_width - 40 or img.height > graph_height - 80:
-            img.thumbnail((graph_width - 40, graph_height - 80), Image.Resampling.LANCZOS)
-
-        photo = ImageTk.PhotoImage(img)
-
-        # Mantener referencia a la imagen
-        global photo_references
-        photo_references.append(photo)
+        # (el caché mantiene la referencia mientras la ventana esté abierta)
+        from PIL import Image
+        from imagenes_tk import cache_imagenes
+        photo = cache_imagenes.obtener(filepath, (graph_width - 40, graph_height - 80),
+                                       dueno=ventana, resample=Image.Resampling.LANCZOS)
+        cache_imagenes.liberar_al_cerrar(ventana)
 
         # Posicionar ventana y ajustar tamaño
         ventana.geometry(f"{graph_width}x{graph_height}+{x_position}+{margin}")
@@ -1148,6 +1306,67 @@ def calcular_potencial_solo_ui():
         messagebox.showerror("Error de cálculo", f"Error al calcular el potencial eléctrico: {str(e)}")
         print(f"Error: {e}")
 
+def mostrar_resumen(corrida):
+    """Muestra en la barra de estado los tiempos de las etapas más lentas."""
+    label_resultado.config(text=corrida.resumen(), fg='#27ae60')
+
+def leer_cargas_y_punto():
+    """
+    Lee cargas y punto de las entradas sin mostrar mensajes de error.
+
+    Retorna: (cargas, (x_punto, y_punto)); cargas es None si no son válidas
+    y el punto es None si no se puede interpretar
+    """
+    try:
+        punto = parsear_coordenadas(entry_punto.get().strip())
+    except ValueError:
+        punto = None
+
+    valores = [carga1.get().strip(), carga2.get().strip(), carga3.get().strip()]
+    try:
+        es_valido, _ = validar_cargas(*valores)
+        posiciones = [parsear_coordenadas(e.get().strip()) for e in (carga1_xy, carga2_xy, carga3_xy)]
+    except ValueError:
+        es_valido = False
+    if not es_valido:
+        return None, punto
+    return [(float(q), x, y) for q, (x, y) in zip(valores, posiciones)], punto
+
+def actualizar_vistas_en_vivo():
+    """Lleva los datos de las entradas a los gráficos vivos abiertos."""
+    _actualizacion_pendiente["id"] = None
+    cargas, punto = leer_cargas_y_punto()
+    if punto is None:
+        return
+    for vista in vistas_en_vivo:
+        if cargas is not None:
+            vista.actualizar(cargas, *punto)
+        else:
+            vista.actualizar_punto(*punto)
+
+def al_cambiar_entrada(entrada):
+    """
+    El cálculo en segundo plano ya no sirve: se cancela. Los gráficos vivos
+    se actualizan cuando las entradas dejan de cambiar por un momento.
+    """
+    ejecutor.cancelar()
+    if not vistas_en_vivo:
+        return
+    if _actualizacion_pendiente["id"] is not None:
+        entrada.after_cancel(_actualizacion_pendiente["id"])
+    _actualizacion_pendiente["id"] = entrada.after(30, actualizar_vistas_en_vivo)
+
+def vigilar_cambios(entrada):
+    """
+    Reacciona cada vez que cambia el texto de la entrada (escrito por el
+    usuario o cargado desde la configuración), ver al_cambiar_entrada.
+    """
+    variable = StringVar(value=entrada.get())
+    entrada.config(textvariable=variable)
+    # Mantener referencia: si la variable se libera, la entrada se desvincula
+    entrada.variable = variable
+    variable.trace_add('write', lambda *_: al_cambiar_entrada(entrada))
+
 def crear_interfaz():
     global carga1, carga2, carga3, carga1_xy, carga2_xy, carga3_xy, entry_punto, label_resultado, frame_cargas
 
@@ -1272,6 +1491,11 @@ def crear_interfaz():
            command=graficar_superposicion,
            font=('Arial', 10, 'bold'), bg='#d0f0ff', pady=8).pack(pady=5)
 
+    # Botón para el modo interactivo
+    Button(equipotencial_frame, text="Modo Interactivo: Arrastrar Cargas",
+           command=abrir_modo_interactivo,
+           font=('Arial', 10, 'bold'), bg='#fde2b8', pady=8).pack(pady=5)
+
     # Instrucciones para el usuario
     instrucciones_frame = Frame(content_frame)
     instrucciones_frame.grid(row=8, column=0, columnspan=4, pady=10)
@@ -1284,6 +1508,7 @@ def crear_interfaz():
                          "• Calcular Potencial Eléctrico: Calcula V(x,y) numéricamente y muestra gráfico de equipotenciales\n"
                          "• Graficar Superficies Equipotenciales: Genera gráfico de contorno del potencial eléctrico\n"
                          "• Superponer: Campo + Equipotenciales: Muestra líneas de campo y equipotenciales en un solo gráfico\n"
+                         "• Modo Interactivo: Arrastre las cargas y vea |E|, equipotenciales y equilibrios al instante\n"
                          "• Formato de cargas: notación científica (ej: 3e-6 para 3×10⁻⁶ C)\n"
                          "• Formato de coordenadas: x, y (ej: 0.1, 0.2)")
     
@@ -1294,8 +1519,51 @@ def crear_interfaz():
     label_resultado = Label(content_frame, text="", font=('Arial', 12), fg='#FFFFFF', justify='left')
     label_resultado.grid(row=9, column=0, columnspan=4, padx=10, pady=10)
 
+    # Progreso del cálculo en segundo plano y botón para cancelarlo
+    progreso_frame = Frame(content_frame)
+    progreso_frame.grid(row=10, column=0, columnspan=4, pady=(0, 10))
+
+    barra_progreso = ttk.Progressbar(progreso_frame, mode='determinate', length=300)
+    barra_progreso.pack(side='left', padx=5)
+
+    boton_cancelar = Button(progreso_frame, text="Cancelar cálculo", state='disabled',
+                            command=lambda: ejecutor.cancelar(),
+                            font=('Arial', 10), bg='#f5b7b1', pady=3)
+    boton_cancelar.pack(side='left', padx=5)
+
+    def al_progresar(indice, total, descripcion):
+        """Muestra la etapa en curso; indice None = cancelado o con error."""
+        if indice is None:
+            barra_progreso['value'] = 0
+            label_resultado.config(text=descripcion, fg='gray')
+            boton_cancelar.config(state='disabled')
+        elif indice >= total:
+            barra_progreso['value'] = barra_progreso['maximum']
+            label_resultado.config(text=descripcion, fg='#27ae60')
+            boton_cancelar.config(state='disabled')
+        else:
+            barra_progreso.config(maximum=total, value=indice)
+            label_resultado.config(text=f"Etapa {indice + 1}/{total}: {descripcion}...",
+                                   fg='#2c3e50')
+            boton_cancelar.config(state='normal')
+
+    global ejecutor
+    ejecutor = EjecutorTareas(root, al_progresar)
+
+    # Si el usuario cambia los datos, el cálculo en curso ya no sirve
+    for entrada in (carga1, carga2, carga3, carga1_xy, carga2_xy, carga3_xy, entry_punto):
+        vigilar_cambios(entrada)
+
+    # Tiempo de arranque: desde que empieza el programa hasta que la ventana está lista
+    def informar_arranque():
+        print(f"Interfaz lista en {time.perf_counter() - _inicio_programa:.2f} s")
+    root.after_idle(informar_arranque)
+
     root.mainloop()
 
 
 if __name__ == "__main__":
+    # Las corridas medidas se emiten como logs 'fisica.instrumentacion' (JSON)
+    logging.basicConfig(format='%(asctime)s %(name)s: %(message)s')
+    logging.getLogger('fisica').setLevel(logging.INFO)
     crear_interfaz()
\ No newline at end of file
@@ -0,0 +1,739 @@
+"""
+malla.py
+Evaluación del potencial y del campo sobre mallas regulares por bloques.
+
+La malla se recorre en bloques de tamaño fijo, así que la memoria de trabajo
+no depende de num_puntos. Los resultados se guardan en arrays en memoria o,
+si se indica un directorio, en archivos .npy abiertos como np.memmap, que
+después pueden leerse de a partes con abrir_malla.
+
+Con procesos > 1 los bloques se reparten entre procesos que escriben directo
+en memoria compartida (o en los archivos np.memmap), sin devolver arrays
+grandes por pickle. Cada bloque se calcula igual que en serie, así que el
+resultado es idéntico bit a bit.
+
+MallaPorCarga guarda además la capa (V, Ex, Ey) de cada carga por separado:
+mover, agregar o quitar una carga resta su capa vieja y suma la nueva, sin
+recalcular las demás.
+"""
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from logic import K, ConjuntoCargas, calcular_campo_y_potencial_lote
+
+
+class MallaEvaluada:
+    """
+    Resultado de evaluar_malla: ejes y arrays (ny, nx) de V, Ex y Ey.
+
+    Los arrays pueden ser np.memmap (si se usó un directorio); en ese caso
+    sólo se leen del disco las partes que se usan.
+
+    Atributos:
+    - x, y: ejes de la malla [m]
+    - V: potencial [V]
+    - Ex, Ey: componentes del campo [N/C] (None si no se calcularon)
+    - directorio: carpeta con los archivos .npy o None si está en memoria
+    """
+
+    def __init__(self, x, y, V, Ex=None, Ey=None, directorio=None):
+        self.x = x
+        self.y = y
+        self.V = V
+        self.Ex = Ex
+        self.Ey = Ey
+        self.directorio = directorio
+
+    def submuestreo(self, max_lado):
+        """
+        Vistas de la malla tomando un punto cada `paso`, de modo que ningún
+        lado supere max_lado puntos. No copia ni lee la malla entera.
+
+        Retorna: (x, y, V, Ex, Ey) con Ex/Ey en None si no se calcularon
+        """
+        paso = max(1, math.ceil(max(len(self.x), len(self.y)) / max_lado))
+        recorte = (slice(None, None, paso), slice(None, None, paso))
+        Ex = self.Ex[recorte] if self.Ex is not None else None
+        Ey = self.Ey[recorte] if self.Ey is not None else None
+        return self.x[::paso], self.y[::paso], self.V[recorte], Ex, Ey
+
+    def guardar(self):
+        """Baja a disco los datos pendientes de los arrays np.memmap."""
+        for arr in (self.V, self.Ex, self.Ey):
+            if isinstance(arr, np.memmap):
+                arr.flush()
+
+
+def _bloque_directo(cargas, X, Y, eps, eps_en_radio, campo):
+    """
+    Suma directa sobre un bloque de la malla con el suavizado de los gráficos:
+    r² + eps (por defecto) o r + eps si eps_en_radio es True.
+    """
+    forma = np.broadcast_shapes(X.shape, Y.shape)
+    V = np.zeros(forma)
+    Ex = np.zeros(forma) if campo else None
+    Ey = np.zeros(forma) if campo else None
+
+    for q, xc, yc in zip(cargas.q, cargas.x, cargas.y):
+        dx = X - xc
+        dy = Y - yc
+        if eps_en_radio:
+            r = np.sqrt(dx**2 + dy**2) + eps
+            r2 = r * r
+        else:
+            r2 = dx*dx + dy*dy + eps
+            r = np.sqrt(r2)
+
+        V += K * q / r
+        if campo:
+            Ex += K * q * dx / (r2 * r)
+            Ey += K * q * dy / (r2 * r)
+
+    return V, Ex, Ey
+
+
+def _preparar_metodo(cargas, x, y, metodo, opciones_metodo):
+    """
+    Con 'barnes_hut' o 'fmm', construye una sola vez el árbol o las expansiones
+    para toda la malla; cada bloque después sólo los consulta.
+
+    Retorna: (cargas o el árbol/expansión, opciones para cada bloque)
+    """
+    if metodo == 'barnes_hut':
+        from barnes_hut import N_DIRECTO, ArbolCuadrantes
+        if len(cargas) > N_DIRECTO:
+            return ArbolCuadrantes(cargas), opciones_metodo
+    elif metodo == 'fmm':
+        from fmm import N_DIRECTO, ExpansionFMM
+        if len(cargas) > N_DIRECTO:
+            expansion = ExpansionFMM(cargas, (x[0], x[-1], y[0], y[-1]),
+                                     orden=opciones_metodo.get('orden'),
+                                     tolerancia=opciones_metodo.get('tolerancia', 1e-6),
+                                     n_puntos=len(x) * len(y))
+            return expansion, {}
+    return cargas, opciones_metodo
+
+
+def _evaluar_bloque(cargas, x, y, eps, eps_en_radio, campo, metodo, opciones_metodo):
+    """
+    Evalúa un bloque con ejes x (columnas) e y (filas). Con 'barnes_hut' o
+    'fmm', cargas puede ser el árbol o la expansión de _preparar_metodo.
+    """
+    X = x[None, :]
+    Y = y[:, None]
+    if metodo == 'directo':
+        return _bloque_directo(cargas, X, Y, eps, eps_en_radio, campo)
+
+    Ex, Ey, _, _, V = calcular_campo_y_potencial_lote(cargas, X, Y, metodo=metodo,
+                                                      **opciones_metodo)
+    return V, (Ex if campo else None), (Ey if campo else None)
+
+
+class MallaPorCarga:
+    """
+    Malla con la contribución de cada carga guardada en su propia capa.
+
+    Los totales V, Ex, Ey son la suma de las capas. Cambiar una carga cuesta
+    lo mismo que evaluar una sola carga sobre la malla (1/N de recalcular
+    todo con N cargas), a cambio de guardar N capas en memoria.
+
+    Parámetros: como en evaluar_malla (sólo suma directa, en memoria)
+    """
+
+    # Cada tantas ediciones los totales se vuelven a sumar desde las capas,
+    # para que los redondeos de restar y sumar no se acumulen
+    EDICIONES_POR_RESUMA = 256
+
+    def __init__(self, cargas=(), rango=(-5, 5), num_puntos=100, rango_y=None, campo=True,
+                 eps=1e-9, eps_en_radio=False):
+        nx, ny = (num_puntos, num_puntos) if np.isscalar(num_puntos) else num_puntos
+        rango_y = rango if rango_y is None else rango_y
+        self.x = np.linspace(rango[0], rango[1], nx)
+        self.y = np.linspace(rango_y[0], rango_y[1], ny)
+        self.campo = campo
+        self.eps = eps
+        self.eps_en_radio = eps_en_radio
+
+        self.V = np.zeros((ny, nx))
+        self.Ex = np.zeros((ny, nx)) if campo else None
+        self.Ey = np.zeros((ny, nx)) if campo else None
+        self._cargas = []
+        self._capas = []
+        self._ediciones = 0
+        for carga in ConjuntoCargas.desde(cargas) if len(cargas) else ():
+            self.agregar(carga)
+
+    @property
+    def cargas(self):
+        """Lista de tuplas (carga, x, y) en el orden de las capas."""
+        return list(self._cargas)
+
+    def __len__(self):
+        return len(self._cargas)
+
+    def _capa(self, carga):
+        X = self.x[None, :]
+        Y = self.y[:, None]
+        return _bloque_directo(ConjuntoCargas.desde([carga]), X, Y, self.eps,
+                               self.eps_en_radio, self.campo)
+
+    def _sumar(self, capa, signo):
+        for total, parte in zip((self.V, self.Ex, self.Ey), capa):
+            if total is None:
+                continue
+            if signo > 0:
+                total += parte
+            else:
+                total -= parte
+
+    def _editado(self):
+        self._ediciones += 1
+        if self._ediciones >= self.EDICIONES_POR_RESUMA:
+            self.resumar()
+
+    def agregar(self, carga):
+        """
+        Agrega una carga (tupla (q, x, y)) y suma su capa.
+
+        Retorna: índice de la carga
+        """
+        carga = tuple(float(v) for v in carga)
+        capa = self._capa(carga)
+        self._cargas.append(carga)
+        self._capas.append(capa)
+        self._sumar(capa, +1)
+        self._editado()
+        return len(self._cargas) - 1
+
+    def quitar(self, i):
+        """Quita la carga i y resta su capa."""
+        self._sumar(self._capas.pop(i), -1)
+        self._cargas.pop(i)
+        self._editado()
+
+    def reemplazar(self, i, carga):
+        """Cambia la carga i (valor o posición): resta la capa vieja y suma la nueva."""
+        carga = tuple(float(v) for v in carga)
+        if carga == self._cargas[i]:
+            return
+        capa = self._capa(carga)
+        self._sumar(self._capas[i], -1)
+        self._sumar(capa, +1)
+        self._cargas[i] = carga
+        self._capas[i] = capa
+        self._editado()
+
+    def mover(self, i, x, y):
+        """Mueve la carga i a (x, y)."""
+        self.reemplazar(i, (self._cargas[i][0], x, y))
+
+    def actualizar(self, cargas):
+        """
+        Lleva la malla a otra lista de cargas recalculando sólo las capas que
+        cambiaron (comparando posición por posición).
+
+        Retorna: cantidad de capas recalculadas
+        """
+        cargas = list(ConjuntoCargas.desde(cargas)) if len(cargas) else []
+        recalculadas = 0
+        for i, carga in enumerate(cargas[:len(self._cargas)]):
+            if carga != self._cargas[i]:
+                self.reemplazar(i, carga)
+                recalculadas += 1
+        while len(self._cargas) > len(cargas):
+            self.quitar(len(self._cargas) - 1)
+        for carga in cargas[len(self._cargas):]:
+            self.agregar(carga)
+            recalculadas += 1
+        return recalculadas
+
+    def resumar(self):
+        """Vuelve a calcular los totales como suma de las capas."""
+        for k, total in enumerate((self.V, self.Ex, self.Ey)):
+            if total is None:
+                continue
+            total[...] = 0.0
+            for capa in self._capas:
+                total += capa[k]
+        self._ediciones = 0
+
+    @property
+    def nbytes(self):
+        """Memoria ocupada por los totales y las capas [bytes]."""
+        arrays = [self.V, self.Ex, self.Ey] + [parte for capa in self._capas for parte in capa]
+        return sum(arr.nbytes for arr in arrays if arr is not None)
+
+    def como_malla(self):
+        """
+        Retorna: MallaEvaluada con una copia de los totales (las ediciones
+        siguientes no la modifican)
+        """
+        copiar = lambda arr: None if arr is None else arr.copy()
+        return MallaEvaluada(self.x, self.y, self.V.copy(), copiar(self.Ex), copiar(self.Ey))
+
+
+# Últimas MallaPorCarga usadas por evaluar_malla(incremental=True), por malla
+_mallas_incrementales = OrderedDict()
+_candado_incremental = threading.Lock()
+MAX_MALLAS_INCREMENTALES = 4
+# Tope de memoria de todas las capas guardadas; una malla que sola lo supera
+# no se guarda
+MAX_BYTES_INCREMENTALES = 256 * 2**20
+
+
+def _evaluar_incremental(cargas, rango, num_puntos, rango_y, campo, eps, eps_en_radio):
+    """evaluar_malla reusando las capas de la última evaluación con la misma malla."""
+    clave = (tuple(rango), num_puntos if np.isscalar(num_puntos) else tuple(num_puntos),
+             None if rango_y is None else tuple(rango_y), campo, eps, eps_en_radio)
+    with _candado_incremental:
+        malla = _mallas_incrementales.pop(clave, None)
+        if malla is None:
+            malla = MallaPorCarga((), rango, num_puntos, rango_y, campo, eps, eps_en_radio)
+        malla.actualizar(cargas)
+        _mallas_incrementales[clave] = malla
+        while _mallas_incrementales and (
+                len(_mallas_incrementales) > MAX_MALLAS_INCREMENTALES
+                or sum(m.nbytes for m in _mallas_incrementales.values())
+                > MAX_BYTES_INCREMENTALES):
+            _mallas_incrementales.popitem(last=False)
+        return malla.como_malla()
+
+
+def limpiar_mallas_incrementales():
+    """Descarta las capas guardadas por evaluar_malla(incremental=True)."""
+    with _candado_incremental:
+        _mallas_incrementales.clear()
+
+
+def _bloques(ny, nx, tam_bloque):
+    """Recorre la malla en bloques: (fila_ini, fila_fin, col_ini, col_fin)."""
+    for i0 in range(0, ny, tam_bloque):
+        for j0 in range(0, nx, tam_bloque):
+            yield i0, min(i0 + tam_bloque, ny), j0, min(j0 + tam_bloque, nx)
+
+
+# Estado de cada proceso trabajador (se inicializa una vez por proceso)
+_trabajador = {}
+
+
+def _iniciar_trabajador(q, xc, yc, x, y, destinos, parametros):
+    """
+    Prepara el proceso trabajador: método de evaluación y arrays de salida.
+    destinos: {nombre: ('shm', nombre_shm) | ('npy', ruta)}
+    Los .npy se abren acá; la memoria compartida se abre en cada bloque (ver
+    _calcular_bloque_trabajador).
+    """
+    eps, eps_en_radio, campo, metodo, opciones_metodo = parametros
+    # El árbol o las expansiones se construyen una vez por proceso
+    fuente, opciones_metodo = _preparar_metodo(ConjuntoCargas(q, xc, yc), x, y, metodo,
+                                               opciones_metodo)
+    _trabajador['cargas'] = fuente
+    _trabajador['x'] = x
+    _trabajador['y'] = y
+    _trabajador['parametros'] = (eps, eps_en_radio, campo, metodo, opciones_metodo)
+    _trabajador['salidas'] = {}
+    _trabajador['compartidas'] = {}
+    for nombre, (tipo, origen) in destinos.items():
+        if tipo == 'shm':
+            _trabajador['compartidas'][nombre] = origen
+        else:
+            _trabajador['salidas'][nombre] = np.load(origen, mmap_mode='r+')
+
+
+def _calcular_bloque_trabajador(bloque):
+    """
+    Calcula un bloque en el proceso trabajador y lo escribe en su lugar.
+
+    La memoria compartida se abre y se cierra en cada bloque: el proceso no
+    tiene un punto de salida donde cerrarla, y abrirla cuesta mucho menos
+    que calcular el bloque.
+    """
+    i0, i1, j0, j1 = bloque
+    v, ex, ey = _evaluar_bloque(_trabajador['cargas'], _trabajador['x'][j0:j1],
+                                _trabajador['y'][i0:i1], *_trabajador['parametros'])
+    forma = (len(_trabajador['y']), len(_trabajador['x']))
+    salidas = dict(_trabajador['salidas'])
+    abiertas = []
+    try:
+        for nombre, origen in _trabajador['compartidas'].items():
+            shm = shared_memory.SharedMemory(name=origen)
+            abiertas.append(shm)
+            salidas[nombre] = np.ndarray(forma, dtype=np.float64, buffer=shm.buf)
+        salidas['V'][i0:i1, j0:j1] = v
+        if ex is not None:
+            salidas['Ex'][i0:i1, j0:j1] = ex
+            salidas['Ey'][i0:i1, j0:j1] = ey
+        for arr in salidas.values():
+            if isinstance(arr, np.memmap):
+                arr.flush()
+    finally:
+        # Las vistas sobre el buffer tienen que soltarse antes de cerrarlo
+        salidas.clear()
+        for shm in abiertas:
+            shm.close()
+
+
+def _evaluar_en_paralelo(cargas, x, y, nombres, directorio, procesos, tam_bloque, parametros):
+    """
+    Reparte los bloques entre procesos. Con directorio, los trabajadores
+    escriben en los mismos archivos .npy; si no, en memoria compartida que al
+    final se copia a arrays comunes.
+
+    Retorna: {nombre: array} con las salidas completas
+    """
+    forma = (len(y), len(x))
+    salidas = {}
+    destinos = {}
+    compartidas = {}
+    try:
+        for nombre in nombres:
+            if directorio is not None:
+                salidas[nombre] = _crear_salida(directorio, nombre, forma)
+                salidas[nombre].flush()
+                destinos[nombre] = ('npy', os.path.join(directorio, f'{nombre}.npy'))
+            else:
+                shm = shared_memory.SharedMemory(create=True, size=max(8 * forma[0] * forma[1], 1))
+                compartidas[nombre] = shm
+                destinos[nombre] = ('shm', shm.name)
+
+        bloques = list(_bloques(forma[0], forma[1], tam_bloque))
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_trabajador,
+                                 initargs=(cargas.q, cargas.x, cargas.y, x, y,
+                                           destinos, parametros)) as pool:
+            for _ in pool.map(_calcular_bloque_trabajador, bloques,
+                              chunksize=max(1, len(bloques) // (4 * procesos))):
+                pass
+
+        for nombre, shm in compartidas.items():
+            salidas[nombre] = np.ndarray(forma, dtype=np.float64, buffer=shm.buf).copy()
+    finally:
+        for shm in compartidas.values():
+            shm.close()
+            shm.unlink()
+
+    return salidas
+
+
+def _crear_salida(directorio, nombre, forma):
+    if directorio is None:
+        return np.empty(forma)
+    return np.lib.format.open_memmap(os.path.join(directorio, f'{nombre}.npy'),
+                                     mode='w+', dtype=np.float64, shape=forma)
+
+
+def evaluar_malla(cargas, rango=(-5, 5), num_puntos=100, rango_y=None, campo=True,
+                  eps=1e-9, eps_en_radio=False, tam_bloque=512, directorio=None,
+                  procesos=1, metodo='directo', incremental=False, **opciones_metodo):
+    """
+    Calcula V (y opcionalmente Ex, Ey) sobre una malla regular, por bloques.
+
+    Con metodo='directo' se usa el suavizado de los gráficos de malla
+    (r² + eps, o r + eps si eps_en_radio). Con 'barnes_hut' o 'fmm' el árbol
+    o las expansiones se construyen una vez para toda la malla (una por
+    proceso) y cada bloque los consulta con calcular_campo_y_potencial_lote.
+
+    Parámetros:
+    - cargas: ConjuntoCargas o lista de tuplas [(carga1, x1, y1), ...]
+    - rango: tupla (min, max) del eje x (y también del eje y si no hay rango_y)
+    - num_puntos: puntos por eje, o tupla (nx, ny)
+    - rango_y: tupla (min, max) del eje y
+    - campo: si es False sólo se calcula el potencial
+    - eps, eps_en_radio: suavizado cerca de las cargas (sólo 'directo')
+    - tam_bloque: lado del bloque; acota la memoria de trabajo
+    - directorio: si se indica, los resultados se escriben allí como .npy (np.memmap)
+    - procesos: cantidad de procesos para repartir los bloques (None = todos los
+      núcleos); el resultado es el mismo que en serie
+    - metodo, opciones_metodo: ver calcular_campo_y_potencial_lote
+    - incremental: con suma directa en memoria y un solo proceso, reusar las
+      capas por carga de la última llamada con la misma malla (MallaPorCarga):
+      sólo se recalculan las cargas que cambiaron. Se guardan a lo sumo
+      MAX_MALLAS_INCREMENTALES mallas y MAX_BYTES_INCREMENTALES bytes
+
+    Retorna: MallaEvaluada
+    """
+    cargas = ConjuntoCargas.desde(cargas)
+    if incremental and metodo == 'directo' and directorio is None and procesos == 1:
+        return _evaluar_incremental(cargas, rango, num_puntos, rango_y, campo, eps, eps_en_radio)
+    nx, ny = (num_puntos, num_puntos) if np.isscalar(num_puntos) else num_puntos
+    rango_y = rango if rango_y is None else rango_y
+    x = np.linspace(rango[0], rango[1], nx)
+    y = np.linspace(rango_y[0], rango_y[1], ny)
+
+    if directorio is not None:
+        os.makedirs(directorio, exist_ok=True)
+        np.savez(os.path.join(directorio, 'ejes.npz'), x=x, y=y)
+        with open(os.path.join(directorio, 'malla.json'), 'w', encoding='utf-8') as f:
+            json.dump({'nx': nx, 'ny': ny, 'campo': campo, 'metodo': metodo}, f)
+
+    nombres = ('V', 'Ex', 'Ey') if campo else ('V',)
+    parametros = (eps, eps_en_radio, campo, metodo, opciones_metodo)
+    procesos = os.cpu_count() if procesos is None else procesos
+
+    if procesos > 1:
+        salidas = _evaluar_en_paralelo(cargas, x, y, nombres, directorio, procesos,
+                                       tam_bloque, parametros)
+    else:
+        salidas = {nombre: _crear_salida(directorio, nombre, (ny, nx)) for nombre in nombres}
+        fuente, opciones_bloque = _preparar_metodo(cargas, x, y, metodo, opciones_metodo)
+        parametros = (eps, eps_en_radio, campo, metodo, opciones_bloque)
+        for i0, i1, j0, j1 in _bloques(ny, nx, tam_bloque):
+            v, ex, ey = _evaluar_bloque(fuente, x[j0:j1], y[i0:i1], *parametros)
+            salidas['V'][i0:i1, j0:j1] = v
+            if campo:
+                salidas['Ex'][i0:i1, j0:j1] = ex
+                salidas['Ey'][i0:i1, j0:j1] = ey
+
+    V = salidas['V']
+    Ex = salidas.get('Ex')
+    Ey = salidas.get('Ey')
+    malla = MallaEvaluada(x, y, V, Ex, Ey, directorio)
+    malla.guardar()
+    return malla
+
+
+def abrir_malla(directorio):
+    """
+    Abre una malla escrita por evaluar_malla sin cargarla en memoria.
+
+    Parámetros:
+    - directorio: carpeta usada en evaluar_malla
+
+    Retorna: MallaEvaluada con arrays np.memmap de sólo lectura
+    """
+    with open(os.path.join(directorio, 'malla.json'), encoding='utf-8') as f:
+        info = json.load(f)
+    ejes = np.load(os.path.join(directorio, 'ejes.npz'))
+
+    def abrir(nombre):
+        return np.load(os.path.join(directorio, f'{nombre}.npy'), mmap_mode='r')
+
+    return MallaEvaluada(ejes['x'], ejes['y'], abrir('V'),
+                         abrir('Ex') if info['campo'] else None,
+                         abrir('Ey') if info['campo'] else None,
+                         directorio)
+
+
+class MallaAdaptativa:
+    """
+    Resultado de malla_adaptativa: nodos dispersos de un quadtree con V en
+    cada uno, y los triángulos que los unen (para tricontour).
+
+    Atributos:
+    - x, y: coordenadas de los nodos [m] (arrays 1D)
+    - V: potencial en los nodos [V]
+    - triangulos: array (m, 3) de índices de nodos
+    - limites: (v_min, v_max) con que se recortó V para decidir el refinamiento
+    - hojas: cantidad de celdas finales del quadtree
+    """
+
+    def __init__(self, x, y, V, triangulos, limites, hojas):
+        self.x = x
+        self.y = y
+        self.V = V
+        self.triangulos = triangulos
+        self.limites = limites
+        self.hojas = hojas
+
+    @property
+    def evaluaciones(self):
+        """Cantidad de puntos donde se evaluó el potencial."""
+        return len(self.V)
+
+
+def _potencial_en_puntos(cargas, x, y, eps, eps_en_radio, metodo, opciones_metodo,
+                         tam_lote=65536):
+    """Potencial en puntos sueltos, con el mismo suavizado que evaluar_malla."""
+    if metodo != 'directo':
+        return calcular_campo_y_potencial_lote(cargas, x, y, metodo=metodo,
+                                               **opciones_metodo)[4]
+    V = np.empty(len(x))
+    for i in range(0, len(x), tam_lote):
+        V[i:i + tam_lote] = _bloque_directo(cargas, x[i:i + tam_lote], y[i:i + tam_lote],
+                                            eps, eps_en_radio, False)[0]
+    return V
+
+
+def _consecutivos(inicio, fin):
+    """
+    Para cada par (inicio, fin), las posiciones inicio, inicio + 1, ..., fin - 1.
+
+    Retorna: (a qué par corresponde cada posición, posiciones)
+    """
+    cuantos = fin - inicio
+    par = np.repeat(np.arange(len(inicio)), cuantos)
+    desde = np.repeat(inicio - (np.cumsum(cuantos) - cuantos), cuantos)
+    return par, desde + np.arange(cuantos.sum())
+
+
+def _triangular_quadtree(claves, n, i0, j0, lado, i1, j1):
+    """
+    Triángulos de las hojas del quadtree, sin triangular de cero los nodos.
+
+    Las hojas con centro evaluado se dividen en abanico desde el centro,
+    pasando por todos los nodos de su borde: también los que agregaron las
+    celdas vecinas más finas, así que la malla queda conforme. Las hojas del
+    nivel más fino (lado 1, sin centro) se parten en dos triángulos.
+
+    Parámetros:
+    - claves: claves ordenadas de los nodos (i * (n + 1) + j)
+    - n: celdas por lado en el nivel más fino
+    - i0, j0, lado: esquina y lado de las hojas con centro
+    - i1, j1: esquina de las hojas de lado 1
+
+    Retorna: array (m, 3) de índices en claves
+    """
+    m = n + 1
+    # Un lado vertical (i fijo) es un tramo consecutivo de claves; un lado
+    # horizontal (j fijo), un tramo consecutivo de las claves traspuestas
+    traspuestas = (claves % m) * m + claves // m
+    orden_filas = np.argsort(traspuestas)
+    traspuestas = traspuestas[orden_filas]
+    por_columnas = np.arange(len(claves))
+
+    centro = np.searchsorted(claves, (i0 + lado // 2) * m + j0 + lado // 2)
+    triangulos = []
+    for i, j, vertical in ((i0, j0, True), (i0 + lado, j0, True),
+                           (i0, j0, False), (i0, j0 + lado, False)):
+        if vertical:
+            ordenadas, indices, inicio = claves, por_columnas, i * m + j
+        else:
+            ordenadas, indices, inicio = traspuestas, orden_filas, j * m + i
+        par, pos = _consecutivos(np.searchsorted(ordenadas, inicio),
+                                 np.searchsorted(ordenadas, inicio + lado))
+        triangulos.append(np.column_stack([centro[par], indices[pos], indices[pos + 1]]))
+
+    a = np.searchsorted(claves, i1 * m + j1)
+    b = np.searchsorted(claves, (i1 + 1) * m + j1)
+    c = np.searchsorted(claves, i1 * m + j1 + 1)
+    d = np.searchsorted(claves, (i1 + 1) * m + j1 + 1)
+    triangulos += [np.column_stack([a, b, d]), np.column_stack([a, d, c])]
+    return np.concatenate(triangulos)
+
+
+def niveles_contorno(v_min, v_max, niveles=20):
+    """
+    Curvas de nivel de los gráficos de equipotenciales: simétricas alrededor
+    de 0 V (que siempre se incluye), hasta el mayor de |v_min| y |v_max|.
+
+    Retorna: array ordenado de niveles
+    """
+    max_abs_v = max(abs(v_min), abs(v_max))
+    v_levels = np.linspace(-max_abs_v, max_abs_v, niveles)
+    if 0.0 not in v_levels:
+        v_levels = np.sort(np.append(v_levels, 0.0))
+    return v_levels
+
+
+def malla_adaptativa(cargas, rango=(-5, 5), rango_y=None, niveles=20, nivel_inicial=6,
+                     nivel_max=11, tolerancia_posicion=1e-4, percentiles=(2, 98), eps=1e-9,
+                     eps_en_radio=True, metodo='directo', **opciones_metodo):
+    """
+    Evalúa el potencial en un quadtree que se refina sólo donde hace falta
+    para dibujar las curvas de nivel: en las celdas que corta alguna curva y
+    donde interpolar linealmente la correría más de tolerancia_posicion.
+
+    Se empieza con una malla regular de 2**nivel_inicial celdas por lado. De
+    cada celda se evalúa el centro; la diferencia con el promedio de las
+    esquinas, dividida por el gradiente estimado en la celda, es cuánto se
+    movería la curva de nivel al interpolar. Si supera la tolerancia, la celda
+    se divide en cuatro. Los nodos compartidos entre celdas se evalúan una
+    sola vez. V se recorta a los percentiles (como en los gráficos), así que
+    la zona saturada alrededor de cada carga no se refina.
+
+    Parámetros:
+    - cargas: ConjuntoCargas o lista de tuplas [(carga1, x1, y1), ...]
+    - rango: tupla (min, max) del eje x (y también del eje y si no hay rango_y)
+    - rango_y: tupla (min, max) del eje y
+    - niveles: cantidad de curvas de nivel (ver niveles_contorno)
+    - nivel_inicial, nivel_max: niveles del quadtree (la celda más chica
+      mide 1/2**nivel_max del rango)
+    - tolerancia_posicion: error aceptado en la posición de las curvas, en
+      fracción del ancho del rango
+    - percentiles: recorte de V, estimado sobre la malla inicial
+    - eps, eps_en_radio: suavizado cerca de las cargas (sólo 'directo')
+    - metodo, opciones_metodo: ver calcular_campo_y_potencial_lote
+
+    Retorna: MallaAdaptativa
+    """
+    cargas = ConjuntoCargas.desde(cargas)
+    rango_y = rango if rango_y is None else rango_y
+    opciones_metodo.pop('procesos', None)   # los nodos se evalúan en un solo proceso
+    n = 2 ** nivel_max
+    hx = (rango[1] - rango[0]) / n
+    hy = (rango_y[1] - rango_y[0]) / n
+
+    # Nodos evaluados: clave entera i * (n + 1) + j en la malla más fina, ordenadas
+    nodos = {'claves': np.empty(0, dtype=np.int64), 'V': np.empty(0)}
+
+    def potencial(i, j):
+        claves = i * (n + 1) + j
+        nuevas = np.setdiff1d(claves, nodos['claves'])
+        if nuevas.size:
+            V = _potencial_en_puntos(cargas, rango[0] + (nuevas // (n + 1)) * hx,
+                                     rango_y[0] + (nuevas % (n + 1)) * hy,
+                                     eps, eps_en_radio, metodo, opciones_metodo)
+            todas = np.concatenate([nodos['claves'], nuevas])
+            orden = np.argsort(todas, kind='stable')
+            nodos['claves'] = todas[orden]
+            nodos['V'] = np.concatenate([nodos['V'], V])[orden]
+        return nodos['V'][np.searchsorted(nodos['claves'], claves)]
+
+    # Malla inicial regular: de ella salen el recorte y las curvas de nivel
+    lado = 2 ** (nivel_max - nivel_inicial)
+    ejes = np.arange(0, n + 1, lado, dtype=np.int64)
+    I, J = np.meshgrid(ejes, ejes, indexing='ij')
+    V_inicial = potencial(I.ravel(), J.ravel())
+    finitos = V_inicial[np.isfinite(V_inicial)]
+    v_min, v_max = np.percentile(finitos, percentiles[0]), np.percentile(finitos, percentiles[1])
+    curvas = niveles_contorno(v_min, v_max, niveles)
+    tolerancia = tolerancia_posicion * (rango[1] - rango[0])
+
+    i0, j0 = I[:-1, :-1].ravel(), J[:-1, :-1].ravel()
+    hojas = []   # (i0, j0, lado) de las celdas que no se dividen
+    while lado > 1 and i0.size:
+        medio = lado // 2
+        # Esquinas, centro y puntos medios de los lados (que son las esquinas
+        # de las hijas si la celda se divide), pedidos todos juntos
+        desplazamientos = ((0, 0), (lado, 0), (0, lado), (lado, lado), (medio, medio),
+                           (medio, 0), (medio, lado), (0, medio), (lado, medio))
+        V = potencial(np.concatenate([i0 + di for di, _ in desplazamientos]),
+                      np.concatenate([j0 + dj for _, dj in desplazamientos]))
+        Va, Vb, Vc, Vd, Vm, Vab, Vcd, Vac, Vbd = np.clip(V, v_min, v_max).reshape(9, -1)
+
+        # ¿Alguna curva de nivel pasa por la celda?
+        valores = [Va, Vb, Vc, Vd, Vm, Vab, Vcd, Vac, Vbd]
+        bajo = np.minimum.reduce(valores)
+        alto = np.maximum.reduce(valores)
+        cortada = np.searchsorted(curvas, bajo) != np.searchsorted(curvas, alto)
+
+        # Corrimiento de la curva al interpolar: error en V / |grad V|
+        gx = (Vb + Vd - Va - Vc) / (2 * lado * hx)
+        gy = (Vc + Vd - Va - Vb) / (2 * lado * hy)
+        error = np.maximum.reduce([np.abs(Vm - (Va + Vb + Vc + Vd) / 4),
+                                   np.abs(Vab - (Va + Vb) / 2), np.abs(Vcd - (Vc + Vd) / 2),
+                                   np.abs(Vac - (Va + Vc) / 2), np.abs(Vbd - (Vb + Vd) / 2)])
+        refinar = cortada & (error > tolerancia * np.hypot(gx, gy))
+
+        hojas.append((i0[~refinar], j0[~refinar], np.full(np.count_nonzero(~refinar), lado)))
+        i0, j0 = i0[refinar], j0[refinar]
+        i0 = np.concatenate([i0, i0 + medio, i0, i0 + medio])
+        j0 = np.concatenate([j0, j0, j0 + medio, j0 + medio])
+        lado = medio
+    # Celdas del nivel más fino: no se dividen, pero sus esquinas son nodos
+    for di, dj in ((0, 0), (lado, 0), (0, lado), (lado, lado)):
+        potencial(i0 + di, j0 + dj)
+
+    claves = nodos['claves']
+    hi, hj, hl = (np.concatenate(partes) for partes in zip(*hojas)) if hojas else \
+        (np.empty(0, dtype=np.int64),) * 3
+    triangulos = _triangular_quadtree(claves, n, hi, hj, hl, i0, j0)
+    return MallaAdaptativa(rango[0] + (claves // (n + 1)) * hx,
+                           rango_y[0] + (claves % (n + 1)) * hy,
+                           nodos['V'], triangulos, (v_min, v_max), len(hi) + len(i0))
@@ -0,0 +1,177 @@
+"""
+muestreo.py
+Muestreo adaptativo de una función a lo largo de una línea, para los
+gráficos E(x) y V(x).
+
+Con una muestra uniforme casi todos los puntos caen donde la curva es una
+recta, y cerca de las cargas el pico queda entre dos muestras (o se recorta
+a una altura que depende de dónde cayeron). Acá se empieza con pocos puntos
+y se agregan sólo donde hacen falta:
+- alrededor de la posición de cada carga, en distancias geométricas;
+- donde la curva se aparta de la recta entre sus vecinos más que una
+  fracción del alto visible del gráfico;
+- donde la curva cruza el cero y donde entra o sale del recorte, hasta
+  ancho_minimo.
+
+Los valores fuera de ±limite se marcan como recortados y se informan los
+tramos recortados (por ejemplo, para sombrearlos en el gráfico).
+"""
+import numpy as np
+
+# Intervalo más chico que se sigue dividiendo, en fracción del rango
+ANCHO_MINIMO_RELATIVO = 1e-6
+
+
+class MuestreoLinea:
+    """
+    Resultado de muestrear_linea.
+
+    Atributos:
+    - x: posiciones ordenadas [m]
+    - valores: valores de la función en x (sin recortar; inf/nan posibles)
+    - recortado: array bool, True donde |valor| > limite o no es finito
+    - recortes: lista de (x_inicio, x_fin) de los tramos recortados
+    - evaluaciones: cantidad de puntos evaluados
+    """
+
+    def __init__(self, x, valores, recortado, recortes):
+        self.x = x
+        self.valores = valores
+        self.recortado = recortado
+        self.recortes = recortes
+
+    @property
+    def evaluaciones(self):
+        return len(self.x)
+
+    def con_huecos(self):
+        """Retorna: copia de los valores con nan en los puntos recortados."""
+        valores = np.array(self.valores, dtype=float)
+        valores[self.recortado] = np.nan
+        return valores
+
+
+def tramos_recortados(x, recortado):
+    """
+    Tramos consecutivos de puntos recortados.
+
+    Retorna: lista de (x_inicio, x_fin)
+    """
+    cambios = np.diff(np.concatenate([[0], recortado.astype(np.int8), [0]]))
+    inicios = np.flatnonzero(cambios == 1)
+    fines = np.flatnonzero(cambios == -1) - 1
+    return [(float(x[i]), float(x[f])) for i, f in zip(inicios, fines)]
+
+
+def puntos_alrededor(centros, rango, anchos_pico=None, por_lado=16, ancho_minimo=None,
+                     max_puntos=1000):
+    """
+    Puntos a distancias geométricas de cada centro (desde el ancho del pico
+    hasta un octavo del rango), dentro del rango. Los centros con un pico más
+    ancho que 1/16 del rango se omiten: la muestra uniforme ya los resuelve.
+
+    Parámetros:
+    - centros: posiciones alrededor de las cuales agregar puntos
+    - rango: tupla (min, max)
+    - anchos_pico: distancia mínima para cada centro (por ejemplo |y| de una
+      carga fuera del eje); None = ancho_minimo para todos
+    - por_lado: puntos a cada lado de cada centro
+    - ancho_minimo: distancia mínima al centro (None = ANCHO_MINIMO_RELATIVO
+      del rango)
+    - max_puntos: tope de puntos; con muchos centros se usan menos por lado
+
+    Retorna: array de posiciones
+    """
+    largo = rango[1] - rango[0]
+    if ancho_minimo is None:
+        ancho_minimo = ANCHO_MINIMO_RELATIVO * largo
+    centros = np.asarray(centros, dtype=float)
+    desde = np.full(centros.size, ancho_minimo, dtype=float)
+    if anchos_pico is not None:
+        desde = np.maximum(np.asarray(anchos_pico, dtype=float), ancho_minimo)
+    angostos = (desde < largo / 16) & (centros >= rango[0]) & (centros <= rango[1])
+    centros, desde = centros[angostos], desde[angostos]
+    por_lado = min(por_lado, max_puntos // max(2 * centros.size, 1))
+    if por_lado < 2:
+        return np.empty(0)
+    puntos = []
+    for centro, inicio in zip(centros, desde):
+        distancias = np.geomspace(inicio, largo / 8, por_lado)
+        puntos += [centro - distancias, centro + distancias]
+    if not puntos:
+        return np.empty(0)
+    puntos = np.concatenate(puntos)
+    return puntos[(puntos >= rango[0]) & (puntos <= rango[1])]
+
+
+def muestrear_linea(funcion, rango, limite, singulares=(), puntos_extra=(),
+                    puntos_iniciales=65, tolerancia=3e-4, ancho_minimo=None,
+                    max_evaluaciones=4000):
+    """
+    Muestrea funcion en rango agregando puntos sólo donde la curva lo necesita.
+
+    Parámetros:
+    - funcion: función(array de x) -> array de valores, vectorizada
+    - rango: tupla (min, max)
+    - limite: los valores con |valor| > limite se consideran recortados; es
+      también el alto visible con el que se mide la tolerancia
+    - singulares: posiciones donde la función diverge (se evalúan como
+      recortadas, para que la curva no una los dos lados)
+    - puntos_extra: posiciones que se evalúan desde el principio (ver
+      puntos_alrededor)
+    - puntos_iniciales: puntos de la muestra uniforme inicial
+    - tolerancia: apartamiento aceptado de la recta entre vecinos, en fracción
+      de 2 * limite
+    - ancho_minimo: intervalo más chico que se sigue dividiendo
+      (None = ANCHO_MINIMO_RELATIVO del rango)
+    - max_evaluaciones: tope de puntos evaluados
+
+    Retorna: MuestreoLinea
+    """
+    largo = rango[1] - rango[0]
+    if ancho_minimo is None:
+        ancho_minimo = ANCHO_MINIMO_RELATIVO * largo
+    singulares = np.asarray([s for s in singulares if rango[0] <= s <= rango[1]], dtype=float)
+
+    x = np.unique(np.concatenate([np.linspace(rango[0], rango[1], puntos_iniciales),
+                                  np.asarray(puntos_extra, dtype=float), singulares]))
+    valores = np.asarray(funcion(x), dtype=float)
+    valores[np.isin(x, singulares)] = np.nan
+
+    while len(x) < max_evaluaciones:
+        recortado = ~np.isfinite(valores) | (np.abs(valores) > limite)
+        visibles = np.clip(np.nan_to_num(valores), -limite, limite)
+        ancho = np.diff(x)
+        divisibles = ancho > 2 * ancho_minimo
+
+        # Entra o sale del recorte, o cruza el cero (también de un recorte al
+        # del otro signo: en el medio puede haber un tramo visible)
+        borde = recortado[:-1] != recortado[1:]
+        cruce = np.sign(visibles[:-1]) * np.sign(visibles[1:]) < 0
+
+        # Apartamiento de cada punto respecto de la recta entre sus vecinos;
+        # si es grande se dividen los dos intervalos que lo rodean
+        t = (x[1:-1] - x[:-2]) / (x[2:] - x[:-2])
+        recta = visibles[:-2] + t * (visibles[2:] - visibles[:-2])
+        curvo = np.abs(visibles[1:-1] - recta) > tolerancia * 2 * limite
+        curvo &= ~(recortado[:-2] | recortado[1:-1] | recortado[2:])
+        curvatura = np.zeros(len(ancho), dtype=bool)
+        curvatura[:-1] |= curvo
+        curvatura[1:] |= curvo
+
+        dividir = np.flatnonzero(divisibles & (borde | cruce | curvatura))
+        if dividir.size == 0:
+            break
+        # Con el tope, primero los intervalos más anchos
+        disponibles = max_evaluaciones - len(x)
+        if dividir.size > disponibles:
+            dividir = dividir[np.argsort(ancho[dividir])[::-1][:disponibles]]
+
+        nuevos = (x[dividir] + x[dividir + 1]) / 2
+        x = np.concatenate([x, nuevos])
+        valores = np.concatenate([valores, np.asarray(funcion(nuevos), dtype=float)])
+        orden = np.argsort(x, kind='stable')
+        x, valores = x[orden], valores[orden]
+
+    recortado = ~np.isfinite(valores) | (np.abs(valores) > limite)
+    return MuestreoLinea(x, valores, recortado, tramos_recortados(x, recortado))
@@ -0,0 +1,148 @@
+"""
+nucleos.py
+Núcleos escalares compilados para los cálculos punto a punto.
+
+Las funciones que se llaman una vez por punto (campo y potencial en un
+punto, desde la interfaz o desde integradores escalares) no ganan nada con
+la vectorización de NumPy. Con el backend 'numba' estos núcleos se compilan
+la primera vez que se usan (y la compilación queda guardada en __pycache__
+para los procesos siguientes); si no, logic.py usa su código NumPy.
+
+El backend se elige en tiempo de ejecución con seleccionar_backend o con la
+variable de entorno FISICA_BACKEND ('auto', 'numba' o 'numpy'); 'auto' usa
+NumPy, que para un punto y pocas cargas es más rápido que Numba. Numba se
+importa recién al compilar el primer núcleo: importarlo tarda más que el
+resto del módulo de física.
+"""
+import importlib.util
+import math
+import os
+
+# Sólo se verifica que esté instalado; se importa en nucleo()
+_numba_instalado = importlib.util.find_spec('numba') is not None
+
+BACKENDS = ('numpy', 'numba')
+
+_estado = {'backend': None, 'nucleos': None}
+
+
+def backends_disponibles():
+    """Retorna: lista con los backends que se pueden usar en esta instalación."""
+    return ['numpy'] + (['numba'] if _numba_instalado else [])
+
+
+def seleccionar_backend(nombre='auto'):
+    """
+    Elige el backend de los núcleos escalares.
+
+    Parámetros:
+    - nombre: 'auto' (NumPy), 'numba' o 'numpy'. Con una carga o pocas, el
+      costo de llamar a un núcleo de Numba (y de convertir la lista de cargas
+      a arrays) supera lo que ahorra, así que 'auto' no lo elige; conviene
+      pedir 'numba' explícitamente para sumas de muchas cargas ya guardadas
+      en un ConjuntoCargas
+
+    Retorna: nombre del backend elegido
+    """
+    if nombre == 'auto':
+        nombre = 'numpy'
+    if nombre not in BACKENDS:
+        raise ValueError(f"Backend desconocido: {nombre}. Opciones: auto, {', '.join(BACKENDS)}")
+    if nombre == 'numba' and not _numba_instalado:
+        raise ValueError("El backend 'numba' requiere tener Numba instalado")
+    _estado['backend'] = nombre
+    return nombre
+
+
+def backend_actual():
+    """Retorna: nombre del backend en uso ('numpy' o 'numba')."""
+    if _estado['backend'] is None:
+        seleccionar_backend(os.environ.get('FISICA_BACKEND', 'auto'))
+    return _estado['backend']
+
+
+# Mismo valor que logic.K; los núcleos lo toman como constante al compilarse
+K = 1 / (4 * math.pi * 8.854187817e-12)
+
+
+# Los núcleos siguen las mismas reglas de singularidad que las funciones
+# equivalentes de logic.py. Están a nivel de módulo para que Numba pueda
+# guardar la compilación en disco (cache=True) y no recompilar en cada proceso.
+
+def _campo_carga(carga, x_carga, y_carga, x_punto, y_punto):
+    dx = x_punto - x_carga
+    dy = y_punto - y_carga
+    r = math.sqrt(dx * dx + dy * dy)
+    if r == 0:
+        return 0.0, 0.0
+    factor = K * carga / (r**3)
+    return factor * dx, factor * dy
+
+
+def _potencial_carga(carga, x_carga, y_carga, x_punto, y_punto):
+    dx = x_punto - x_carga
+    dy = y_punto - y_carga
+    r = math.sqrt(dx * dx + dy * dy)
+    if r == 0:
+        return math.inf if carga > 0 else -math.inf
+    return K * carga / r
+
+
+def _campo_total(q, xc, yc, x_punto, y_punto):
+    Ex_total = 0.0
+    Ey_total = 0.0
+    for i in range(q.shape[0]):
+        dx = x_punto - xc[i]
+        dy = y_punto - yc[i]
+        r = math.sqrt(dx * dx + dy * dy)
+        if r == 0:
+            continue
+        factor = K * q[i] / (r**3)
+        Ex_total += factor * dx
+        Ey_total += factor * dy
+    return Ex_total, Ey_total
+
+
+def _potencial_total(q, xc, yc, x_punto, y_punto):
+    distancia_minima = 1e-6
+    V_total = 0.0
+    for i in range(q.shape[0]):
+        dx = x_punto - xc[i]
+        dy = y_punto - yc[i]
+        r = math.sqrt(dx * dx + dy * dy)
+        if r < distancia_minima:
+            if r == 0:
+                return math.inf if q[i] > 0 else -math.inf
+            r = distancia_minima
+        V_total += K * q[i] / r
+    return V_total
+
+
+_NUCLEOS = {
+    'campo_carga': _campo_carga,
+    'potencial_carga': _potencial_carga,
+    'campo_total': _campo_total,
+    'potencial_total': _potencial_total,
+}
+
+
+def nucleo(nombre):
+    """
+    Núcleo compilado con el backend actual.
+
+    Parámetros:
+    - nombre: 'campo_carga', 'potencial_carga', 'campo_total' o
+      'potencial_total'
+
+    Retorna: función compilada, o None si el backend es 'numpy' (en ese caso
+    se usa el código NumPy de logic.py)
+    """
+    if backend_actual() == 'numpy':
+        return None
+    if _estado['nucleos'] is None:
+        import numba
+        # error_model='numpy': divisiones por cero e infinitos como en NumPy
+        # (inf/nan) en lugar de ZeroDivisionError
+        _estado['nucleos'] = {n: numba.njit(f, cache=True, error_model='numpy')
+                              for n, f in _NUCLEOS.items()}
+    return _estado['nucleos'][nombre]
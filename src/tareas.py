@@ -0,0 +1,164 @@
+"""
+tareas.py
+Ejecución de cálculos en segundo plano para la interfaz gráfica.
+
+Tk no es thread-safe: el hilo de trabajo nunca toca widgets. Cada tarea es
+una lista de etapas que corren en un hilo aparte; el progreso y el resultado
+se dejan en una cola que el hilo de Tk revisa periódicamente con root.after,
+y los callbacks se llaman siempre desde el hilo de Tk.
+
+Sólo hay una tarea vigente por ejecutor: iniciar una nueva cancela la
+anterior, y lo que la tarea cancelada produzca después se descarta.
+"""
+import queue
+import threading
+import traceback
+from contextlib import nullcontext
+
+from instrumentacion import etapa
+
+# pyplot tiene estado global: las etapas de distintos hilos (por ejemplo una
+# tarea cancelada que todavía termina su etapa actual y la tarea nueva) no
+# pueden graficar a la vez.
+_candado_etapas = threading.Lock()
+
+# Cada cuánto revisa la interfaz la cola de mensajes [ms]
+INTERVALO_REVISION = 50
+
+
+class Tarea:
+    """
+    Un trabajo de varias etapas que corre en un hilo aparte.
+
+    Parámetros:
+    - etapas: lista de (clave, descripción, función sin argumentos)
+    - corrida: Corrida de instrumentacion donde medir cada etapa, o None
+    """
+
+    def __init__(self, etapas, corrida=None):
+        self.etapas = list(etapas)
+        self.corrida = corrida
+        self.cancelada = threading.Event()
+        self.mensajes = queue.Queue()
+        self.hilo = threading.Thread(target=self._ejecutar, daemon=True)
+
+    def cancelar(self):
+        """La tarea se detiene antes de empezar su próxima etapa."""
+        self.cancelada.set()
+
+    def _ejecutar(self):
+        resultados = {}
+        total = len(self.etapas)
+        activa = self.corrida.activa() if self.corrida is not None else nullcontext()
+        try:
+            with activa:
+                for i, (clave, descripcion, funcion) in enumerate(self.etapas):
+                    with _candado_etapas:
+                        if self.cancelada.is_set():
+                            self._finalizar_cancelada()
+                            return
+                        self.mensajes.put(('etapa', i, total, descripcion))
+                        with etapa(clave):
+                            resultados[clave] = funcion()
+        except Exception as e:
+            self.mensajes.put(('error', e, traceback.format_exc()))
+            return
+        if self.cancelada.is_set():
+            # Se canceló durante la última etapa: el resultado se descarta
+            self._finalizar_cancelada()
+            return
+        self.mensajes.put(('fin', resultados))
+
+    def _finalizar_cancelada(self):
+        # Desde el hilo de trabajo, cuando ninguna etapa está midiendo
+        if self.corrida is not None:
+            self.corrida.finalizar('cancelada')
+
+
+class EjecutorTareas:
+    """
+    Lanza tareas en segundo plano y entrega sus mensajes en el hilo de Tk.
+
+    Parámetros:
+    - root: ventana principal (para root.after)
+    - al_progresar: función(indice, total, descripcion) llamada al empezar cada
+      etapa; con indice = total al terminar y con indice = None al cancelar
+      o fallar
+    """
+
+    def __init__(self, root, al_progresar=None):
+        self.root = root
+        self.al_progresar = al_progresar
+        self.actual = None
+
+    def ocupado(self):
+        """Retorna: True si hay una tarea vigente sin terminar."""
+        return self.actual is not None
+
+    def iniciar(self, etapas, al_terminar, al_fallar=None, corrida=None):
+        """
+        Cancela la tarea vigente (si hay) y lanza una nueva.
+
+        Parámetros:
+        - etapas: lista de (clave, descripción, función sin argumentos)
+        - al_terminar: función(resultados) con un dict clave -> resultado de la etapa
+        - al_fallar: función(excepción, traza); si no se da, se relanza en Tk
+        - corrida: Corrida de instrumentacion donde medir las etapas, o None.
+          Si la tarea se cancela se finaliza como 'cancelada'; si no, la
+          finaliza quien la creó (en al_terminar o al_fallar)
+
+        Retorna: la Tarea lanzada
+        """
+        self.cancelar()
+        tarea = Tarea(etapas, corrida)
+        tarea.al_terminar = al_terminar
+        tarea.al_fallar = al_fallar
+        self.actual = tarea
+        tarea.hilo.start()
+        self.root.after(INTERVALO_REVISION, self._revisar, tarea)
+        return tarea
+
+    def cancelar(self):
+        """
+        Cancela la tarea vigente. Su resultado, si llega, se descarta.
+
+        Retorna: True si había una tarea para cancelar
+        """
+        tarea, self.actual = self.actual, None
+        if tarea is None:
+            return False
+        tarea.cancelar()
+        self._avisar(None, len(tarea.etapas), 'Cancelado')
+        return True
+
+    def _avisar(self, indice, total, descripcion):
+        if self.al_progresar is not None:
+            self.al_progresar(indice, total, descripcion)
+
+    def _revisar(self, tarea):
+        if tarea is not self.actual:
+            # Tarea cancelada o reemplazada: se abandona su cola
+            return
+        while True:
+            try:
+                mensaje = tarea.mensajes.get_nowait()
+            except queue.Empty:
+                break
+            tipo = mensaje[0]
+            if tipo == 'etapa':
+                _, indice, total, descripcion = mensaje
+                self._avisar(indice, total, descripcion)
+            elif tipo == 'fin':
+                self.actual = None
+                self._avisar(len(tarea.etapas), len(tarea.etapas), 'Listo')
+                tarea.al_terminar(mensaje[1])
+                return
+            elif tipo == 'error':
+                self.actual = None
+                self._avisar(None, len(tarea.etapas), 'Error')
+                _, error, traza = mensaje
+                if tarea.al_fallar is None:
+                    raise error
+                tarea.al_fallar(error, traza)
+                return
+        self.root.after(INTERVALO_REVISION, self._revisar, tarea)
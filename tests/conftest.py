@@ -0,0 +1,9 @@
+"""Los módulos de src/ se importan como en main.py: from logic import ..."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import matplotlib
+
+matplotlib.use('Agg')
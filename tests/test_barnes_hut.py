@@ -0,0 +1,67 @@
+"""
+Barnes–Hut contra la suma directa de calcular_campo_y_potencial_lote.
+"""
+import numpy as np
+import pytest
+
+from barnes_hut import ArbolCuadrantes, evaluar_barnes_hut
+from logic import calcular_campo_y_potencial_lote
+
+
+@pytest.fixture(scope='module')
+def nube():
+    # Más cargas que N_DIRECTO, con ambos signos, para que se use el árbol
+    rng = np.random.default_rng(1)
+    n = 600
+    cargas = list(zip(rng.choice([-1, 1], n) * rng.uniform(1e-9, 1e-8, n),
+                      rng.uniform(-1, 1, n), rng.uniform(-1, 1, n)))
+    px, py = np.meshgrid(np.linspace(-1.5, 1.5, 40), np.linspace(-1.5, 1.5, 40))
+    return cargas, px, py, calcular_campo_y_potencial_lote(cargas, px, py)
+
+
+def errores(aprox, directo):
+    Ex, Ey, _, _, V = aprox
+    Ex_d, Ey_d, magnitud_d, _, V_d = directo
+    error_V = np.linalg.norm(V - V_d) / np.linalg.norm(V_d)
+    error_E = np.linalg.norm(np.hypot(Ex - Ex_d, Ey - Ey_d)) / np.linalg.norm(magnitud_d)
+    return error_V, error_E
+
+
+def test_theta_cero_es_la_suma_directa(nube):
+    cargas, px, py, directo = nube
+    aprox = evaluar_barnes_hut(cargas, px, py, theta=0)
+    for a, d in zip(aprox, directo):
+        np.testing.assert_allclose(a, d, rtol=1e-12, atol=1e-12 * np.abs(d).max())
+
+
+@pytest.mark.parametrize('theta, tol_V, tol_E', [(0.3, 1e-3, 1e-5), (0.5, 5e-3, 1e-4),
+                                                 (0.7, 1e-2, 5e-4)])
+def test_error_acotado_por_theta(nube, theta, tol_V, tol_E):
+    cargas, px, py, directo = nube
+    error_V, error_E = errores(evaluar_barnes_hut(cargas, px, py, theta=theta), directo)
+    assert error_V < tol_V
+    assert error_E < tol_E
+
+
+def test_arbol_reutilizado_da_lo_mismo(nube):
+    cargas, px, py, _ = nube
+    arbol = ArbolCuadrantes(cargas)
+    for a, b in zip(evaluar_barnes_hut(arbol, px, py), evaluar_barnes_hut(cargas, px, py)):
+        np.testing.assert_array_equal(a, b)
+
+
+def test_punto_sobre_una_carga(nube):
+    cargas, _, _, _ = nube
+    q, x, y = cargas[0]
+    aprox = evaluar_barnes_hut(cargas, [x], [y])
+    directo = calcular_campo_y_potencial_lote(cargas, [x], [y])
+    # V infinito con el signo de la carga; E sin la carga coincidente (y el
+    # resto aproximado con los multipolos)
+    assert np.isinf(aprox[4][0]) and np.sign(aprox[4][0]) == np.sign(q)
+    np.testing.assert_allclose(aprox[0], directo[0], rtol=1e-3)
+    np.testing.assert_allclose(aprox[1], directo[1], rtol=1e-3)
+
+
+def test_theta_negativo():
+    with pytest.raises(ValueError):
+        evaluar_barnes_hut([(1e-9, 0, 0)], [1.0], [1.0], theta=-0.1)
@@ -0,0 +1,119 @@
+"""
+Puntos de equilibrio en el eje y en el plano contra una búsqueda por fuerza
+bruta sobre muestreos densos de calcular_campo_y_potencial_lote.
+"""
+import numpy as np
+import pytest
+
+from logic import (calcular_campo_y_potencial_lote, encontrar_equilibrios_plano,
+                   encontrar_puntos_equilibrio)
+
+# Tres raíces en el eje sin cargas sobre él: un solo intervalo con varias raíces
+FUERA_DEL_EJE = [(1e-6, -1, 0.5), (1e-6, 1.2, -0.3), (-2e-6, 0.2, 1.4)]
+CUADRADO = [(1e-6, 1, 1), (1e-6, -1, 1), (1e-6, -1, -1), (1e-6, 1, -1)]
+PREDETERMINADA = [(1, -2, 0), (-3, 0, 0), (2, 3, 0)]
+
+
+def muchas_en_el_eje(n=60, semilla=3):
+    rng = np.random.default_rng(semilla)
+    return list(zip(rng.uniform(0.5, 2, n) * rng.choice([-1, 1], n),
+                    np.sort(rng.uniform(-4.9, 4.9, n)), np.zeros(n)))
+
+
+def bruto_eje(cargas, rango, n=200_000, margen=0.01):
+    """
+    Cambios de signo de Ex entre muestras vecinas, lejos de las cargas del
+    eje. Con n par ninguna muestra cae en el centro, donde Ex = 0 exacto en
+    las configuraciones simétricas.
+    """
+    x = np.linspace(rango[0], rango[1], n)
+    Ex = calcular_campo_y_potencial_lote(cargas, x, np.zeros_like(x))[0]
+    i = np.nonzero(Ex[:-1] * Ex[1:] < 0)[0]
+    en_eje = np.array([xq for _, xq, yq in cargas if yq == 0])
+    if en_eje.size:
+        i = i[np.abs(x[i, None] - en_eje).min(axis=1) > margen]
+    return 0.5 * (x[i] + x[i + 1]), x[1] - x[0]
+
+
+def bruto_plano(cargas, rango, n=801):
+    """
+    Centros de las celdas de una grilla fina donde cambian de signo Ex y Ey
+    a la vez, lejos de las cargas. La grilla está corrida para no caer sobre
+    los ejes de simetría, donde una componente es exactamente 0.
+    """
+    h = (rango[1] - rango[0]) / (n - 1)
+    g = np.linspace(rango[0], rango[1], n) + 0.37 * h
+    X, Y = np.meshgrid(g, g)
+    Ex, Ey, _, _, _ = calcular_campo_y_potencial_lote(cargas, X, Y)
+
+    def cambia(F):
+        esquinas = np.stack([F[:-1, :-1], F[1:, :-1], F[:-1, 1:], F[1:, 1:]])
+        return (esquinas.min(axis=0) < 0) & (esquinas.max(axis=0) > 0)
+
+    cx, cy = X[:-1, :-1] + h / 2, Y[:-1, :-1] + h / 2
+    celdas = cambia(Ex) & cambia(Ey)
+    for _, xq, yq in cargas:
+        celdas &= np.hypot(cx - xq, cy - yq) > 3 * h
+    return np.column_stack([cx[celdas], cy[celdas]]), h
+
+
+def derivada_Ex(cargas, x, h=1e-5):
+    Ex = calcular_campo_y_potencial_lote(cargas, np.array([x - h, x + h]), np.zeros(2))[0]
+    return (Ex[1] - Ex[0]) / (2 * h)
+
+
+def hessiana_V(cargas, x, y, h=1e-4):
+    """Hessiana del potencial por diferencias centradas."""
+    def V(dx, dy):
+        return calcular_campo_y_potencial_lote(cargas, [x + dx], [y + dy])[4][0]
+    vxx = (V(h, 0) - 2 * V(0, 0) + V(-h, 0)) / h**2
+    vyy = (V(0, h) - 2 * V(0, 0) + V(0, -h)) / h**2
+    vxy = (V(h, h) - V(h, -h) - V(-h, h) + V(-h, -h)) / (4 * h**2)
+    return np.array([[vxx, vxy], [vxy, vyy]])
+
+
+@pytest.mark.parametrize('cargas', [FUERA_DEL_EJE, CUADRADO, PREDETERMINADA,
+                                    muchas_en_el_eje()],
+                         ids=['fuera_del_eje', 'cuadrado', 'predeterminada', 'muchas'])
+def test_eje_coincide_con_fuerza_bruta(cargas):
+    encontrados = encontrar_puntos_equilibrio(cargas, (-5, 5))
+    bruto, paso = bruto_eje(cargas, (-5, 5))
+
+    x = np.array([x for x, _ in encontrados])
+    assert x.size == bruto.size
+    if x.size:
+        np.testing.assert_allclose(x, bruto, atol=paso)
+    for x_eq, estabilidad in encontrados:
+        esperada = 'estable' if derivada_Ex(cargas, x_eq) < 0 else 'inestable'
+        assert estabilidad == esperada
+
+
+def test_eje_varias_raices_en_un_intervalo():
+    # Sin cargas sobre el eje hay un solo intervalo, con tres raíces
+    assert len(encontrar_puntos_equilibrio(FUERA_DEL_EJE, (-5, 5))) == 3
+
+
+@pytest.mark.parametrize('cargas', [FUERA_DEL_EJE, CUADRADO, PREDETERMINADA],
+                         ids=['fuera_del_eje', 'cuadrado', 'predeterminada'])
+def test_plano_coincide_con_fuerza_bruta(cargas):
+    encontrados = encontrar_equilibrios_plano(cargas, (-5, 5))
+    bruto, h = bruto_plano(cargas, (-5, 5))
+
+    puntos = np.array([(x, y) for x, y, _, _ in encontrados]).reshape(-1, 2)
+    # Cada celda de la fuerza bruta tiene una raíz cerca y viceversa
+    assert (len(bruto) == 0) == (len(puntos) == 0)
+    if len(puntos):
+        distancias = np.hypot(*(bruto[:, None, :] - puntos[None, :, :]).transpose(2, 0, 1))
+        assert distancias.min(axis=1).max() < 2 * h
+        assert distancias.min(axis=0).max() < 2 * h
+
+    for x, y, tipo, autovalores in encontrados:
+        esperados = np.linalg.eigvalsh(hessiana_V(cargas, x, y))
+        np.testing.assert_allclose(autovalores, esperados, rtol=1e-3)
+        signos = tuple(np.sign(esperados))
+        assert tipo == {(1, 1): 'minimo', (-1, -1): 'maximo'}.get(signos, 'silla')
+
+
+def test_plano_cuadrado_clasificacion():
+    tipos = sorted(t for _, _, t, _ in encontrar_equilibrios_plano(CUADRADO, (-5, 5)))
+    assert tipos == ['minimo', 'silla', 'silla', 'silla', 'silla']
@@ -0,0 +1,80 @@
+"""
+FMM contra la suma directa de calcular_campo_y_potencial_lote.
+"""
+import numpy as np
+import pytest
+
+from fmm import ExpansionFMM, evaluar_fmm
+from logic import calcular_campo_y_potencial_lote
+
+
+@pytest.fixture(scope='module')
+def nube():
+    # Más cargas que N_DIRECTO, con ambos signos, para que se use el FMM
+    rng = np.random.default_rng(1)
+    n = 600
+    cargas = list(zip(rng.choice([-1, 1], n) * rng.uniform(1e-9, 1e-8, n),
+                      rng.uniform(-1, 1, n), rng.uniform(-1, 1, n)))
+    px, py = np.meshgrid(np.linspace(-1.5, 1.5, 40), np.linspace(-1.5, 1.5, 40))
+    return cargas, px, py, calcular_campo_y_potencial_lote(cargas, px, py)
+
+
+def errores(aprox, directo):
+    Ex, Ey, _, _, V = aprox
+    Ex_d, Ey_d, magnitud_d, _, V_d = directo
+    error_V = np.linalg.norm(V - V_d) / np.linalg.norm(V_d)
+    error_E = np.linalg.norm(np.hypot(Ex - Ex_d, Ey - Ey_d)) / np.linalg.norm(magnitud_d)
+    return error_V, error_E
+
+
+@pytest.mark.parametrize('tolerancia', [1e-4, 1e-6, 1e-8])
+def test_respeta_la_tolerancia(nube, tolerancia):
+    cargas, px, py, directo = nube
+    error_V, error_E = errores(evaluar_fmm(cargas, px, py, tolerancia=tolerancia), directo)
+    assert error_V < 10 * tolerancia
+    assert error_E < 10 * tolerancia
+
+
+def test_error_baja_con_el_orden(nube):
+    cargas, px, py, directo = nube
+    errores_V = [errores(evaluar_fmm(cargas, px, py, orden=p), directo)[0]
+                 for p in (4, 6, 8, 10)]
+    assert all(a > b for a, b in zip(errores_V, errores_V[1:]))
+
+
+def test_expansion_reutilizada_da_lo_mismo(nube):
+    cargas, px, py, _ = nube
+    expansion = ExpansionFMM(cargas, (-1.5, 1.5, -1.5, 1.5), tolerancia=1e-6, n_puntos=px.size)
+    # Evaluada por partes, como los bloques de una malla
+    mitad = px.shape[0] // 2
+    partes = [evaluar_fmm(expansion, px[:mitad], py[:mitad]),
+              evaluar_fmm(expansion, px[mitad:], py[mitad:])]
+    juntos = evaluar_fmm(cargas, px, py, tolerancia=1e-6)
+    for i, b in enumerate(juntos):
+        np.testing.assert_allclose(np.concatenate([partes[0][i], partes[1][i]]), b,
+                                   rtol=1e-12, atol=1e-12 * np.abs(b).max())
+
+
+def test_fuera_de_la_region(nube):
+    cargas, _, _, _ = nube
+    expansion = ExpansionFMM(cargas, (-1.5, 1.5, -1.5, 1.5))
+    with pytest.raises(ValueError):
+        evaluar_fmm(expansion, [5.0], [0.0])
+
+
+def test_punto_sobre_una_carga(nube):
+    cargas, _, _, _ = nube
+    q, x, y = cargas[0]
+    aprox = evaluar_fmm(cargas, [x], [y])
+    directo = calcular_campo_y_potencial_lote(cargas, [x], [y])
+    # V infinito con el signo de la carga; E sin la carga coincidente
+    assert np.isinf(aprox[4][0]) and np.sign(aprox[4][0]) == np.sign(q)
+    np.testing.assert_allclose(aprox[0], directo[0], rtol=1e-5)
+    np.testing.assert_allclose(aprox[1], directo[1], rtol=1e-5)
+
+
+def test_pocas_cargas_suma_directa():
+    cargas = [(1e-9, 0.0, 0.0), (-2e-9, 1.0, 0.5)]
+    px, py = np.array([0.3, -1.0]), np.array([0.2, 2.0])
+    for a, b in zip(evaluar_fmm(cargas, px, py), calcular_campo_y_potencial_lote(cargas, px, py)):
+        np.testing.assert_array_equal(a, b)
@@ -0,0 +1,38 @@
+"""
+Caché de líneas de campo: las entradas en disco evitan volver a integrar.
+"""
+import numpy as np
+
+import lineas_campo
+from cache import CacheResultados
+from lineas_campo import CacheTrayectorias, trazar_lineas_cacheado
+
+CARGAS = [(1e-6, -1.0, 0.0), (1e-6, 1.0, 0.0), (-2e-6, 0.0, 1.3)]
+SEMILLAS = (np.array([-0.9, 1.1]), np.array([0.1, 0.0]))
+
+
+def test_entrada_en_disco_se_lee_sin_integrar(tmp_path, monkeypatch):
+    disco = CacheResultados(str(tmp_path))
+    primera = trazar_lineas_cacheado(CARGAS, *SEMILLAS, dominio=(-3, 3),
+                                     cache=CacheTrayectorias(disco=disco))
+
+    def no_integrar(*args, **kwargs):
+        raise AssertionError('no debería integrar')
+
+    monkeypatch.setattr(lineas_campo, 'trazar_lineas_adaptativo', no_integrar)
+    # Otro caché (memoria vacía, como al reabrir el programa) sobre el mismo disco
+    segunda = trazar_lineas_cacheado(CARGAS, *SEMILLAS, dominio=(-3, 3),
+                                     cache=CacheTrayectorias(disco=lambda: disco))
+
+    assert len(segunda) == len(primera)
+    np.testing.assert_array_equal(segunda.x, primera.x)
+    np.testing.assert_array_equal(segunda.inicios, primera.inicios)
+    assert [segunda.motivo(i) for i in range(len(segunda))] == \
+        [primera.motivo(i) for i in range(len(primera))]
+
+
+def test_sin_disco_solo_memoria():
+    cache = CacheTrayectorias(max_entradas=1)
+    trazar_lineas_cacheado(CARGAS, *SEMILLAS, dominio=(-3, 3), cache=cache)
+    trazar_lineas_cacheado(CARGAS, *SEMILLAS, dominio=(-2, 2), cache=cache)
+    assert len(cache) == 1
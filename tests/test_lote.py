@@ -0,0 +1,41 @@
+"""
+Registros de lote.py: JSON estricto aunque haya valores no finitos.
+"""
+import json
+import math
+
+from lote import procesar_configuracion, registro_json
+
+
+def test_no_finitos_pasan_a_null_y_se_listan():
+    registro = {'id': 'a', 'potencial': math.inf,
+                'campo': {'Ex': 1.0, 'magnitud': -math.inf},
+                'equilibrios_plano': [{'autovalores': [2.0, math.nan]}]}
+    limpio = registro_json(registro)
+
+    assert limpio['potencial'] is None
+    assert limpio['campo'] == {'Ex': 1.0, 'magnitud': None}
+    assert limpio['equilibrios_plano'][0]['autovalores'] == [2.0, None]
+    assert limpio['no_finitos'] == ['potencial', 'campo.magnitud',
+                                    'equilibrios_plano[0].autovalores[1]']
+    assert registro['potencial'] == math.inf
+    json.dumps(limpio, allow_nan=False)
+
+
+def test_registro_finito_no_cambia():
+    registro = {'id': 'a', 'campo': {'Ex': 1.0}, 'punto': [0.5, 0.0]}
+    assert registro_json(registro) == registro
+
+
+def test_punto_sobre_una_carga():
+    config = {'cargas': [{'valor': 1e-6, 'x': 0, 'y': 0},
+                         {'valor': 1e-6, 'x': 1, 'y': 0},
+                         {'valor': -2e-6, 'x': 0, 'y': 1}],
+              'punto_entrada': {'x': 0, 'y': 0}}
+    registro = procesar_configuracion(('a', 'a', config, None, '.', ()))
+    limpio = registro_json(registro)
+
+    assert 'error' not in registro
+    assert limpio['potencial'] is None
+    assert 'potencial' in limpio['no_finitos']
+    json.dumps(limpio, allow_nan=False)
@@ -0,0 +1,18 @@
+"""
+Evaluación de la malla en varios procesos: mismo resultado que en uno.
+"""
+import numpy as np
+import pytest
+
+from malla import evaluar_malla
+
+CARGAS = [(1e-6, -1.0, 0.0), (1e-6, 1.0, 0.0), (-2e-6, 0.0, 1.3)]
+
+
+@pytest.mark.parametrize('en_disco', [False, True])
+def test_paralelo_coincide_con_serie(tmp_path, en_disco):
+    serie = evaluar_malla(CARGAS, (-4, 4), 150, campo=True)
+    paralelo = evaluar_malla(CARGAS, (-4, 4), 150, campo=True, procesos=2, tam_bloque=32,
+                             directorio=str(tmp_path) if en_disco else None)
+    for nombre in ('V', 'Ex', 'Ey'):
+        np.testing.assert_array_equal(getattr(paralelo, nombre), getattr(serie, nombre))
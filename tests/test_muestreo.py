@@ -0,0 +1,97 @@
+"""
+Muestreo adaptativo de curvas (muestreo.py) contra una referencia uniforme
+densa: la interpolación lineal de la muestra tiene que quedar dentro de la
+tolerancia y los tramos recortados tienen que ser los de la referencia.
+"""
+import numpy as np
+import pytest
+
+from logic import (ConjuntoCargas, campo_en_eje, limite_potencial, muestrear_campo_en_eje,
+                   muestrear_potencial_en_linea, potencial_en_eje)
+from muestreo import ANCHO_MINIMO_RELATIVO, muestrear_linea
+
+RANGO = (-5, 5)
+CARGAS = ConjuntoCargas.desde([(1e-6, -1, 0), (1e-6, 1.2, 0.3), (-2e-6, 0.2, 0)])
+TOLERANCIA = 3e-4
+
+
+def comparar(muestreo, referencia, limite, singulares=(), n=400_001):
+    """
+    Retorna: (error máximo relativo a 2*limite fuera de los intervalos que
+    tocan un recorte, puntos recortados en la referencia fuera de los tramos,
+    puntos de los tramos no recortados en la referencia lejos de sus bordes)
+    """
+    x = np.linspace(RANGO[0], RANGO[1], n)
+    valores = referencia(x)
+    recortado = ~np.isfinite(valores) | (np.abs(valores) > limite)
+    # Sobre una carga del eje la referencia da 0 (la carga no aporta): cuenta
+    # como recortado, igual que en el muestreo
+    borde = ANCHO_MINIMO_RELATIVO * (RANGO[1] - RANGO[0])
+    for x_carga in singulares:
+        recortado |= np.abs(x - x_carga) <= borde
+    visibles = np.clip(np.nan_to_num(valores), -limite, limite)
+
+    interpolado = np.interp(x, muestreo.x,
+                            np.clip(np.nan_to_num(muestreo.valores), -limite, limite))
+    i = np.searchsorted(muestreo.x, x, side='right').clip(1, len(muestreo.x) - 1)
+    junto_a_recorte = muestreo.recortado[i - 1] | muestreo.recortado[i]
+    error = np.abs(interpolado - visibles)[~junto_a_recorte].max() / (2 * limite)
+
+    en_tramo = np.zeros(n, dtype=bool)
+    lejos_de_bordes = np.zeros(n, dtype=bool)
+    for a, b in muestreo.recortes:
+        en_tramo |= (x >= a) & (x <= b)
+        lejos_de_bordes |= (x >= a + borde) & (x <= b - borde)
+    faltantes = int((recortado & ~en_tramo & ~junto_a_recorte).sum())
+    sobrantes = int((lejos_de_bordes & ~recortado).sum())
+    return error, faltantes, sobrantes
+
+
+def test_campo_en_eje_contra_referencia():
+    limite = 1e6
+    muestreo = muestrear_campo_en_eje(CARGAS, RANGO, limite, tolerancia=TOLERANCIA)
+    error, faltantes, sobrantes = comparar(muestreo, lambda x: campo_en_eje(CARGAS, x)[0],
+                                           limite, CARGAS.x[CARGAS.y == 0])
+    assert error < TOLERANCIA
+    assert faltantes == 0 and sobrantes == 0
+    assert muestreo.evaluaciones < 1000
+
+
+@pytest.mark.parametrize('y_fijo', [0.0, 0.5])
+def test_potencial_en_linea_contra_referencia(y_fijo):
+    limite = limite_potencial(CARGAS, RANGO)
+    muestreo = muestrear_potencial_en_linea(CARGAS, *RANGO, y_fijo=y_fijo,
+                                            tolerancia=TOLERANCIA)
+    error, faltantes, sobrantes = comparar(
+        muestreo, lambda x: potencial_en_eje(CARGAS, x, y_fijo), limite,
+        CARGAS.x[CARGAS.y == y_fijo])
+    assert error < TOLERANCIA
+    assert faltantes == 0 and sobrantes == 0
+    assert muestreo.evaluaciones < 1000
+
+
+def test_cargas_del_eje_quedan_en_tramos_recortados():
+    muestreo = muestrear_campo_en_eje(CARGAS, RANGO, 1e6)
+    en_eje = CARGAS.x[CARGAS.y == 0]
+    assert len(muestreo.recortes) == len(en_eje)
+    for x_carga, (a, b) in zip(np.sort(en_eje), muestreo.recortes):
+        assert a <= x_carga <= b
+        # La carga se evalúa como recortada: la curva no une los dos lados
+        assert np.isnan(muestreo.valores[muestreo.x == x_carga]).all()
+        assert np.isnan(muestreo.con_huecos()[muestreo.x == x_carga]).all()
+
+
+def test_menor_tolerancia_menor_error():
+    limite = 1e6
+    errores = []
+    for tolerancia in (1e-2, 1e-3, 1e-4):
+        muestreo = muestrear_campo_en_eje(CARGAS, RANGO, limite, tolerancia=tolerancia,
+                                          max_evaluaciones=20_000)
+        errores.append(comparar(muestreo, lambda x: campo_en_eje(CARGAS, x)[0], limite)[0])
+    assert errores[0] > errores[1] > errores[2]
+
+
+def test_respeta_max_evaluaciones():
+    muestreo = muestrear_linea(np.sin, (0, 100), 1.0, tolerancia=1e-9, max_evaluaciones=500)
+    assert muestreo.evaluaciones <= 500
+    assert np.all(np.diff(muestreo.x) > 0)
@@ -0,0 +1,87 @@
+"""Reglas de los puntos singulares con cada backend de nucleos.py."""
+import math
+
+import numpy as np
+import pytest
+
+import logic
+import nucleos
+
+
+@pytest.fixture(params=nucleos.backends_disponibles())
+def backend(request):
+    anterior = nucleos.backend_actual()
+    nucleos.seleccionar_backend(request.param)
+    yield request.param
+    nucleos.seleccionar_backend(anterior)
+
+
+def test_auto_usa_numpy():
+    anterior = nucleos.backend_actual()
+    try:
+        assert nucleos.seleccionar_backend('auto') == 'numpy'
+    finally:
+        nucleos.seleccionar_backend(anterior)
+
+
+def test_punto_sobre_la_carga(backend):
+    cargas = [(1e-6, 0.0, 0.0), (-2e-6, 1.0, 0.0)]
+    Ex, Ey, magnitud, _ = logic.calcular_campo_total(cargas, 0.0, 0.0)
+    # La carga que coincide no aporta; queda sólo la otra
+    esperado = logic.K * 2e-6
+    assert Ex == pytest.approx(esperado) and Ey == 0.0
+    assert magnitud == pytest.approx(esperado)
+    assert logic.calcular_potencial_total(cargas, 0.0, 0.0) == math.inf
+    assert logic.calcular_potencial_total([(-1e-6, 0.0, 0.0)], 0.0, 0.0) == -math.inf
+    assert logic.calcular_campo_electrico(1e-6, 0.0, 0.0, 0.0, 0.0) == (0.0, 0.0)
+    assert logic.calcular_potencial_electrico(-1e-6, 0.0, 0.0, 0.0, 0.0) == -math.inf
+
+
+@pytest.mark.parametrize('x, Ex_esperado', [
+    (1e-100, logic.K * 1e-6 / 1e-200),  # finito, enorme
+    (1e-110, math.inf),                  # r**3 da 0: inf, no ZeroDivisionError
+    (1e-200, 0.0),                       # dx*dx da 0: cuenta como coincidente
+])
+def test_muy_cerca_de_la_carga_no_falla(backend, x, Ex_esperado):
+    cargas = [(1e-6, 0.0, 0.0)]
+    with np.errstate(all='ignore'):
+        Ex, Ey, magnitud, _ = logic.calcular_campo_total(cargas, x, 0.0)
+        Ex1, _ = logic.calcular_campo_electrico(1e-6, 0.0, 0.0, x, 0.0)
+    assert Ex == pytest.approx(Ex_esperado) and Ex1 == pytest.approx(Ex_esperado)
+    # Sin OverflowError al elevar al cuadrado (con Ey = inf*0 = nan, como en NumPy)
+    if abs(Ex_esperado) < 1e150:
+        assert magnitud == pytest.approx(abs(Ex_esperado))
+    else:
+        assert not math.isfinite(magnitud)
+    # Dentro de la distancia mínima el potencial se acota; con r == 0 es inf
+    V_esperado = math.inf if Ex_esperado == 0 else logic.K * 1e-6 / 1e-6
+    assert logic.calcular_potencial_total(cargas, x, 0.0) == pytest.approx(V_esperado)
+
+
+def test_backends_coinciden():
+    rng = np.random.default_rng(1)
+    cargas = [(float(q), float(x), float(y)) for q, x, y in
+              zip(rng.uniform(-5, 5, 20) * 1e-6, *rng.uniform(-3, 3, (2, 20)))]
+    puntos = rng.uniform(-3, 3, (50, 2))
+    resultados = {}
+    anterior = nucleos.backend_actual()
+    try:
+        for nombre in nucleos.backends_disponibles():
+            nucleos.seleccionar_backend(nombre)
+            resultados[nombre] = [(logic.calcular_campo_total(cargas, x, y)[:2],
+                                   logic.calcular_potencial_total(cargas, x, y))
+                                  for x, y in puntos]
+    finally:
+        nucleos.seleccionar_backend(anterior)
+    for nombre, valores in resultados.items():
+        np.testing.assert_allclose(np.array([v[0] for v in valores]),
+                                   np.array([v[0] for v in resultados['numpy']]), rtol=1e-12)
+        np.testing.assert_allclose([v[1] for v in valores],
+                                   [v[1] for v in resultados['numpy']], rtol=1e-12)
+
+
+def test_lote_respeta_las_mismas_reglas():
+    cargas = [(1e-6, 0.0, 0.0), (-2e-6, 1.0, 0.0)]
+    Ex, Ey, _, _, V = logic.calcular_campo_y_potencial_lote(cargas, np.array([0.0, 1.0]), 0.0)
+    assert V[0] == math.inf and V[1] == -math.inf
+    assert Ex[0] == pytest.approx(logic.K * 2e-6)